@@ -1,3 +1,4 @@
+from .check_completion import *
 from .check_filters import *
 from .check_cameras import *
 from .check_focusers import *
@@ -1,96 +1,63 @@
-from asyncio import wait_for
 from dfobserve.webserver.WebRequests import SendWebRequestNB
 from dfobserve.utils.HardwareUtils import HardwareStatus
-import sys
-import time
+from dfobserve.checks.check_completion import CalculationDone, WatchUnitChecks
 import fire
-from tqdm import tqdm
 
 
-def AllCheckCameras(ntests=10, update=True, **kwargs):
+def _score_camera_check(name, api_res):
+    if api_res.XtraCalculations.CalculationErrorHasOccurred:
+        return f"The Calculation {name} for encountered an error. Machine will be marked DOWN."
+    elif api_res.CameraProperties.Bias != "Acceptable":
+        return f"The Bias for {name} was not acceptable. Machine will be marked DOWN."
+    elif api_res.CameraProperties.ReadNoise != "Acceptable":
+        return f"The ReadNoise for {name} was not acceptable. Machine will be marked DOWN."
+    return None
+
+
+def AllCheckCameras(
+    ntests=10, update=True, timeout=None, hardware_status=None, min_check_time=2, **kwargs
+):
     """
     Runs a Camera Check command via the webserver.
 
+    Each unit is polled until its calculation finishes and scored straight away, so fast units
+    don't wait for the slowest one. Units still calculating at the deadline are marked down.
+
     Parameters
     ----------
     ntests: int, default: 10
         number of tests to run. Each test takes 2 bias images and makes a comparison, and another overarching test uses all frames.
     update: bool, default: True
         whether to actually mark units down based on test results
+    timeout: float, optional
+        deadline in seconds for the units to finish their tests. Default: ntests * 16.
+    hardware_status: HardwareStatus, optional
+        status to read and mark units in (e.g., shared between concurrent checks). Default: the standard status file.
+    min_check_time: float, default: 2
+        seconds before a unit that was never seen busy counts as finished (until the pi flags
+        the check as started, it still reports the previous results).
     **kwargs
         any specific kwargs to pass to SendWebRequestNB
     """
-    hs = HardwareStatus()
+    hs = hardware_status if hardware_status is not None else HardwareStatus()
     skip = hs.get_status(which="down", verbose=False, return_units=True)
-    print(f"Running Camera tests with {ntests} tests.")
+    if timeout is None:
+        timeout = ntests * 16
+    print(f"Running Camera tests with {ntests} tests (deadline {timeout} s).")
     command = f"calculation?type=check-camera&ntests={ntests}"
-    res = SendWebRequestNB(
+    handle = SendWebRequestNB(
         command,
         which="all",
         skip=skip,
         verbose=False,
-        wait_for_response=False,
+        return_handle=True,
+        is_done=CalculationDone(min_elapsed=min_check_time),
+        timeout_global=timeout,
+        max_poll_interval=5,
         **kwargs,
     )
-    for i in res.df.index:
-        res_summary = res.df.loc[i, "full_response"]
-        if res_summary == 0:
-            print(
-                f"HTTPError, Unknown command. Unit {res.df.loc[i,'Name']} will be Marked Down."
-            )
-            hs.MarkUnitDown(res.df.loc[i, "Name"])
-        elif res_summary == 1:
-            print(f"URLError. Unit {res.df.loc[i,'Name']} will be Marked Down.")
-            hs.MarkUnitDown(res.df.loc[i, "Name"])
-        elif res_summary == 2:
-            print(f"Unknown Error. Unit {res.df.loc[i,'Name']} will be Marked Down.")
-            hs.MarkUnitDown(res.df.loc[i, "Name"])
-
-    wait = ntests * 8
-    print(f"Waiting for Cameras to Run Tests ({wait} s).")
-    with tqdm(total=wait) as pbar:
-        for i in range(wait):
-            time.sleep(1)
-            pbar.update(1)
-
-    print("Assessing Checks for units with responses.")
-
-    status = SendWebRequestNB(
-        "status",
-        which="all",
-        skip=hs.get_status(which="down", verbose=False, return_units=True),
-        verbose=False,
-        wait_for_response=False,
-    )
-    for i in status.df.index:
-        api_res = status.get_response_by_name(status.df.loc[i, "Name"])
-        if api_res.Activity.CalculationInProgress:
-            print(
-                f"Camera Server for {status.df.loc[i,'Name']} is taking too long to run its test. Machine will be marked DOWN."
-            )
-            if update:
-                hs.MarkUnitDown(status.df.loc[i, "Name"])
-        elif api_res.XtraCalculations.CalculationErrorHasOccurred:
-            print(
-                f"The Calculation {status.df.loc[i,'Name']} for encountered an error. Machine will be marked DOWN."
-            )
-            if update:
-                hs.MarkUnitDown(status.df.loc[i, "Name"])
-
-        elif api_res.CameraProperties.Bias != "Acceptable":
-            print(
-                f"The Bias for {status.df.loc[i,'Name']} was not acceptable. Machine will be marked DOWN."
-            )
-            if update:
-                hs.MarkUnitDown(status.df.loc[i, "Name"])
-        elif api_res.CameraProperties.ReadNoise != "Acceptable":
-            print(
-                f"The ReadNoise for {status.df.loc[i,'Name']} was not acceptable. Machine will be marked DOWN."
-            )
-            if update:
-                hs.MarkUnitDown(status.df.loc[i, "Name"])
-
-    return status
+    WatchUnitChecks(handle, _score_camera_check, hs, update=update)
+    return handle.summary()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,97 @@
+"""
+Scoring of unit health checks as each unit finishes, instead of after a fixed wait.
+"""
+import time
+
+from tqdm import tqdm
+
+__all__ = ["CalculationDone", "WatchUnitChecks"]
+
+
+def CalculationDone(min_elapsed: float, busy: list = ["CalculationInProgress"]):
+    """
+    Build the `is_done` test for a calculation broadcast (a camera or focuser check).
+
+    Right after the command, a pi may not have flagged the calculation as started yet, and then
+    still reports the previous run's results. So a unit only counts as done once none of the
+    `busy` activities are set, and after either one of them was seen set on an earlier poll, or
+    `min_elapsed` seconds have passed since this function was called.
+
+    Parameters
+    ----------
+    min_elapsed: float
+        seconds after which a unit that was never seen busy counts as done once idle.
+    busy: list, default: ['CalculationInProgress']
+        Activity flags that mean the unit is still working.
+
+    Returns
+    -------
+    is_done: callable
+        function of a parsed status dictionary, for SendWebRequestNB(..., is_done=).
+    """
+    t0 = time.monotonic()
+    seen_busy = set()
+
+    def is_done(response_dict):
+        activity = response_dict["Activity"]
+        unit = response_dict.get("IPAddress")
+        if any(activity.get(flag, False) for flag in busy):
+            seen_busy.add(unit)
+            return False
+        return unit in seen_busy or time.monotonic() - t0 >= min_elapsed
+
+    return is_done
+
+
+def WatchUnitChecks(handle, score, hs, update: bool = True, verbose: bool = False):
+    """
+    Score each unit of a check broadcast the moment it finishes, and mark failing units down.
+
+    Parameters
+    ----------
+    handle: BroadcastHandle
+        handle returned by SendWebRequestNB(..., return_handle=True) for the check command. Its
+        global timeout is the deadline: units still working by then are marked down.
+    score: callable
+        function taking (name, APIResponse) of a finished unit and returning None if the unit
+        passed, or a message explaining why it failed.
+    hs: HardwareStatus
+        status file to mark units down in.
+    update: bool, default: True
+        whether to mark units that fail the check down. Units that cannot be reached are always
+        marked down.
+    verbose: bool, default: False
+        print each unit's result as it comes in.
+
+    Returns
+    -------
+    failed: list
+        names of the units that were unreachable, failed the check or missed the deadline.
+    """
+    failed = []
+    # the units are marked down in memory as they fail, and written in a single update
+    with hs.batch(), tqdm(total=len(handle.futures)) as pbar:
+        for name, summary, response in handle.as_completed():
+            pbar.update(1)
+            if summary != "SUCCESS":
+                print(f"{summary}. Unit {name} will be Marked Down.")
+                failed.append(name)
+                hs.MarkUnitDown(name)
+                continue
+            reason = score(name, response)
+            if reason is None:
+                if verbose:
+                    print(f"Unit {name} passed.")
+                continue
+            print(reason)
+            failed.append(name)
+            if update:
+                hs.MarkUnitDown(name)
+        for name in handle.pending:
+            print(
+                f"Unit {name} did not finish its check before the deadline. Machine will be marked DOWN."
+            )
+            failed.append(name)
+            if update:
+                hs.MarkUnitDown(name)
+    return failed
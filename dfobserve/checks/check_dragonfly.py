@@ -13,19 +13,120 @@ import fire
 import subprocess as sp
 from dfobserve.webserver import SendWebRequestNB
 import re
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from dfobserve.checks import AllCheckCameras, AllCheckFilterTilters, AllCheckFocusers
 
 
+# Which checks have to finish before a check can start. The mount is independent of the pis,
+# and the per-unit checks skip units the network sweep found to be down. The camera and
+# focuser checks are both calculations, and a pi runs one calculation at a time, so they go
+# one after the other. The filter tilter check runs alongside them.
+CHECK_DEPENDENCIES = {
+    "mount": [],
+    "network": [],
+    "focusers": ["network"],
+    "cameras": ["network", "focusers"],
+    "filters": ["network"],
+}
+
+
+def RunCheckGraph(
+    checks: dict, dependencies: dict = CHECK_DEPENDENCIES, max_workers=None, finished=None
+):
+    """
+    Run checks concurrently, each one as soon as the checks it depends on have finished.
+
+    Parameters
+    ----------
+    checks: dict
+        {name: function} of the checks to run. Functions are called without arguments.
+    dependencies: dict, default: CHECK_DEPENDENCIES
+        {name: [names of checks that must finish first]}. Dependencies that are not in `checks`
+        or `finished` (e.g., skipped) are ignored. Checks whose dependencies can never finish
+        (a cycle) are SKIPPED.
+    max_workers: int, optional
+        maximum number of checks running at once. Default: all that are ready.
+    finished: pandas.DataFrame, optional
+        report of checks that already ran: they count as dependencies, times continue from
+        them, and they are included (first) in the report.
+
+    Returns
+    -------
+    report: pandas.DataFrame
+        one row per check with its status ('OK', 'ERROR', or 'SKIPPED' if a dependency failed),
+        start time and wall time (seconds since the start of the run), result and error.
+    """
+    rows = {}
+    elapsed = 0.0
+    if finished is not None and len(finished) > 0:
+        rows = finished.to_dict(orient="index")
+        elapsed = np.nanmax([(finished.start + finished.wall_time).max(), 0.0])
+    known = set(checks) | set(rows)
+    t0 = time.monotonic() - elapsed
+    waiting = dict(checks)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers or max(len(checks), 1)) as executor:
+        while len(waiting) > 0 or len(running) > 0:
+            for name in list(waiting):
+                deps = [d for d in dependencies.get(name, []) if d in known]
+                if any(rows.get(d, {}).get("status") in ["ERROR", "SKIPPED"] for d in deps):
+                    rows[name] = dict(
+                        status="SKIPPED",
+                        start=np.nan,
+                        wall_time=0.0,
+                        result=None,
+                        error=f"a dependency failed ({', '.join(deps)})",
+                    )
+                    del waiting[name]
+                elif all(rows.get(d, {}).get("status") == "OK" for d in deps):
+                    running[executor.submit(waiting.pop(name))] = (name, time.monotonic() - t0)
+            if len(running) == 0:
+                # nothing running and nothing could start: the rest wait on each other
+                for name in list(waiting):
+                    rows[name] = dict(
+                        status="SKIPPED",
+                        start=np.nan,
+                        wall_time=0.0,
+                        result=None,
+                        error="dependencies can never finish "
+                        f"({', '.join(dependencies.get(name, []))})",
+                    )
+                    del waiting[name]
+                continue
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                name, start = running.pop(future)
+                row = dict(start=start, wall_time=time.monotonic() - t0 - start)
+                try:
+                    row.update(status="OK", result=future.result(), error=None)
+                except Exception as e:
+                    print(f"Check {name} failed: {e!r}")
+                    row.update(status="ERROR", result=None, error=repr(e))
+                rows[name] = row
+    report = pd.DataFrame.from_dict(rows, orient="index")
+    report.index.name = "check"
+    order = [name for name in rows if name not in checks] + [name for name in checks]
+    return report.reindex(order)
+
+
 def AllCheckDragonfly(
     skip: list = [],
     update: bool = True,
     camera_kwargs: dict = {},
     filtertilter_kwargs: dict = {},
     focuser_kwargs: dict = {},
+    parallel: bool = True,
+    hardware_config_file: str = None,
+    reconnect: bool = None,
 ):
     """
     Check the health of the DFNB system and mark pis down if needed.
 
+    The network sweep runs first, on its own (so that its reconnect prompt isn't mixed with the
+    output of other checks); the mount, focuser, camera and filter tilter checks then run
+    concurrently, sharing one HardwareStatus whose changes are written in a single update at
+    the end. The wall time of each check is printed with the summary.
+
     Parameters
     ----------
     skip: list, default: []
@@ -38,11 +139,21 @@ def AllCheckDragonfly(
         keyword arguments accepted by AllCheckFilterTiters to modify the nature of the tests run.
     focuser_kwargs: dict, default: {}
         keyword arguments accepted by AllCheckFocusers to modify the nature of the tests run.
+    parallel: bool, default: True
+        run independent checks concurrently. If False, they run one at a time.
+    hardware_config_file: str, optional
+        hardware template to read the units from. Default (None) uses the standard location.
+    reconnect: bool, optional
+        whether to try to restart the server on units the network sweep found down. Default
+        (None) asks.
     """
+    t0 = time.monotonic()
+    hs = HardwareStatus()
+    web_kwargs = {}
+    if hardware_config_file is not None:
+        web_kwargs["hardware_config_file"] = hardware_config_file
 
-    # Test Mount
-
-    if "mount" not in skip:
+    def check_mount():
         print("Testing the operation of the mount.")
         command = "CheckMount -v"
         mountTimeout = 600
@@ -52,22 +163,26 @@ def AllCheckDragonfly(
             sdterr = res.stderr.decode("utf-8")
             if re.search(r"Mounts OK", stdout):
                 print(stdout.strip())
+                return True
             else:
                 print("Mount Error.")
         except:
             print("Mount Check Unsuccessful. Mount Error.")
+        return False
 
-    hs = HardwareStatus()
-    if "network" not in skip:
+    def check_network():
         print("Initializing Hardware Current Status File.")
         hs.InitializeHardwareStatus()
         # Ping Sticks and see which are accessible
         print("Pinging Pis over webserver to see which are accessible")
-        hs.MarkAccessibleUnitsUp()
+        hs.MarkAccessibleUnitsUp(**web_kwargs)
         down_units = hs.get_status(which="down", verbose=False, return_units=True)
         if len(down_units) > 0:
-            user_in = input("Some Pis are down. Attempt to reconnect? [Y/n]: ")
-            if user_in in ["y", "Y", "yes", "Yes", "YES", ""]:
+            attempt = reconnect
+            if attempt is None:
+                user_in = input("Some Pis are down. Attempt to reconnect? [Y/n]: ")
+                attempt = user_in in ["y", "Y", "yes", "Yes", "YES", ""]
+            if attempt:
                 # Try to start docker daemon and pi server
                 for i in down_units:
                     command1 = f"ssh {i} sudo dockerd &"
@@ -77,31 +192,32 @@ def AllCheckDragonfly(
                     print(r1.stdout.decode("utf-8"))
                     r2 = sp.run(command2, shell=True, capture_output=True)
                     print(r2.stdout.decode("utf-8"))
-    else:
+        return down_units
+
+    # Other checks automatically skip DOWN units, and mark additional units down as they fail.
+    checks = {
+        "mount": check_mount,
+        "network": check_network,
+        "focusers": lambda: AllCheckFocusers(
+            update=update, hardware_status=hs, **web_kwargs, **focuser_kwargs
+        ),
+        "cameras": lambda: AllCheckCameras(
+            update=update, hardware_status=hs, **web_kwargs, **camera_kwargs
+        ),
+        "filters": lambda: AllCheckFilterTilters(
+            update=update, hardware_status=hs, **web_kwargs, **filtertilter_kwargs
+        ),
+    }
+    checks = {name: check for name, check in checks.items() if name not in skip}
+    if "network" in skip:
         print("Warning, running without initializing hardware status file.")
 
-    # Check other aspects. Will automatically skip DOWN units, and mark additional units down as they fail.
-
-    # Focusers
-    if "focusers" not in skip:
-        print("----------------------")
-        print("Checking the Focusers.")
-        print("----------------------")
-        focus_status = AllCheckFocusers(update=update, **focuser_kwargs)
-
-    # Cameras
-    if "cameras" not in skip:
-        print("----------------------")
-        print("Checking the Cameras.")
-        print("----------------------")
-        camera_status = AllCheckCameras(update=update, **camera_kwargs)
-
-    # Filter Tilters
-    if "filters" not in skip:
-        print("----------------------------")
-        print("Checking the Filter Tilters.")
-        print("----------------------------")
-        filter_status = AllCheckFilterTilters(update=update, **filtertilter_kwargs)
+    with hs.batch():
+        report = None
+        if "network" in checks:
+            # alone, since it may prompt; the other checks wait for it anyway
+            report = RunCheckGraph({"network": checks.pop("network")}, max_workers=1)
+        report = RunCheckGraph(checks, max_workers=None if parallel else 1, finished=report)
 
     # Summary:
     print("-------------------------------")
@@ -127,7 +243,11 @@ def AllCheckDragonfly(
     # Print cool map.
 
     print(layout)
-    final_status = SendWebRequestNB("status", verbose=False)
+    print("Wall time of each check:")
+    print(report[["status", "start", "wall_time"]].round(1).to_string())
+    print(f"Total: {time.monotonic() - t0:.1f} s")
+    final_status = SendWebRequestNB("status", verbose=False, **web_kwargs)
+    final_status.check_report = report
     return final_status  # This is a status WebRequest which should have basically everything.
 
 
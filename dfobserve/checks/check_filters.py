@@ -16,7 +16,6 @@ from dfobserve.utils.FilterTilterUtils import (
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
-import time
 from tqdm import tqdm
 
 plt.ion()
@@ -24,6 +23,48 @@ plt.ion()
 import fire
 
 
+def TiltAndSettle(angle: float, tol: float = 0.3, timeout: float = 30, **kwargs):
+    """
+    Tilt the science filters to an angle and return as soon as every unit has settled there.
+
+    Parameters
+    ----------
+    angle: float
+        angle to tilt the Halpha and OIII filters to.
+    tol: float, default: 0.3
+        a unit has settled once its reported angle is within `tol` of `angle` and its tilter has
+        stopped. Other activity on the unit (e.g., a camera check) is ignored.
+    timeout: float, default: 30
+        longest time in seconds to wait.
+    **kwargs
+        any kwargs recognized by SendWebRequestNB
+
+    Returns
+    -------
+    handle: BroadcastHandle
+        handle on the tilt broadcast; units that did not settle are in `handle.pending`.
+    """
+
+    def settled(response_dict):
+        return (
+            not response_dict["Activity"].get("FilterTilting", False)
+            and abs(response_dict["FilterTilter"]["Angle"] - angle) <= tol
+        )
+
+    handle = AllTiltScienceFilters(
+        angle,
+        angle,
+        verbose=False,
+        return_handle=True,
+        is_done=settled,
+        timeout_global=timeout,
+        max_poll_interval=1,
+        **kwargs,
+    )
+    handle.wait()
+    return handle
+
+
 def AllCheckFilterTilters(
     tol: float = 0.3,
     update: bool = True,
@@ -32,6 +73,9 @@ def AllCheckFilterTilters(
     plot: bool = False,
     save_plot: bool = False,
     save_plot_name: str = "FilterTilterChecks.png",
+    settle_timeout: float = 30,
+    hardware_status: HardwareStatus = None,
+    **kwargs,
 ):
     """
     Confirm that Tilters are not stuck and are moving well.
@@ -52,22 +96,29 @@ def AllCheckFilterTilters(
         whether to save a plot to disk
     save_plot_name: str, default: 'FilterTilterChecks.png'
         path/name to save file to disk.
+    settle_timeout: float, default: 30
+        longest time in seconds to wait for the tilters to reach each angle. Each unit is polled
+        until it reports the angle (within tolerance) and no activity; units that don't settle
+        in time show up as out of tolerance.
+    hardware_status: HardwareStatus, optional
+        status to read and mark units in (e.g., shared between concurrent checks). Default: the standard status file.
+    **kwargs
+        any kwargs recognized by SendWebRequestNB
     """
     if verbose:
         print(f"Cycling Tilts And Checking Diffs...")
     ha_diffs = []
     oiii_diffs = []
-    hs = HardwareStatus()
+    hs = hardware_status if hardware_status is not None else HardwareStatus()
     skip = hs.get_status(which="down", verbose=False, return_units=True)
     if verbose:
         all_bad = []
         for angle in check_angles:
             print(f"Testing Theta = {angle} with tolerance {tol}")
-            print("Tilting filters and sleeping 10s.")
-            res = AllTiltScienceFilters(angle, angle, verbose=False, skip=skip)
-            time.sleep(10)
+            print(f"Tilting filters and waiting for them to settle (up to {settle_timeout} s).")
+            TiltAndSettle(angle, tol, settle_timeout, skip=skip, **kwargs)
             check_ha, check_oiii = AllCheckFilterTilts(
-                angle, angle, tol=tol, verbose=False, skip=skip
+                angle, angle, tol=tol, verbose=False, skip=skip, **kwargs
             )
             bad = len(check_ha.loc[check_ha.isGood == False]) + len(
                 check_oiii.loc[check_oiii.isGood == False]
@@ -81,11 +132,10 @@ def AllCheckFilterTilters(
             badlist = list(
                 check_ha.loc[check_ha.isGood == False, "Name"].values
             ) + list(check_oiii.loc[check_oiii.isGood == False, "Name"].values)
-            for i in badlist:
-                if i not in all_bad:
-                    all_bad.append(i)
-                    if update:
-                        hs.MarkUnitDown(i)
+            newly_bad = [i for i in badlist if i not in all_bad]
+            all_bad += newly_bad
+            if update:
+                hs.MarkUnitsDown(newly_bad)
             ha_diffs.append(check_ha.ha_diff.values)
             oiii_diffs.append(check_oiii.oiii_diff.values)
         if len(all_bad) > 0:
@@ -97,15 +147,13 @@ def AllCheckFilterTilters(
         else:
             print("All Units Tested were found to be within tolerance.")
     else:
-        with tqdm(total=10 * len(check_angles)) as pbar:
+        with tqdm(total=len(check_angles)) as pbar:
             all_bad = []
             for angle in check_angles:
-                res = AllTiltScienceFilters(angle, angle, verbose=False, skip=skip)
-                for i in range(10):
-                    time.sleep(1)
-                    pbar.update(1)
+                TiltAndSettle(angle, tol, settle_timeout, skip=skip, **kwargs)
+                pbar.update(1)
                 check_ha, check_oiii = AllCheckFilterTilts(
-                    angle, angle, tol=tol, verbose=False, skip=skip
+                    angle, angle, tol=tol, verbose=False, skip=skip, **kwargs
                 )
                 bad = len(check_ha.loc[check_ha.isGood == False]) + len(
                     check_oiii.loc[check_oiii.isGood == False]
@@ -113,11 +161,10 @@ def AllCheckFilterTilters(
                 badlist = list(
                     check_ha.loc[check_ha.isGood == False, "Name"].values
                 ) + list(check_oiii.loc[check_oiii.isGood == False, "Name"].values)
-                for i in badlist:
-                    if i not in all_bad:
-                        all_bad.append(i)
-                        if update:
-                            hs.MarkUnitDown(i)
+                newly_bad = [i for i in badlist if i not in all_bad]
+                all_bad += newly_bad
+                if update:
+                    hs.MarkUnitsDown(newly_bad)
                 ha_diffs.append(check_ha.ha_diff.values)
                 oiii_diffs.append(check_oiii.oiii_diff.values)
         if len(all_bad) > 0:
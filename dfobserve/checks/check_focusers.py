@@ -7,11 +7,27 @@ from dfobserve.utils.HardwareUtils import HardwareStatus
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
-import time
-from tqdm import tqdm
 import fire
 
 from dfobserve.webserver import SendWebRequestNB
+from dfobserve.checks.check_completion import CalculationDone, WatchUnitChecks
+
+
+def _focuser_check_scorer(verbose=False):
+    def score(name, api_res):
+        result = api_res.Focus.FocuserCheckResult
+        if result == None:
+            print(f"Focuser Check value for {name} is None; Likely a focuser error")
+            return None
+        if result.startswith("fail"):
+            if verbose:
+                print(result)
+            return f"Unit {name} did not have a successful check. Unit will be marked DOWN."
+        elif result.startswith("error"):
+            return f"Unit {name} had a focuser communication error. Unit will be marked DOWN."
+        return None
+
+    return score
 
 
 def AllCheckFocusers(
@@ -20,12 +36,18 @@ def AllCheckFocusers(
     use_birger: bool = True,
     verbose: bool = False,
     update: bool = True,
+    timeout: float = 60,
+    hardware_status: HardwareStatus = None,
+    min_check_time: float = 2,
     **kwargs,
 ):
     """
     Check the focusers by moving to a specific value and checking focus
     value is within tolerance, then moving back and checking again.
 
+    Each unit is polled until its check finishes and scored straight away; units still checking
+    at the deadline are marked down.
+
     Parameters
     ----------
     movement: int, default: 1000
@@ -38,47 +60,34 @@ def AllCheckFocusers(
         verbose display of test results
     update: bool, default: True
         whether to actually mark units down in config file if they fail the test.
+    timeout: float, default: 60
+        deadline in seconds for the units to finish the check.
+    hardware_status: HardwareStatus, optional
+        status to read and mark units in (e.g., shared between concurrent checks). Default: the standard status file.
+    min_check_time: float, default: 2
+        seconds before a unit that was never seen busy counts as finished (until the pi flags
+        the check as started, it still reports the previous results).
     **kwargs
         any kwargs recognized by SendWebRequestNB
     """
-    hs = HardwareStatus()
+    hs = hardware_status if hardware_status is not None else HardwareStatus()
     skip = hs.get_status(which="down", verbose=False, return_units=True)
     command = f"calculation/?type=check-focuser&movement={movement}&tolerance={tolerance}&use_birger={use_birger}"
 
-    r = SendWebRequestNB(
-        command=command, verbose=False, wait_for_response=False, skip=skip, **kwargs
+    handle = SendWebRequestNB(
+        command=command,
+        verbose=False,
+        skip=skip,
+        return_handle=True,
+        is_done=CalculationDone(
+            min_elapsed=min_check_time, busy=["CalculationInProgress", "Focusing"]
+        ),
+        timeout_global=timeout,
+        max_poll_interval=2,
+        **kwargs,
     )
-    with tqdm(total=30) as pbar:
-        for i in range(30):
-            time.sleep(1)
-            pbar.update(1)
-    status = SendWebRequestNB(
-        command="status", verbose=False, wait_for_response=False, skip=skip, **kwargs
-    )
-
-    for i in status.df.index:
-        name = status.df.loc[i, "Name"]
-        api_res = status.get_response_by_name(name)
-        if api_res.Focus.FocuserCheckResult == None:
-            print(f"Focuser Check value for {name} is None; Likely a focuser error")
-            continue
-        if not api_res.Focus.FocuserCheckResult.startswith("success"):
-            if api_res.Focus.FocuserCheckResult.startswith("fail"):
-                print(
-                    f"Unit {name} did not have a successful check. Unit will be marked DOWN."
-                )
-                if verbose:
-                    print(api_res.Focus.FocuserCheckResult)
-                if update:
-                    hs.MarkUnitDown(name)
-            elif api_res.Focus.FocuserCheckResult.startswith("error"):
-                print(
-                    f"Unit {name} had a focuser communication error. Unit will be marked DOWN."
-                )
-                if update:
-                    hs.MarkUnitDown(name)
-
-    return status
+    WatchUnitChecks(handle, _focuser_check_scorer(verbose), hs, update=update, verbose=verbose)
+    return handle.summary()
 
 
 if __name__ == "__main__":
@@ -6,11 +6,12 @@ General Use logger for keeping track of what goes on during an observation night
 import time
 from datetime import datetime
 import os
+from ..utils.ClockUtils import get_clock
 
 
 class Logger:
     def __init__(self, save_path=None):
-        if self.save_path is not None:
+        if save_path is not None:
             self.save_path = save_path
         else:
             self.save_path = "~/Nightlylogs"
@@ -27,7 +28,7 @@ class Logger:
             elif fname.endswith(".log"):
                 self.fname = fname
             with open(self.fname, "w") as f:
-                f.write("Logfile Created at {} \n".format(datetime.now()))
+                f.write("Logfile Created at {} \n".format(get_clock().now()))
 
     def setup_db(self, name=None):
         if name is None:
@@ -45,24 +46,24 @@ class Logger:
         if self.skip:
             return
         with open(self.fname, "a") as f:
-            now = str(datetime.datetime.now())
+            now = str(get_clock().now())
             f.write("{} : INFO : {} \n".format(now, s))
 
     def warning(self, s):
         if self.skip:
             return
         with open(self.fname, "a") as f:
-            now = str(datetime.datetime.now())
+            now = str(get_clock().now())
             f.write("{} : WARNING : {} \n".format(now, s))
 
-    def vspace(self, n):
+    def vspace(self, n=1):
         if self.skip:
             return
         with open(self.fname, "a") as f:
             string = "\n" * n
             f.write(string)
 
-    def section(self, s):
+    def section(self, s=""):
         if self.skip:
             return
         with open(self.fname, "a") as f:
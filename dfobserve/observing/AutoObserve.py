@@ -4,12 +4,10 @@ Class to handle running a night's observations autonomously.
 import numpy as np
 import pandas as pd
 import subprocess as sp
-import time
 from dfobserve.exceptions.exceptions import EndOfNightError
 from dfobserve.utils.SkyXUtils import StartAutoGuide, StopAutoGuide
 from dfobserve.webserver.WebRequests import SendWebRequestNB
 from ..logging import Logger
-from datetime import datetime
 import os
 from astropy.time import Time
 
@@ -20,8 +18,10 @@ from ..utils.FilterTilterUtils import (
     AllTiltScienceFilters,
     AllGetFilterTilts,
     AllCheckFilterTilts,
+    ConvergeFilterTilts,
 )
 from ..utils.MountUtils import DitherMount, GuideMount, StopMount, ParkMount
+from ..utils.PointingUtils import get_pointing_service
 from ..utils.FlipFlatUtils import (
     AllCloseFlipFlats,
     AllOpenFlipFlats,
@@ -36,11 +36,15 @@ from dfobserve.utils.CameraUtils import (
     AllSetCameraTemperatures,
     AutoFocus,
     AllCheckCameraTemperatures,
+    ConvergeCameraTemperatures,
 )
 
 from dfobserve.utils.HardwareUtils import HardwareStatus
+from dfobserve.utils.ClockUtils import get_clock
 
 from ..observing import get_morning_twilight
+from .TargetValidation import validate_targets
+from .Visibility import compute_visibility
 
 __all__ = ["AutoObserve", "QuickObserve"]
 
@@ -65,7 +69,7 @@ class AutoObserve:
             self.save_dir = "./"
         else:
             self.save_dir = save_log_to
-        now = datetime.now()
+        now = get_clock().now()
         dt_string = now.strftime("%Y-%m-%d")
         logfile = self.save_dir + f"{dt_string}_ObservingLog.log"
         print(f"Global Logfile for this run will be saved to {logfile}")
@@ -90,6 +94,13 @@ class AutoObserve:
         """
         Construct observing plans (if not done) to raise errors if issues arise.
         """
+        # Check every target against TheSkyX and astropy in one pass (this also resolves the names
+        # up front, so the plans and altitude checks don't go to the network)
+        validate_targets(self.targetlist, raise_errors=True)
+        # Rise/set times of all targets in one go; the plans below reuse them
+        compute_visibility(
+            [t for t in self.targetlist if not hasattr(t, "observing_plan")]
+        )
         for target in self.targetlist:
             if not hasattr(target, "observing_plan"):
                 target.construct_observing_plan()
@@ -105,7 +116,7 @@ class AutoObserve:
     def set_data_dir(self, save_dir):
         send_web_request = "python3 C:/Dragonfly/Programs/SendWebRequestToArray.py"
         if save_dir is None:
-            now = datetime.now()
+            now = get_clock().now()
             dt_string = now.strftime("%Y-%m-%d")
             print(f"Setting path to /data/{dt_string} on each pi")
             self.log.info(f"Setting path to /data/{dt_string} on each pi")
@@ -141,13 +152,12 @@ class AutoObserve:
         self.check_targets_for_issues()
         # Establish start time:
         obs_start_time = self.targetlist[0].OBS_START
-        if obs_start_time == "N/A":
-            # then start now
+        if isinstance(obs_start_time, str):
+            # "N/A": then start now
             pass
         else:
-            current_time = datetime.now()
-            time_till_start = obs_start_time - current_time
-            time_till_start = time_till_start.total_seconds()
+            current_time = Time(get_clock().now())
+            time_till_start = (obs_start_time - current_time).to(u.s).value
             time_till_start_hours = (time_till_start * u.s).to(u.hr)
             if time_till_start < 0:
                 if verbose:
@@ -166,7 +176,7 @@ class AutoObserve:
                     print(
                         f"Currently {time_till_start_hours:.2f} hrs till requested start. Sleeping {time_till_start:.2f} seconds."
                     )
-                time.sleep(time_till_start)
+                get_clock().sleep(time_till_start)
 
         if verbose:
             print("Running Pre-observing checklist before starting")
@@ -174,7 +184,7 @@ class AutoObserve:
         start_obs = False
         while not start_obs:
             # if it's morning twilight, give up
-            current_time = Time(datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            current_time = Time(get_clock().now().strftime("%Y-%m-%d %H:%M:%S"))
             morning_twilight = get_morning_twilight()  # local time.
             if current_time > morning_twilight:
                 self.log.info("It is morning! Exiting the Script Now.")
@@ -191,7 +201,7 @@ class AutoObserve:
                 )
                 if verbose:
                     print("Pre Observing Checklist failed. Trying again in 60 seconds")
-                time.sleep(60)
+                get_clock().sleep(60)
 
         # We're good to go. Let's cool the cameras.
         # Loading up Bad things to skip.
@@ -199,149 +209,43 @@ class AutoObserve:
             which="down", verbose=False, return_units=True
         )
 
-        self.log.vspace()
-        self.log.section()
-        self.log.info("Setting Cameras to -20 deg and sleeping 120 s.")
-        r = AllSetCameraTemperatures(-20, skip=skip)
-        time.sleep(120)
-        continue_on = False
-        temp_counter = 0
-        while not continue_on:
-            self.log.info("Checking Camera Temperatures")
-            r, b = AllCheckCameraTemperatures(-20)
-            bad_units = list(r.loc[r.isGood == False, "Name"].values)
-            if b == 0:
-                continue_on = True
-            elif temp_counter > 3:
-                print(f"{b} Cameras not in tolerence but 3 tries exceeded.")
-                self.log.warning(
-                    f"{b} Cameras not in tolerence but 3 tries exceeded. \n Setting bad cameras to DOWN"
-                )
-                for bad_camera in bad_units:
-                    self.hardware_status.MarkUnitDown(bad_camera)
-            else:
-                temp_counter += 1
-                print(
-                    f"{b} Cameras not in tolerence. Sending command again and sleeping 120s."
-                )
-                self.log.warning(
-                    f"{b} Cameras not in tolerence. Sending command again and sleeping 120s."
-                )
-                r = AllSetCameraTemperatures(-20)
-                time.sleep(120)
+        self.log.vspace(2)
+        self.log.section("Cooling Cameras")
+        self.log.info("Setting Cameras to -20 deg and waiting for them to converge.")
+        temps, b = ConvergeCameraTemperatures(-20, skip=skip, verbose=verbose)
+        for row in temps.loc[temps.isGood].itertuples():
+            self.log.info(f"{row.Name} at {row.CurrentTemp} C after {row.ReadyAfter:.0f} s")
+        if b > 0:
+            bad_units = list(temps.loc[temps.isGood == False, "Name"].values)
+            print(f"{b} Cameras not in tolerence after cooling timeout.")
+            self.log.warning(
+                f"{b} Cameras not in tolerence after cooling timeout. \n Setting bad cameras to DOWN"
+            )
+            self.hardware_status.MarkUnitsDown(bad_units)
 
         self.log.info("Camera Temperatures Set")
 
-        self.log.section()
-
-        for target in self.targetlist:
-            self.log.info(
-                f"============== Starting Run for Target {target} =============="
-            )
-            # Check target altitude and refuse to slew if it is at a stupid altitude.
-            if not target.check_target_altitude():
-                if verbose:
-                    print("WARNING: Target below minimum elevation. Skipping Target.")
-                self.log.warning("Target below minimum elevation. Skipping Target.")
-                continue  # go to next target
-            else:
-                if verbose:
-                    print("Target above minimum altitude. Beginning Target run.")
-                self.log.info("Target above minimum altitude. Beginning Target run.")
+        self.log.section("Observing")
+        # keep the mount pointing for the exposure headers fresh in the background
+        get_pointing_service().start()
 
-            current_time = Time(datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-            if current_time > morning_twilight:
-                if verbose:
-                    print(
-                        "It is morning. We will not observe this target. Starting Shutdown."
-                    )
-                    self.log.warning(
-                        "It is morning. We will not observe this target. Starting shutdown."
-                    )
-                    self.end_of_script_shutdown()
-                    raise EndOfNightError("Script Exited due to it being morning.")
-
-            # Slew to Target
-            self.log.info(f"Slewing to {target.target}")
-            res = SlewMount(target.target)
-            self.log.info(res.stdout.decode("utf-8"))
-            # Currently the perl script. Should wait till its done.
-            # Start tracking
-            if verbose:
-                print("Starting Mount Tracking")
-            self.log.info("Starting Mount Tracking")
-            res = StartMount()
-            self.log.info(res.stdout.decode("utf-8"))
-
-            if verbose:
-                print(
-                    f"Executing Tilt Commands of ha: {target.ha_tilt}, oiii: {target.oiii_tilt}"
-                )
-            self.log.info(
-                f"Executing Tilt Commands of ha: {target.ha_tilt}, oiii: {target.oiii_tilt}"
-            )
-            # Tilt to Target Tilts
-            skip = self.hardware_status.get_status(
-                which="down", verbose=False, return_units=True
-            )
-            res = AllTiltScienceFilters(
-                ha_tilt=target.ha_tilt, oiii_tilt=target.oiii_tilt, skip=skip
-            )
-            self.log.info("Command sent, sleeping 10 to let settle.")
-            if verbose:
-                print("Command sent, sleeping 10 to let settle.")
-            time.sleep(10)
-            continue_on = False
-            try_tilt = 0
-            while not continue_on:
-                self.log.info("Checking that Tilts are within tolerance")
-                if verbose:
-                    print("Checking that Tilts are within tolerance")
-                ha_df, oiii_df = AllCheckFilterTilts(
-                    target.ha_tilt, target.oiii_tilt, skip=skip
+        try:
+            for target in self.targetlist:
+                self.log.info(
+                    f"============== Starting Run for Target {target} =============="
                 )
-                nbad_ha = len(ha_df.loc[ha_df.isGood == False])
-                nbad_oiii = len(oiii_df.loc[oiii_df.isGood == False])
-                all_bad = nbad_ha + nbad_oiii
-                if all_bad == 0:
-                    self.log.info("All Filters within tolerance of TiltGoal.")
-                    if verbose:
-                        print("All Filters within tolerance of TiltGoal.")
-                    continue_on = True
-                elif try_tilt > 3:
-                    self.log.warning(
-                        f"{all_bad} Filters out of tolerance but number of tries (3) reached. These will be marked DOWN."
-                    )
+                # Check target altitude and refuse to slew if it is at a stupid altitude.
+                if not target.check_target_altitude():
                     if verbose:
-                        print(
-                            f"WARNING::: {all_bad} Filters out of tolerance but number of tries (3) reached. These will be marked DOWN."
-                        )
-                    for bad_ha in list(ha_df.loc[ha_df.isGood == False, "Name"].values):
-                        self.hardware_status.MarkUnitDown(bad_ha)
-                    for bad_oiii in list(
-                        oiii_df.loc[oiii_df.isGood == False, "Name"].values
-                    ):
-                        self.hardware_status.MarkUnitDown(bad_oiii)
-                    continue_on = True
+                        print("WARNING: Target below minimum elevation. Skipping Target.")
+                    self.log.warning("Target below minimum elevation. Skipping Target.")
+                    continue  # go to next target
                 else:
-                    try_tilt += 1
                     if verbose:
-                        print(
-                            f"Warning: {all_bad} Filters are out of tolerence. Trying again."
-                        )
-                        print(ha_df)
-                        print(oiii_df)
-                    self.log.warning(
-                        f"{all_bad} Filters are out of tolerence. Trying again."
-                    )
-                    res = AllTiltScienceFilters(
-                        ha_tilt=target.ha_tilt, oiii_tilt=target.oiii_tilt, skip=skip
-                    )
-                    time.sleep(10)
+                        print("Target above minimum altitude. Beginning Target run.")
+                    self.log.info("Target above minimum altitude. Beginning Target run.")
 
-            dither_index = 0
-            for row in target.observing_plan.index:
-                current_time = Time(datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+                current_time = Time(get_clock().now().strftime("%Y-%m-%d %H:%M:%S"))
                 if current_time > morning_twilight:
                     if verbose:
                         print(
@@ -352,121 +256,183 @@ class AutoObserve:
                         )
                         self.end_of_script_shutdown()
                         raise EndOfNightError("Script Exited due to it being morning.")
-                # Assuming we are good to take a frame
-                if not target.check_target_altitude():
-                    if verbose:
-                        print(
-                            "WARNING: Target below minimum elevation. Skipping Target."
-                        )
-                    self.log.warning("Target below minimum elevation. Skipping Target.")
-                    continue
 
+                # Slew to Target
+                self.log.info(f"Slewing to {target.target}")
+                res = SlewMount(target.target)
+                self.log.info(res.stdout.decode("utf-8"))
+                # Currently the perl script. Should wait till its done.
+                # Start tracking
+                if verbose:
+                    print("Starting Mount Tracking")
+                self.log.info("Starting Mount Tracking")
+                res = StartMount()
+                self.log.info(res.stdout.decode("utf-8"))
+
+                if verbose:
+                    print(
+                        f"Executing Tilt Commands of ha: {target.ha_tilt}, oiii: {target.oiii_tilt}"
+                    )
+                self.log.info(
+                    f"Executing Tilt Commands of ha: {target.ha_tilt}, oiii: {target.oiii_tilt}"
+                )
+                # Tilt to Target Tilts
                 skip = self.hardware_status.get_status(
                     which="down", verbose=False, return_units=True
                 )
-                current = target.observing_plan.loc[row, "type"]
-                if current == "flat":
-                    # Close Flipflats
-                    if verbose:
-                        print("Closing Flipflats for flats")
-                    self.log.info("Closing Flipflats for flats")
-                    res = AllCloseFlipFlats()
-                    # self.log.info(res.to_string())
-                    if verbose:
-                        print("Turning on the flip flats")
-                    self.log.info("Turning on FlipFlaps")
-                    res = AllTurnOnFlipFlaps()
-                    # self.log.info(res.to_string())
-                    # Take N Flats
-                    nexp = target.observing_plan.loc[row, "n"]
-                    for i in range(nexp):
-                        if verbose:
-                            print(f"Exposing Flat {i} / {nexp}")
-                        self.log.info(f"Exposing Flat {i} / {nexp}")
-                        response = AllFlatFieldExposure(
-                            target.observing_plan.loc[row, "exptime"], skip=skip
-                        )
-                        # self.log.info(response.to_string())
+                ha_df, oiii_df = ConvergeFilterTilts(
+                    target.ha_tilt,
+                    target.oiii_tilt,
+                    skip=skip,
+                    hardware_status=self.hardware_status,
+                    verbose=verbose,
+                )
+                bad = list(ha_df.loc[ha_df.isGood == False, "Name"].values) + list(
+                    oiii_df.loc[oiii_df.isGood == False, "Name"].values
+                )
+                if len(bad) == 0:
+                    self.log.info("All Filters within tolerance of TiltGoal.")
                     if verbose:
-                        print("Finished Flats, Opening Flip Flats")
-                    self.log.info("Finished Flats, turning off and opening Flip Flats")
-                    # Open Flipflats
-                    res = AllTurnOffFlipFlaps()
-                    # self.log.info(res.to_string())
-                    res = AllOpenFlipFlats()
-                    # self.log.info(res.to_string())
-                elif current == "standard":
-                    if target.observing_plan.loc[row, "use"] == "nearest":
-                        # find the nearest standard star and go take N exposures there.
-                        pass
-                elif current == "focus":
-                    # carry out a focus run
-                    res = AutoFocus(**focus_kwargs, skip=skip)
-
-                elif current == "dark":
-                    # take a dark frame (all cameras).
-                    res = AllDarkExposure(
-                        skip=skip
-                    )  # assumes all cameras, we could set which='science'
-                    self.log.info(res.to_string())
-                elif current == "science":
-                    # Execute a dither from the main pointing
-                    dither = target.dither_dict[dither_index]
-                    dither_index += 1
-                    res = DitherMount(dither[0], dither[1])  # is a preformatted string
-                    self.log.info(res)
-
-                    # Start Guiding
+                        print("All Filters within tolerance of TiltGoal.")
+                else:
+                    self.log.warning(
+                        f"Filters of {bad} did not reach tolerance. These were marked DOWN."
+                    )
                     if verbose:
-                        print("Starting AutoGuider and sleeping 15 sec")
-                    self.log.info("Activating Autoguider and sleeping 15 sec.")
-                    r = StartAutoGuide()
-                    time.sleep(15)
-                    self.log.info(r.stdout.decode("utf-8"))
-                    # Assume the next row in the table has the info for cals to take
-                    if target.observing_plan.loc[row + 1, "type"] == "calibration":
-                        if verbose:
-                            print("Starting Science Exposure.")
-                        self.log.info("STARTING SCIENCE EXPOSURE")
-                        res = AllScienceExposure(
-                            exptime=target.observing_plan.loc[row, "exptime"],
-                            off_exptime=target.observing_plan.loc[row + 1, "exptime"],
-                            n_offs=target.observing_plan.loc[row + 1, "n"],
-                            name=target.target,
-                            skip=skip,
+                        print(
+                            f"WARNING::: Filters of {bad} did not reach tolerance. These were marked DOWN."
                         )
-                        # self.info.log(res.to_string())
 
-                    else:
-                        self.log.warning(
-                            "Row after science in obs plan was NOT calibration... it should be!"
-                        )
-                        self.log.info("As a result, we wont take any offs")
-                        self.log.info("STARTING SCIENCE EXPOSURE")
+                dither_index = 0
+                plan = target.observing_plan
+                for row, step in enumerate(plan):
+                    current_time = Time(get_clock().now().strftime("%Y-%m-%d %H:%M:%S"))
+                    if current_time > morning_twilight:
                         if verbose:
-                            print("STARTING SCIENCE EXPOSURE")
-                        res = AllExpose(
-                            exptime=target.observing_plan.loc[row, "exptime"],
-                            which="science",
-                            skip=skip,
-                        )
-                        # self.info.log(res.to_string())
-                    if verbose:
-                        print("Stopping Autoguider.")
-                    # Stop Autoguiding after exposure
-                    self.log.info("Stopping Autoguider.")
-                    r = StopAutoGuide()
-                    self.log.info(r.stdout.decode("utf-8"))
-                    # Dither Back to center before handling what comes next
-                    if verbose:
-                        print("Dithering back to original pointing before continuing.")
-                    self.log.info(
-                        "Dithering back to original pointing before continuing."
+                            print(
+                                "It is morning. We will not observe this target. Starting Shutdown."
+                            )
+                            self.log.warning(
+                                "It is morning. We will not observe this target. Starting shutdown."
+                            )
+                            self.end_of_script_shutdown()
+                            raise EndOfNightError("Script Exited due to it being morning.")
+                    # Assuming we are good to take a frame
+                    if not target.check_target_altitude():
+                        if verbose:
+                            print(
+                                "WARNING: Target below minimum elevation. Skipping Target."
+                            )
+                        self.log.warning("Target below minimum elevation. Skipping Target.")
+                        continue
+
+                    skip = self.hardware_status.get_status(
+                        which="down", verbose=False, return_units=True
                     )
-                    res = SlewMount(target.target)
-                    self.log.info(res.to_string())
+                    current = step.type
+                    if current == "flat":
+                        # Close Flipflats
+                        if verbose:
+                            print("Closing Flipflats for flats")
+                        self.log.info("Closing Flipflats for flats")
+                        res = AllCloseFlipFlats()
+                        # self.log.info(res.to_string())
+                        if verbose:
+                            print("Turning on the flip flats")
+                        self.log.info("Turning on FlipFlaps")
+                        res = AllTurnOnFlipFlaps()
+                        # self.log.info(res.to_string())
+                        # Take N Flats
+                        nexp = step.n
+                        for i in range(nexp):
+                            if verbose:
+                                print(f"Exposing Flat {i} / {nexp}")
+                            self.log.info(f"Exposing Flat {i} / {nexp}")
+                            response = AllFlatFieldExposure(step.exptime, skip=skip)
+                            # self.log.info(response.to_string())
+                        if verbose:
+                            print("Finished Flats, Opening Flip Flats")
+                        self.log.info("Finished Flats, turning off and opening Flip Flats")
+                        # Open Flipflats
+                        res = AllTurnOffFlipFlaps()
+                        # self.log.info(res.to_string())
+                        res = AllOpenFlipFlats()
+                        # self.log.info(res.to_string())
+                    elif current == "standard":
+                        if step.use == "nearest":
+                            # find the nearest standard star and go take N exposures there.
+                            pass
+                    elif current == "focus":
+                        # carry out a focus run
+                        res = AutoFocus(**focus_kwargs, skip=skip)
+
+                    elif current == "dark":
+                        # take a dark frame (all cameras).
+                        res = AllDarkExposure(
+                            step.exptime, skip=skip
+                        )  # assumes all cameras, we could set which='science'
+                        self.log.info(res.df.to_string())
+                    elif current == "science":
+                        # Execute a dither from the main pointing
+                        dither = target.dither_dict[dither_index]
+                        dither_index += 1
+                        res = DitherMount(dither[0], dither[1])  # is a preformatted string
+                        self.log.info(res)
+
+                        # Start Guiding
+                        if verbose:
+                            print("Starting AutoGuider and sleeping 15 sec")
+                        self.log.info("Activating Autoguider and sleeping 15 sec.")
+                        r = StartAutoGuide()
+                        get_clock().sleep(15)
+                        self.log.info(r.stdout.decode("utf-8"))
+                        # The calibration step linked to this science step has the info for cals to take
+                        calibration = plan.calibration_for(row)
+                        if calibration is not None:
+                            if verbose:
+                                print("Starting Science Exposure.")
+                            self.log.info("STARTING SCIENCE EXPOSURE")
+                            res = AllScienceExposure(
+                                exptime=step.exptime,
+                                off_exptime=calibration.exptime,
+                                n_offs=calibration.n,
+                                name=target.target,
+                                skip=skip,
+                            )
+                            # self.info.log(res.to_string())
+
+                        else:
+                            self.log.warning(
+                                "Science step in obs plan has no calibration step... it should!"
+                            )
+                            self.log.info("As a result, we wont take any offs")
+                            self.log.info("STARTING SCIENCE EXPOSURE")
+                            if verbose:
+                                print("STARTING SCIENCE EXPOSURE")
+                            res = AllExpose(
+                                exptime=step.exptime,
+                                which="science",
+                                skip=skip,
+                            )
+                            # self.info.log(res.to_string())
+                        if verbose:
+                            print("Stopping Autoguider.")
+                        # Stop Autoguiding after exposure
+                        self.log.info("Stopping Autoguider.")
+                        r = StopAutoGuide()
+                        self.log.info(r.stdout.decode("utf-8"))
+                        # Dither Back to center before handling what comes next
+                        if verbose:
+                            print("Dithering back to original pointing before continuing.")
+                        self.log.info(
+                            "Dithering back to original pointing before continuing."
+                        )
+                        res = SlewMount(target.target)
+                        self.log.info(res.stdout.decode("utf-8"))
 
-        self.end_of_script_shutdown()
+            self.end_of_script_shutdown()
+        finally:
+            get_pointing_service().stop()
 
         return
 
@@ -474,8 +440,8 @@ class AutoObserve:
         # End of night shutdown stuff
         self.log.info("Setting Camera Temperatures to 30 and sleeping 30 s.")
         r = AllSetCameraTemperatures(30)
-        self.log.info(r.to_string)
-        time.sleep(30)
+        self.log.info(r.df.to_string())
+        get_clock().sleep(30)
 
         self.log.info("Closing Flip Flats")
         r = AllCloseFlipFlats()
@@ -483,10 +449,11 @@ class AutoObserve:
 
         self.log.info("Parking and Stopping Mount.")
         r = ParkMount()
-        self.log.info(r.to_string())
+        self.log.info(r.stdout.decode("utf-8"))
         r = StopMount()
-        self.log.info(r.to_string())
+        self.log.info(r.stdout.decode("utf-8"))
 
+        get_pointing_service().stop()
         self.log.info("Observations Complete.")
         return
 
@@ -549,7 +516,7 @@ class QuickObserve:
             self.save_dir = "./"
         else:
             self.save_dir = save_log_to
-        now = datetime.now()
+        now = get_clock().now()
         dt_string = now.strftime("%Y-%m-%d")
         logfile = self.save_dir + f"{dt_string}_ObservingLog_QUICK.log"
         print(f"Global Logfile for this run will be saved to {logfile}")
@@ -573,7 +540,7 @@ class QuickObserve:
     def set_data_dir(self, save_dir):
         send_web_request = "python3 C:/Dragonfly/Programs/SendWebRequestToArray.py"
         if save_dir is None:
-            now = datetime.now()
+            now = get_clock().now()
             dt_string = now.strftime("%Y-%m-%d")
             print(f"Setting path to /data/{dt_string} on each pi")
             self.log.info(f"Setting path to /data/{dt_string} on each pi")
@@ -607,53 +574,29 @@ class QuickObserve:
             which="down", verbose=False, return_units=True
         )
         # Tilt to Target Tilts
-        res = AllTiltScienceFilters(
-            ha_tilt=self.ha_tilt, oiii_tilt=self.oiii_tilt, skip=skip
+        ha_df, oiii_df = ConvergeFilterTilts(
+            self.ha_tilt,
+            self.oiii_tilt,
+            skip=skip,
+            hardware_status=self.hardware_status,
         )
-        print("Command sent, sleeping 5 to let settle.")
-        time.sleep(10)
-        continue_on = False
-        try_tilt = 3
-        while not continue_on:
-            print("Checking that Tilts are within tolerance")
-            ha_df, oiii_df = AllCheckFilterTilts(self.ha_tilt, self.oiii_tilt)
-            nbad_ha = len(ha_df.loc[ha_df.isGood == False])
-            nbad_oiii = len(oiii_df.loc[oiii_df.isGood == False])
-            all_bad = nbad_ha + nbad_oiii
-            if all_bad == 0:
-                print("All Filters within tolerance of TiltGoal.")
-                continue_on = True
-            elif try_tilt > 3:
-                print(
-                    f"WARNING::: {all_bad} Filters out of tolerance but number of tries (3) reached. Setting these DOWN."
-                )
-                for bad_ha in list(ha_df.loc[ha_df.isGood == False, "Name"].values):
-                    self.hardware_status.MarkUnitDown(bad_ha)
-                for bad_oiii in list(
-                    oiii_df.loc[oiii_df.isGood == False, "Name"].values
-                ):
-                    self.hardware_status.MarkUnitDown(bad_oiii)
-                continue_on = True
-            else:
-                try_tilt += 1
-
-                print(f"Warning: {all_bad} Filters are out of tolerence. Trying again.")
-                print(ha_df)
-                print(oiii_df)
-                res = AllTiltScienceFilters(
-                    ha_tilt=self.ha_tilt, oiii_tilt=self.oiii_tilt
-                )
-                time.sleep(10)
+        bad = list(ha_df.loc[ha_df.isGood == False, "Name"].values) + list(
+            oiii_df.loc[oiii_df.isGood == False, "Name"].values
+        )
+        if len(bad) == 0:
+            print("All Filters within tolerance of TiltGoal.")
+        else:
+            print(f"WARNING::: Filters of {bad} did not reach tolerance. Setting these DOWN.")
         # Execute Dither
         print("Dithering...")
         self.log.info(f"dithering {dither_east} east and {dither_north} north.")
-        r = DitherMount(dither_east, dither_north)
-        self.log.info(r.stdout.decode("utf-8"))
+        res = DitherMount(dither_east, dither_north)  # is a preformatted string
+        self.log.info(res)
         # Start Guiding
         print("Starting AutoGuider and sleeping 15 sec")
         self.log.info("Activating Autoguider and sleeping 15 sec.")
         r = StartAutoGuide()
-        time.sleep(15)
+        get_clock().sleep(15)
         self.log.info(r.stdout.decode("utf-8"))
         timeout = self.exptime + 60
         skip = self.hardware_status.get_status(
@@ -678,4 +621,4 @@ class QuickObserve:
         print("Dithering...")
         self.log.info(f"dithering back to target")
         res = SlewMount(self.target)
-        self.log.info(r.stdout.decode("utf-8"))
+        self.log.info(res.stdout.decode("utf-8"))
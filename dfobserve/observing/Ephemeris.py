@@ -0,0 +1,385 @@
+"""
+Solar and lunar ephemerides for a night at the observatory, computed once per night and reused.
+"""
+
+import os
+import json
+import tempfile
+import numpy as np
+import astropy.units as u
+from astropy.coordinates import get_sun, get_moon, EarthLocation, AltAz
+from astropy.time import Time
+from ..utils.ClockUtils import get_clock
+
+__all__ = ["NightEphemeris", "AltitudeCurve", "NMS_LOCATION"]
+
+# New Mexico Skies
+NMS_LOCATION = {"lon": -105.5302, "lat": 32.9024, "height": 2225}
+
+EPHEMERIS_CACHE_DIR = os.path.expanduser("~/.dfobserve/ephemeris")
+
+
+def resolve_date(date="today"):
+    """
+    Turn 'today' into a YYYY-MM-DD string; other dates are returned unchanged.
+    """
+    if date == "today":
+        return get_clock().now().strftime("%Y-%m-%d")
+    return date
+
+
+def refine_crossings(
+    evaluate, lo, hi, lo_above, thresholds, tolerance, subdivisions=32
+):
+    """
+    Refine brackets around threshold crossings until they are narrower than `tolerance`.
+
+    Each step splits every bracket into `subdivisions` parts, evaluates all the split points with one
+    call of `evaluate`, and keeps the part containing the crossing.
+
+    Parameters
+    ----------
+    evaluate: callable
+        evaluate(hours, brackets) returning the altitudes (degrees) at times `hours` for the objects
+        of the brackets numbered `brackets` (both flat arrays of the same length).
+    lo, hi: ndarray
+        bracket edges, in hours.
+    lo_above: ndarray of bool
+        whether the object is above its threshold at the lower edge.
+    thresholds: ndarray
+        threshold altitude of each bracket, in degrees.
+    tolerance: float
+        target bracket width, in hours.
+    subdivisions: int, default: 32
+        number of parts each bracket is split into per step.
+
+    Returns
+    -------
+    roots: ndarray
+        crossing times, in hours.
+    """
+    lo, hi = np.asarray(lo, dtype=float), np.asarray(hi, dtype=float)
+    lo_above = np.asarray(lo_above, dtype=bool)
+    n = len(lo)
+    fractions = np.linspace(0, 1, subdivisions + 1)
+    brackets = np.repeat(np.arange(n), subdivisions - 1)
+    level = np.repeat(np.asarray(thresholds, dtype=float), subdivisions - 1)
+    while n > 0 and np.max(hi - lo) > tolerance:
+        grid = lo[:, None] + (hi - lo)[:, None] * fractions[None, :]
+        grid_above = np.empty(grid.shape, dtype=bool)
+        grid_above[:, 0] = lo_above
+        grid_above[:, -1] = ~lo_above
+        interior = evaluate(grid[:, 1:-1].ravel(), brackets) > level
+        grid_above[:, 1:-1] = interior.reshape(n, -1)
+        # first point on the other side of the threshold; the crossing is just before it
+        j = np.argmax(grid_above != lo_above[:, None], axis=1)
+        lo, hi = grid[np.arange(n), j - 1], grid[np.arange(n), j]
+    return 0.5 * (lo + hi)
+
+
+def above_intervals(roots, start_above, end_above, span):
+    """
+    Turn the sorted crossing times (hours) of one object into (start, end) intervals above the
+    threshold, closing open intervals at the window edges (0 and `span`).
+    """
+    edges = [float(r) for r in roots]
+    if start_above:
+        edges.insert(0, 0.0)
+    if end_above:
+        edges.append(span)
+    return [(edges[i], edges[i + 1]) for i in range(0, len(edges), 2)]
+
+
+class AltitudeCurve:
+    """
+    Altitude of an object over a time window, with the times at which it crosses a given altitude
+    found to sub-second accuracy.
+
+    The altitude is sampled once on a coarse grid; each crossing of a threshold is bracketed by two
+    neighbouring samples and refined by splitting the bracket into `subdivisions` parts and keeping
+    the one containing the crossing (a bisection with more than one split point). All crossings of a
+    threshold are refined together, so each refinement step costs a single coordinate transform;
+    with the defaults, three steps take a 20 minute bracket below 0.1 s.
+    """
+
+    def __init__(
+        self,
+        altitude,
+        t_start,
+        t_end,
+        step=20 * u.min,
+        tolerance=0.1 * u.s,
+        subdivisions=32,
+    ):
+        """
+        Parameters
+        ----------
+        altitude: callable
+            function taking an astropy Time (array) and returning the altitude in degrees.
+        t_start, t_end: astropy.time.Time
+            time window to search.
+        step: astropy Quantity, default: 20 min
+            spacing of the coarse grid. Intervals above a threshold shorter than this may be missed.
+        tolerance: astropy Quantity, default: 0.1 s
+            accuracy of the crossing times.
+        subdivisions: int, default: 32
+            number of parts each bracket is split into per refinement step.
+        """
+        self.altitude = altitude
+        self.t_start = t_start
+        self.span = (t_end - t_start).to(u.hr).value
+        self.step = step.to(u.hr).value
+        self.tolerance = tolerance.to(u.hr).value
+        self.subdivisions = subdivisions
+        self._coarse = None
+        self._intervals = {}
+
+    def _evaluate(self, hours):
+        return np.atleast_1d(np.asarray(self.altitude(self.t_start + hours * u.hr)))
+
+    def grid(self):
+        """
+        Coarse grid, in hours after t_start.
+        """
+        n = int(np.ceil(self.span / self.step)) + 1
+        return np.linspace(0, self.span, n)
+
+    def coarse(self):
+        """
+        Coarse grid (hours after t_start) and the altitudes (degrees) on it.
+        """
+        if self._coarse is None:
+            x = self.grid()
+            self._coarse = (x, self._evaluate(x))
+        return self._coarse
+
+    def crossings(self, threshold):
+        """
+        Times (hours after t_start) at which the altitude crosses `threshold`.
+        """
+        x, alt = self.coarse()
+        above = alt > threshold
+        idx = np.where(above[:-1] != above[1:])[0]
+        return refine_crossings(
+            lambda hours, brackets: self._evaluate(hours),
+            x[idx],
+            x[idx + 1],
+            above[idx],
+            np.full(len(idx), threshold),
+            self.tolerance,
+            self.subdivisions,
+        )
+
+    def intervals_hours(self, threshold):
+        """
+        Intervals (in hours after t_start) during which the object is above `threshold`.
+        Intervals that are open at either end of the window are closed at the window edge.
+        """
+        if threshold not in self._intervals:
+            x, alt = self.coarse()
+            self._intervals[threshold] = above_intervals(
+                self.crossings(threshold),
+                alt[0] > threshold,
+                alt[-1] > threshold,
+                self.span,
+            )
+        return self._intervals[threshold]
+
+    def intervals(self, threshold, after=None):
+        """
+        Intervals (pairs of astropy Time) during which the object is above `threshold`.
+
+        Parameters
+        ----------
+        threshold: float
+            altitude in degrees.
+        after: astropy.time.Time, optional
+            only keep the part of the intervals after this time.
+
+        Returns
+        -------
+        intervals: list
+            list of (start, end) astropy Time pairs, in time order.
+        """
+        cut = -np.inf
+        if after is not None:
+            cut = (after - self.t_start).to(u.hr).value
+        return [
+            (self.t_start + max(start, cut) * u.hr, self.t_start + end * u.hr)
+            for start, end in self.intervals_hours(threshold)
+            if end > cut
+        ]
+
+    def first_above(self, threshold, after=None):
+        """
+        First time the object is above `threshold` (the window start or `after` if it is already up).
+        Raises IndexError if it never is, like indexing an empty grid selection.
+        """
+        return self.intervals(threshold, after=after)[0][0]
+
+    def last_above(self, threshold, after=None):
+        """
+        Last time the object is above `threshold` (the window end if it is still up).
+        Raises IndexError if it never is, like indexing an empty grid selection.
+        """
+        return self.intervals(threshold, after=after)[-1][1]
+
+    def first_below(self, threshold, after=None):
+        """
+        First time the object is below `threshold`, i.e., the end of the first interval above it
+        (or `after` if the object is already below it then).
+        """
+        cut = 0.0
+        if after is not None:
+            cut = (after - self.t_start).to(u.hr).value
+        for start, end in self.intervals_hours(threshold):
+            if end <= cut:
+                continue
+            if start > cut + self.tolerance:
+                break
+            return self.t_start + end * u.hr
+        return self.t_start + cut * u.hr
+
+
+class NightEphemeris:
+    """
+    Sun and Moon altitude curves around local midnight of a given date, from which the
+    sunset, sunrise, twilight, moonrise and moonset times are solved.
+
+    Solved events are memoized, in memory and on disk, by date, location and UTC offset.
+    Use `NightEphemeris.for_night` to get the shared instance.
+    """
+
+    _memo = {}
+
+    def __init__(
+        self,
+        date="today",
+        utcoffset=-6,
+        lon=NMS_LOCATION["lon"],
+        lat=NMS_LOCATION["lat"],
+        height=NMS_LOCATION["height"],
+        use_disk_cache=True,
+    ):
+        """
+        Parameters
+        ----------
+        date: str, default: 'today'
+            date of the night (evening), either 'today' or YYYY-MM-DD.
+        utcoffset: int, default: -6
+            offset between UTC and local time.
+        lon, lat: float
+            site longitude and latitude in degrees. (Default: NMS)
+        height: float
+            site height in meters. (Default: NMS)
+        use_disk_cache: bool, default: True
+            read and write the solved events from/to EPHEMERIS_CACHE_DIR.
+        """
+        self.date = resolve_date(date)
+        self.utcoffset = utcoffset
+        self.location = EarthLocation(lon=lon * u.deg, lat=lat * u.deg, height=height * u.m)
+        self.key = (self.date, utcoffset, lon, lat, height)
+        self.midnight = Time(f"{self.date} 23:59:59") - utcoffset * u.hr
+        self.sun = AltitudeCurve(
+            self._sun_altitude, self.midnight - 12 * u.hr, self.midnight + 12 * u.hr
+        )
+        self.moon = AltitudeCurve(
+            self._moon_altitude, self.midnight - 12 * u.hr, self.midnight + 18 * u.hr
+        )
+
+        self.cache_file = None
+        if use_disk_cache:
+            self.cache_file = os.path.join(
+                EPHEMERIS_CACHE_DIR,
+                "night_{}_{}_{}_{}_{}.json".format(*self.key),
+            )
+        self._load()
+
+    @classmethod
+    def for_night(
+        cls,
+        date="today",
+        utcoffset=-6,
+        lon=NMS_LOCATION["lon"],
+        lat=NMS_LOCATION["lat"],
+        height=NMS_LOCATION["height"],
+    ):
+        """
+        Return the memoized ephemeris for a night, computing it on first use.
+        """
+        key = (resolve_date(date), utcoffset, lon, lat, height)
+        if key not in cls._memo:
+            cls._memo[key] = cls(
+                date=key[0], utcoffset=utcoffset, lon=lon, lat=lat, height=height
+            )
+        return cls._memo[key]
+
+    def _sun_altitude(self, times):
+        frame = AltAz(obstime=times, location=self.location)
+        return get_sun(times).transform_to(frame).alt.deg
+
+    def _moon_altitude(self, times):
+        frame = AltAz(obstime=times, location=self.location)
+        return get_moon(times).transform_to(frame).alt.deg
+
+    def _load(self):
+        if self.cache_file is None or not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return
+        for name, curve in [("sun", self.sun), ("moon", self.moon)]:
+            for threshold, intervals in cached.get(name, {}).items():
+                curve._intervals[float(threshold)] = [tuple(i) for i in intervals]
+
+    def _save(self):
+        if self.cache_file is None:
+            return
+        cached = {
+            name: {str(k): v for k, v in curve._intervals.items()}
+            for name, curve in [("sun", self.sun), ("moon", self.moon)]
+        }
+        try:
+            os.makedirs(EPHEMERIS_CACHE_DIR, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=EPHEMERIS_CACHE_DIR, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(cached, f)
+            os.replace(tmp, self.cache_file)
+        except OSError:
+            pass
+
+    def _intervals(self, curve, threshold):
+        threshold = float(threshold)
+        if threshold not in curve._intervals:
+            curve.intervals_hours(threshold)
+            self._save()
+        return curve
+
+    def _output(self, time, return_local):
+        if return_local:
+            return time + self.utcoffset * u.hr
+        return time
+
+    def sunset(self, return_local=True):
+        t = self._intervals(self.sun, 0).first_below(0)
+        return self._output(t, return_local)
+
+    def sunrise(self, return_local=True):
+        t = self._intervals(self.sun, 0).intervals(0)[-1][0]
+        return self._output(t, return_local)
+
+    def morning_twilight(self, return_local=True):
+        t = self._intervals(self.sun, -18.0).intervals(-18.0)[-1][0]
+        return self._output(t, return_local)
+
+    def moonset(self, set_altitude=10, return_local=True):
+        sunset = self.sunset(return_local=False)
+        t = self._intervals(self.moon, set_altitude).last_above(set_altitude, after=sunset)
+        return self._output(t, return_local)
+
+    def moonrise(self, rise_altitude=10, return_local=True):
+        sunset = self.sunset(return_local=False)
+        t = self._intervals(self.moon, rise_altitude).first_above(rise_altitude, after=sunset)
+        return self._output(t, return_local)
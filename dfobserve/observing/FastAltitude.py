@@ -0,0 +1,110 @@
+"""
+Fast altitude of a fixed target for the in-loop safety checks, without astropy transforms.
+"""
+
+import math
+from astropy.coordinates import CIRS
+from astropy.time import Time
+
+from .Ephemeris import NMS_LOCATION
+from ..utils.ClockUtils import get_clock
+
+__all__ = ["FastAltitudeModel"]
+
+UNIX_EPOCH_JD = 2440587.5
+J2000_JD = 2451545.0
+
+
+def earth_rotation_angle(jd_ut1):
+    """
+    Earth Rotation Angle (IAU 2000) in radians, for a UT1 Julian date.
+    """
+    du = jd_ut1 - J2000_JD
+    # split the day fraction off first to keep precision
+    turns = 0.7790572732640 + 0.00273781191135448 * du + math.fmod(jd_ut1, 1.0)
+    return 2 * math.pi * math.fmod(turns, 1.0)
+
+
+class FastAltitudeModel:
+    """
+    Altitude of a target computed with spherical trigonometry from its apparent (CIRS) RA/Dec and the
+    Earth Rotation Angle.
+
+    The CIRS position (precession, nutation, aberration) is computed once with astropy and reused
+    for `valid_for` days; evaluating the altitude then only costs a few floating point operations.
+    Refraction, polar motion, UT1-UTC and diurnal aberration are neglected; the result agrees with
+    astropy's AltAz (without refraction) to better than MAX_ERROR degrees.
+    """
+
+    MAX_ERROR = 0.01  # degrees
+
+    def __init__(
+        self,
+        coord,
+        lon=NMS_LOCATION["lon"],
+        lat=NMS_LOCATION["lat"],
+        epoch=None,
+        valid_for=1.0,
+    ):
+        """
+        Parameters
+        ----------
+        coord: astropy.coordinates.SkyCoord
+            coordinates of the target.
+        lon, lat: float
+            site longitude and latitude in degrees. (Default: NMS)
+        epoch: astropy.time.Time, optional
+            time at which to compute the apparent position. Default is now.
+        valid_for: float, default: 1
+            days from `epoch` after which the apparent position is recomputed.
+        """
+        self.coord = coord
+        self.lon = math.radians(lon)
+        self.sin_lat = math.sin(math.radians(lat))
+        self.cos_lat = math.cos(math.radians(lat))
+        self.valid_for = valid_for
+        if epoch is None:
+            epoch = Time(get_clock().time(), format="unix")
+        self.set_epoch(epoch)
+
+    def set_epoch(self, epoch):
+        """
+        (Re)compute the apparent position of the target at `epoch`.
+        """
+        cirs = self.coord.transform_to(CIRS(obstime=epoch))
+        self.epoch_jd = epoch.utc.jd
+        self.ra = cirs.ra.rad
+        self.sin_dec = math.sin(cirs.dec.rad)
+        self.cos_dec = math.cos(cirs.dec.rad)
+
+    def altitude_jd(self, jd_utc):
+        """
+        Altitude in degrees at a UTC Julian date.
+        """
+        if abs(jd_utc - self.epoch_jd) > self.valid_for:
+            self.set_epoch(Time(jd_utc, format="jd", scale="utc"))
+        hour_angle = earth_rotation_angle(jd_utc) + self.lon - self.ra
+        sin_alt = (
+            self.sin_lat * self.sin_dec
+            + self.cos_lat * self.cos_dec * math.cos(hour_angle)
+        )
+        return math.degrees(math.asin(max(-1.0, min(1.0, sin_alt))))
+
+    def altitude(self, when=None):
+        """
+        Altitude in degrees.
+
+        Parameters
+        ----------
+        when: astropy.time.Time, datetime or float, optional
+            time to evaluate: an astropy Time, a naive UTC datetime or unix seconds. Default is now.
+        """
+        if when is None:
+            when = get_clock().time()
+        if isinstance(when, Time):
+            return self.altitude_jd(when.utc.jd)
+        if hasattr(when, "timetuple"):
+            # naive UTC datetime
+            days = (when - when.replace(hour=0, minute=0, second=0, microsecond=0)).total_seconds() / 86400
+            return self.altitude_jd(when.toordinal() + 1721424.5 + days)
+        return self.altitude_jd(when / 86400.0 + UNIX_EPOCH_JD)
@@ -21,7 +21,12 @@ from astropy.coordinates import SkyCoord, get_sun, get_moon, EarthLocation, AltA
 from astropy.wcs import WCS
 from astropy.time import Time
 from datetime import datetime, timedelta, date as dt_date
-from ..utils import SkyXUtils
+from ..utils.ClockUtils import get_clock
+from .Ephemeris import NightEphemeris, AltitudeCurve, resolve_date
+from .TargetCatalog import resolve_target
+from .TargetValidation import validate_targets
+from .FastAltitude import FastAltitudeModel
+from .ObservingPlan import ObservingPlan
 
 send_web_request = "python3 C :/Dragonfly/Programs/SendWebRequestToArray.py"
 
@@ -68,20 +73,51 @@ class Observation:
         self.do_focus = do_focus
         self.iterations = iterations
         self.min_altitude = min_altitude
+        self._altitude_curves = {}
+        self._altitude_model = None
 
     def check_target(self):
         """
         Confirm that the input target is recognized by TheSkyX and astropy, else raise an error
         """
-        # Check astropy
-        try:
-            c = SkyCoord.from_name(self.target)
-        except:
-            raise AstropyNameError("SkyCoord.from_name(target) raised an exception.")
-        # Check TheSkyX
-        SkyXUtils.check_target_exists(self.target)
+        # astropy (via the local target catalog) and TheSkyX, concurrently; raises
+        # AstropyNameError or TargetNotFoundError
+        validate_targets([self.target], raise_errors=True)
         return
 
+    def target_altitude_curve(self, date="today", utcoffset=-6):
+        """
+        Altitude curve of the target over the 24 hours around local midnight of `date`,
+        from which its rise and set times are solved. Memoized per night.
+
+        Parameters
+        ----------
+        date: str, default: 'today'
+            date to use in YYYY-MM-DD or 'today'.
+        utcoffset: float, default: -6
+            utc offset between NMS and UTC
+
+        Returns
+        -------
+        curve: dfobserve.observing.AltitudeCurve
+        """
+        key = (resolve_date(date), utcoffset)
+        if key not in self._altitude_curves:
+            obsloc = EarthLocation(
+                lon=-105.5302 * u.deg, lat=32.9024 * u.deg, height=2225 * u.m
+            )
+            coord = resolve_target(self.target)
+
+            def altitude(times):
+                frame = AltAz(obstime=times, location=obsloc)
+                return coord.transform_to(frame).alt.deg
+
+            midnight = Time(f"{key[0]} 23:59:59") - utcoffset * u.hr
+            self._altitude_curves[key] = AltitudeCurve(
+                altitude, midnight - 12 * u.hr, midnight + 12 * u.hr
+            )
+        return self._altitude_curves[key]
+
     def calc_target_rise(self, date="today", utcoffset=-6, return_local=True):
         """
         Calculate the time when the target rises above the set minimum altitude (after sunset) For now, always 'today'.
@@ -101,25 +137,10 @@ class Observation:
         target_set: astropy.time.Time
             astropy Time object containing the time (either in UTC or local.)
         """
-        obsloc = EarthLocation(
-            lon=-105.5302 * u.deg, lat=32.9024 * u.deg, height=2225 * u.m
+        sunset = get_sunset(return_local=False, date=date, utcoffset=utcoffset)
+        target_rise = self.target_altitude_curve(date=date, utcoffset=utcoffset).first_above(
+            self.min_altitude, after=sunset
         )
-        now = datetime.now()
-        if date == "today":
-            dt_string = now.strftime("%Y-%m-%d")
-        else:
-            dt_string = date
-        midnight = Time(f"{dt_string} 23:59:59") - utcoffset * u.hr
-        delta_midnight = np.linspace(-12, 12, 500) * u.hr
-        obs_times = midnight + delta_midnight
-        frame = AltAz(obstime=obs_times, location=obsloc)
-        target_alt = SkyCoord.from_name(self.target).transform_to(frame).alt
-        sunset = get_sunset(return_local=False, date=date)
-        target_rise_ind = np.where(
-            (target_alt > self.min_altitude * u.deg) & (obs_times > sunset)
-        )[0][0]
-
-        target_rise = obs_times[target_rise_ind]
         if return_local:
             return target_rise + utcoffset * u.hr
         else:
@@ -143,47 +164,59 @@ class Observation:
         target_set: astropy.time.Time
             astropy Time object containing the time (either in UTC or local.)
         """
-        obsloc = EarthLocation(
-            lon=-105.5302 * u.deg, lat=32.9024 * u.deg, height=2225 * u.m
+        target_rise = self.calc_target_rise(
+            return_local=False, date=date, utcoffset=utcoffset
+        )
+        target_set = self.target_altitude_curve(date=date, utcoffset=utcoffset).first_below(
+            self.min_altitude, after=target_rise
         )
-        now = datetime.now()
-        if date == "today":
-            dt_string = now.strftime("%Y-%m-%d")
-        else:
-            dt_string = date
-        midnight = Time(f"{dt_string} 23:59:59") - utcoffset * u.hr
-        delta_midnight = np.linspace(-12, 12, 500) * u.hr
-        obs_times = midnight + delta_midnight
-        frame = AltAz(obstime=obs_times, location=obsloc)
-        target_alt = SkyCoord.from_name(self.target).transform_to(frame).alt
-        target_set_ind = np.where(
-            (target_alt < self.min_altitude * u.deg)
-            & (obs_times > self.calc_target_rise(return_local=False, date=date))
-        )[0][0]
-
-        target_set = obs_times[target_set_ind]
         if return_local:
             return target_set + utcoffset * u.hr
         else:
             return target_set
 
+    def altitude_model(self):
+        """
+        Fast altitude model of the target (see FastAltitudeModel), built once from the
+        catalog coordinates and reused.
+        """
+        if self._altitude_model is None:
+            self._altitude_model = FastAltitudeModel(resolve_target(self.target))
+        return self._altitude_model
+
     def calc_target_altitude(self, utcoffset=-6):
         """
-        Calculate the target's current altitude.
+        Calculate the target's current altitude, and whether it is above the minimum altitude.
+
+        Parameters
+        ----------
+        utcoffset: float, default: -6
+            utc offset between the local clock and UTC
+
+        Returns
+        -------
+        above: bool
+            True if the target is currently above `min_altitude`.
         """
-        obsloc = EarthLocation(
-            lon=-105.5302 * u.deg, lat=32.9024 * u.deg, height=2225 * u.m
-        )
-        now = datetime.now()
-        dt_string = now.strftime("%Y-%m-%d %H:%M:%S")
-        time_check = Time(dt_string) - utcoffset * u.hr
-        frame = AltAz(obstime=time_check, location=obsloc)
-        target_alt = SkyCoord.from_name(self.target).transform_to(frame).alt
-        if target_alt < self.min_altitude:
+        now_utc = get_clock().now() - timedelta(hours=utcoffset)
+        self.current_altitude = self.altitude_model().altitude(now_utc)
+        if self.current_altitude < self.min_altitude:
             return False
         else:
             return True
 
+    def check_target_altitude(self, utcoffset=-6):
+        """
+        Check that the target is currently above the minimum altitude. Used before every row of the
+        observing plan, so this takes microseconds (no name lookup, no astropy transform).
+
+        Returns
+        -------
+        above: bool
+            True if the target is currently above `min_altitude`.
+        """
+        return self.calc_target_altitude(utcoffset=utcoffset)
+
     def set_tilts(self, filtname, angle):
         """
         Set the filter angles for either Halpha or OIII.
@@ -255,7 +288,7 @@ class Observation:
         #     if wait_until not in ["sunset", "moonset", "target_rise"]:
         #         try:
         #             in_date = (
-        #                 datetime.now().strftime("%Y-%m-%d") + " " + self.wait_until
+        #                 get_clock().now().strftime("%Y-%m-%d") + " " + self.wait_until
         #             )
         #             time = Time(in_date)
         #             self.wait_until = wait_until
@@ -376,8 +409,9 @@ class Observation:
 
         Returns
         -------
-        obs_plan: list
-            A simple list containing mini dictionaries with observing params (ultimately the same info as the dataframe below).
+        obs_plan: dfobserve.observing.ObservingPlan
+            Sequence of plan steps with the observing params (steps also support dict-style access,
+            and `obs_plan.df` gives a DataFrame view).
         """
         # Setup default configurations if not done by user
         if not hasattr(self, "calibration_dict"):
@@ -387,27 +421,28 @@ class Observation:
         if not hasattr(self, "wait_until"):
             self.configure_observation()
 
-        # Check timing of target rises and sets, etc.
-        self.check_observing_timings(date)
+        # Check timing of target rises and sets, etc. (unless compute_visibility already did)
+        if getattr(self, "_timings_key", None) != self._timings_for(date):
+            self.check_observing_timings(date)
         # establish stuff that should happen before, between, and after obs
         # Check for needed flats first (they need flips so)
-        obs_plan = []
+        obs_plan = ObservingPlan()
         if self.calibration_dict["take_flats"] in ["before", "all"]:
             nflats = self.calibration_dict["n_flats"]
             if nflats > 0:
                 exptime = self.calibration_dict["flat_exptime"]
                 for i in range(nflats):
-                    obs_plan.append({"type": "flat", "exptime": exptime})
+                    obs_plan.add("flat", exptime=exptime)
         # Check if darks should be taken before
         if self.calibration_dict["take_darks"] in ["before", "all"]:
             ndarks = self.calibration_dict["n_darks"]
             if ndarks > 0:
                 exptime = self.calibration_dict["dark_exptime"]
                 for i in range(ndarks):
-                    obs_plan.append({"type": "dark", "exptime": exptime})
+                    obs_plan.add("dark", exptime=exptime)
         # Check if a focus run is called for
         if self.do_focus:
-            obs_plan.append({"type": "focus"})
+            obs_plan.add("focus")
 
         # Check if standard star should be taken before
         if self.standards_dict["when"] in ["before", "all"]:
@@ -416,22 +451,12 @@ class Observation:
                 n_standards = self.standards_dict["n_standards"]
                 use = self.standards_dict["use"]
                 for i in range(n_standards):
-                    obs_plan.append(
-                        {"type": "standard", "exptime": exptime, "use": use}
-                    )
+                    obs_plan.add("standard", exptime=exptime, use=use)
 
         # Now move on to the target observations
         for i in range(self.iterations):
-            obs_plan.append(
-                {"type": "science", "target": self.target, "exptime": self.exptime}
-            )
-            obs_plan.append(
-                {
-                    "type": "calibration",
-                    "target": self.target,
-                    "exptime": self.off_band_exptime,
-                    "n": self.n_cals,
-                }
+            obs_plan.add_science(
+                self.target, self.exptime, self.off_band_exptime, self.n_cals
             )
             # Check for cals between
             if i < (self.iterations - 1):
@@ -440,14 +465,14 @@ class Observation:
                     if nflats > 0:
                         exptime = self.calibration_dict["flat_exptime"]
                         for i in range(nflats):
-                            obs_plan.append({"type": "flat", "exptime": exptime})
+                            obs_plan.add("flat", exptime=exptime)
                 # Check if darks should be taken between
                 if self.calibration_dict["take_darks"] in ["between", "all"]:
                     ndarks = self.calibration_dict["n_darks"]
                     if ndarks > 0:
                         exptime = self.calibration_dict["dark_exptime"]
                         for i in range(ndarks):
-                            obs_plan.append({"type": "dark", "exptime": exptime})
+                            obs_plan.add("dark", exptime=exptime)
                 # Check if standard star should be taken between
                 if self.standards_dict["when"] in ["between", "all"]:
                     if self.standards_dict["n_standards"] > 0:
@@ -455,9 +480,7 @@ class Observation:
                         n_standards = self.standards_dict["n_standards"]
                         use = self.standards_dict["use"]
                         for i in range(n_standards):
-                            obs_plan.append(
-                                {"type": "standard", "exptime": exptime, "use": use}
-                            )
+                            obs_plan.add("standard", exptime=exptime, use=use)
 
         # Check what to do after observing target
         # Check if flats should be taken after
@@ -468,32 +491,23 @@ class Observation:
                 n_standards = self.standards_dict["n_standards"]
                 use = self.standards_dict["use"]
                 for i in range(n_standards):
-                    obs_plan.append(
-                        {"type": "standard", "exptime": exptime, "use": use}
-                    )
+                    obs_plan.add("standard", exptime=exptime, use=use)
         if self.calibration_dict["take_flats"] in ["after", "all"]:
             nflats = self.calibration_dict["n_flats"]
             if nflats > 0:
                 exptime = self.calibration_dict["flat_exptime"]
                 for i in range(nflats):
-                    obs_plan.append({"type": "flat", "exptime": exptime})
+                    obs_plan.add("flat", exptime=exptime)
         # Check if darks should be taken after
         if self.calibration_dict["take_darks"] in ["after", "all"]:
             ndarks = self.calibration_dict["n_darks"]
             if ndarks > 0:
                 exptime = self.calibration_dict["dark_exptime"]
                 for i in range(ndarks):
-                    obs_plan.append({"type": "dark", "exptime": exptime})
-        self.observing_plan = pd.DataFrame(obs_plan)
-        self.observing_plan["n"] = [
-            1 if np.isnan(i) else i for i in self.observing_plan.n
-        ]
+                    obs_plan.add("dark", exptime=exptime)
+        self.observing_plan = obs_plan
         # Calculate total exposure time on target
-        total_exptime = 0
-        for n, i in enumerate(obs_plan):
-            if i["type"] in ["standard", "science", "flat", "dark"]:
-                total_exptime += int(i["exptime"])
-        self.total_exptime_hours = total_exptime / 3600.0
+        self.total_exptime_hours = obs_plan.total_exptime / 3600.0
         if self.total_exptime_hours > self.target_uptime:
             raise TargetUptimeError(
                 f"Minimum exposure time on {self.target} ({self.total_exptime_hours:.2f} hrs) is longer than its up-time ({self.target_uptime:.2f} hrs)."
@@ -502,14 +516,18 @@ class Observation:
         self.obs_plan = obs_plan
         return obs_plan
 
-    def check_observing_timings(self, date):
+    def _timings_for(self, date, utcoffset=-6):
+        return (resolve_date(date), utcoffset, self.wait_until, self.min_altitude)
+
+    def check_observing_timings(self, date, utcoffset=-6):
         """
-        Checks to ensure the requested observation start times do not conflict with logic.
+        Checks to ensure the requested observation start times do not conflict with logic,
+        and sets OBS_START and target_uptime.
         """
         # Establish when to start observations.
         if self.wait_until == "sunset":
-            sunset = get_sunset(date=date)
-            target_rise = self.calc_target_rise(date=date)
+            sunset = get_sunset(date=date, utcoffset=utcoffset)
+            target_rise = self.calc_target_rise(date=date, utcoffset=utcoffset)
             if sunset < target_rise:
                 raise TargetNotUpError(
                     f"You selected a sunset start for {self.target}, but {self.target} \n is not above minimum altitude ({self.min_altitude} deg) at sunset. \n You probably want None or target_rise"
@@ -517,11 +535,11 @@ class Observation:
             else:
                 self.OBS_START = sunset
         elif self.wait_until == "moonset":
-            self.OBS_START = get_moonset(date=date)
+            self.OBS_START = get_moonset(date=date, utcoffset=utcoffset)
             if date == "today":
-                day = (datetime.now() + timedelta(days=1)).day
+                day = (get_clock().now() + timedelta(days=1)).day
                 time_compare = Time(
-                    f"{datetime.now().strftime('%Y-%m')}-{day} 04:00:00"
+                    f"{get_clock().now().strftime('%Y-%m')}-{day} 04:00:00"
                 )
             else:
                 y = int(date.split("-")[0])
@@ -533,15 +551,15 @@ class Observation:
                 raise EndOfNightError(
                     f"Selected Start Time for {self.target} as moonset but moonset is after 4 am local."
                 )
-        elif self.wait_until == None:
+        elif self.wait_until in [None, "None (Now/after previous)"]:
             self.wait_until = "None (Now/after previous)"
             self.OBS_START = "N/A"
         elif self.wait_until == "target_rise":
-            self.OBS_START = self.calc_target_rise(date=date)
+            self.OBS_START = self.calc_target_rise(date=date, utcoffset=utcoffset)
             if date == "today":
-                day = (datetime.now() + timedelta(days=1)).day
+                day = (get_clock().now() + timedelta(days=1)).day
                 time_compare = Time(
-                    f"{datetime.now().strftime('%Y-%m')}-{day} 04:00:00"
+                    f"{get_clock().now().strftime('%Y-%m')}-{day} 04:00:00"
                 )
             else:
                 y = int(date.split("-")[0])
@@ -558,13 +576,13 @@ class Observation:
             start_hour = int(self.wait_until.split(":")[0])
             if date == "today":
                 if start_hour < 12:
-                    day = (datetime.now() + timedelta(days=1)).day
+                    day = (get_clock().now() + timedelta(days=1)).day
                     in_date = (
-                        datetime.now().strftime(f"%Y-%m-{day}") + " " + self.wait_until
+                        get_clock().now().strftime(f"%Y-%m-{day}") + " " + self.wait_until
                     )
                 else:
                     in_date = (
-                        datetime.now().strftime("%Y-%m-%d") + " " + self.wait_until
+                        get_clock().now().strftime("%Y-%m-%d") + " " + self.wait_until
                     )
             else:
                 if start_hour < 12:
@@ -576,9 +594,9 @@ class Observation:
                 else:
                     in_date = date + " " + self.wait_until
             self.OBS_START = Time(in_date)
-            sunset = get_sunset(date=date)
-            sunrise = get_sunrise(date=date)
-            moonset = get_moonset(date=date)
+            sunset = get_sunset(date=date, utcoffset=utcoffset)
+            sunrise = get_sunrise(date=date, utcoffset=utcoffset)
+            moonset = get_moonset(date=date, utcoffset=utcoffset)
             if self.OBS_START < sunset:
                 raise DayTimeError("Start time is before sunset.")
             elif self.OBS_START > sunrise:
@@ -586,10 +604,11 @@ class Observation:
             elif self.OBS_START < moonset:
                 print("WARNING: START TIME is before moon sets. (allowing...)")
 
-        self.target_uptime = self.calc_target_set(date=date) - self.calc_target_rise(
-            date=date
-        )
+        self.target_uptime = self.calc_target_set(
+            date=date, utcoffset=utcoffset
+        ) - self.calc_target_rise(date=date, utcoffset=utcoffset)
         self.target_uptime = self.target_uptime.to_datetime().seconds / 3600
+        self._timings_key = self._timings_for(date, utcoffset)
 
     def view_observing_plan(
         self, sysout: bool = True, write_to_log: bool = False, logfile=None
@@ -722,26 +741,9 @@ def get_sunset(date="today", utcoffset=-6, return_local=True):
     sunset_time: astropy.time.Time
         time of sunset in either UTC or local as requested
     """
-    obsloc = EarthLocation(
-        lon=-105.5302 * u.deg, lat=32.9024 * u.deg, height=2225 * u.m
+    return NightEphemeris.for_night(date=date, utcoffset=utcoffset).sunset(
+        return_local=return_local
     )
-    if date == "today":
-        now = datetime.now()
-        dt_string = now.strftime("%Y-%m-%d")
-    else:
-        dt_string = date
-    midnight = Time(f"{dt_string} 23:59:59") - utcoffset * u.hr
-    delta_midnight = np.linspace(-12, 12, 500) * u.hr
-    obs_times = midnight + delta_midnight
-    frame = AltAz(obstime=obs_times, location=obsloc)
-    sun = get_sun(obs_times).transform_to(frame)
-    sunset_ind = np.where(sun.alt < 0 * u.deg)[0][0]
-    if return_local:
-        sunset_time = obs_times[sunset_ind] + utcoffset * u.hr
-        return sunset_time
-    else:
-        sunset_utc = obs_times[sunset_ind]
-        return sunset_utc
 
 
 def get_sunrise(date="today", utcoffset=-6, return_local=True):
@@ -762,26 +764,9 @@ def get_sunrise(date="today", utcoffset=-6, return_local=True):
     sunset_time: astropy.time.Time
         time of sunset in either UTC or local as requested
     """
-    obsloc = EarthLocation(
-        lon=-105.5302 * u.deg, lat=32.9024 * u.deg, height=2225 * u.m
+    return NightEphemeris.for_night(date=date, utcoffset=utcoffset).sunrise(
+        return_local=return_local
     )
-    if date == "today":
-        now = datetime.now()
-        dt_string = now.strftime("%Y-%m-%d")
-    else:
-        dt_string = date
-    midnight = Time(f"{dt_string} 23:59:59") - utcoffset * u.hr
-    delta_midnight = np.linspace(-12, 12, 500) * u.hr
-    obs_times = midnight + delta_midnight
-    frame = AltAz(obstime=obs_times, location=obsloc)
-    sun = get_sun(obs_times).transform_to(frame)
-    sunrise_ind = np.where(sun.alt < 0 * u.deg)[0][-1]
-    if return_local:
-        sunrise_time = obs_times[sunrise_ind] + utcoffset * u.hr
-        return sunrise_time
-    else:
-        sunrise_utc = obs_times[sunrise_ind]
-        return sunrise_utc
 
 
 def get_morning_twilight(date="today", utcoffset=-6, return_local=True):
@@ -802,26 +787,9 @@ def get_morning_twilight(date="today", utcoffset=-6, return_local=True):
     sunset_time: astropy.time.Time
         time of sunset in either UTC or local as requested
     """
-    obsloc = EarthLocation(
-        lon=-105.5302 * u.deg, lat=32.9024 * u.deg, height=2225 * u.m
-    )
-    if date == "today":
-        now = datetime.now()
-        dt_string = now.strftime("%Y-%m-%d")
-    else:
-        dt_string = date
-    midnight = Time(f"{dt_string} 23:59:59") - utcoffset * u.hr
-    delta_midnight = np.linspace(-12, 12, 500) * u.hr
-    obs_times = midnight + delta_midnight
-    frame = AltAz(obstime=obs_times, location=obsloc)
-    sun = get_sun(obs_times).transform_to(frame)
-    twilight_ind = np.where(sun.alt < -18.0 * u.deg)[0][-1]
-    if return_local:
-        twilight_time = obs_times[twilight_ind] + utcoffset * u.hr
-        return twilight_time
-    else:
-        twilight_utc = obs_times[twilight_ind]
-        return twilight_utc
+    return NightEphemeris.for_night(
+        date=date, utcoffset=utcoffset
+    ).morning_twilight(return_local=return_local)
 
 
 def get_moonset(date="today", utcoffset=-6, set_altitude=10, return_local=True):
@@ -845,27 +813,9 @@ def get_moonset(date="today", utcoffset=-6, set_altitude=10, return_local=True):
     moonset_time: astropy.time.Time
         time of moonset in either UTC or local as requested
     """
-    obsloc = EarthLocation(
-        lon=-105.5302 * u.deg, lat=32.9024 * u.deg, height=2225 * u.m
+    return NightEphemeris.for_night(date=date, utcoffset=utcoffset).moonset(
+        set_altitude=set_altitude, return_local=return_local
     )
-    if date == "today":
-        now = datetime.now()
-        dt_string = now.strftime("%Y-%m-%d")
-    else:
-        dt_string = date
-    midnight = Time(f"{dt_string} 23:59:59") - utcoffset * u.hr
-    delta_midnight = np.linspace(-12, 18, 500) * u.hr
-    obs_times = midnight + delta_midnight
-    frame = AltAz(obstime=obs_times, location=obsloc)
-    sunset = get_sunset(date=date)
-    moon = get_moon(obs_times).transform_to(frame)
-    moon_ind = np.where((moon.alt > set_altitude * u.deg) & (obs_times > sunset))[0][-1]
-    if return_local:
-        moonset_time = obs_times[moon_ind] + utcoffset * u.hr
-        return moonset_time
-    else:
-        moonset_utc = obs_times[moon_ind]
-        return moonset_utc
 
 
 def get_moonrise(date="today", utcoffset=-6, rise_altitude=10, return_local=True):
@@ -889,24 +839,6 @@ def get_moonrise(date="today", utcoffset=-6, rise_altitude=10, return_local=True
     moonrise_time: astropy.time.Time
         time of moonrise in either UTC or local as requested
     """
-    obsloc = EarthLocation(
-        lon=-105.5302 * u.deg, lat=32.9024 * u.deg, height=2225 * u.m
+    return NightEphemeris.for_night(date=date, utcoffset=utcoffset).moonrise(
+        rise_altitude=rise_altitude, return_local=return_local
     )
-    if date == "today":
-        now = datetime.now()
-        dt_string = now.strftime("%Y-%m-%d")
-    else:
-        dt_string = date
-    midnight = Time(f"{dt_string} 23:59:59") - utcoffset * u.hr
-    delta_midnight = np.linspace(-12, 18, 500) * u.hr
-    obs_times = midnight + delta_midnight
-    frame = AltAz(obstime=obs_times, location=obsloc)
-    sunset = get_sunset(date=date)
-    moon = get_moon(obs_times).transform_to(frame)
-    moon_ind = np.where((moon.alt > rise_altitude * u.deg) & (obs_times > sunset))[0][0]
-    if return_local:
-        moonrise_time = obs_times[moon_ind] + utcoffset * u.hr
-        return moonrise_time
-    else:
-        moonrise_utc = obs_times[moon_ind]
-        return moonrise_utc
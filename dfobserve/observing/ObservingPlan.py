@@ -0,0 +1,202 @@
+"""
+Compact representation of an observing plan: an indexed sequence of steps.
+"""
+
+import json
+import pandas as pd
+
+__all__ = ["ObservingPlan", "PlanStep"]
+
+
+class PlanStep:
+    """
+    One step of an observing plan (a flat, dark, focus run, standard, science or calibration frame).
+
+    Steps also support dict-style access (``step["exptime"]``), like the plain dicts plans were
+    made of before.
+    """
+
+    __slots__ = ("type", "exptime", "n", "target", "use", "calibration")
+    fields = __slots__
+
+    def __init__(
+        self, type, exptime=None, n=1, target=None, use=None, calibration=None
+    ):
+        """
+        Parameters
+        ----------
+        type: str
+            'flat', 'dark', 'focus', 'standard', 'science' or 'calibration'.
+        exptime: int, optional
+            exposure time in seconds.
+        n: int, default: 1
+            number of frames (co-exposed off-band frames for a calibration step).
+        target: str, optional
+            target name, for science and calibration steps.
+        use: str, optional
+            which standard star to use, for standard steps.
+        calibration: int, optional
+            for a science step, index in the plan of the calibration step that goes with it.
+        """
+        self.type = type
+        self.exptime = exptime
+        self.n = n
+        self.target = target
+        self.use = use
+        self.calibration = calibration
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __eq__(self, other):
+        if not isinstance(other, PlanStep):
+            return NotImplemented
+        return self.to_tuple() == other.to_tuple()
+
+    def __repr__(self):
+        items = ", ".join(
+            f"{f}={getattr(self, f)!r}" for f in self.fields if getattr(self, f) is not None
+        )
+        return f"PlanStep({items})"
+
+    def to_tuple(self):
+        return tuple(getattr(self, f) for f in self.fields)
+
+    def to_dict(self):
+        """
+        The step as a dict, leaving out unset fields.
+        """
+        return {f: getattr(self, f) for f in self.fields if getattr(self, f) is not None}
+
+
+class ObservingPlan:
+    """
+    Ordered sequence of PlanSteps with constant-time access by index, an explicit link from each
+    science step to its calibration step, and cheap copies and (de)serialization. A DataFrame view
+    is available for display via `df`.
+    """
+
+    def __init__(self, steps=None):
+        """
+        Parameters
+        ----------
+        steps: list, optional
+            PlanSteps (or dicts of their fields) to start from.
+        """
+        self.steps = []
+        for step in steps or []:
+            if isinstance(step, dict):
+                step = PlanStep(**step)
+            self.steps.append(step)
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __getitem__(self, index):
+        return self.steps[index]
+
+    def __iter__(self):
+        return iter(self.steps)
+
+    def __eq__(self, other):
+        if not isinstance(other, ObservingPlan):
+            return NotImplemented
+        return self.steps == other.steps
+
+    def __repr__(self):
+        return f"ObservingPlan({len(self)} steps)"
+
+    @property
+    def index(self):
+        """
+        Row numbers of the plan (as for the DataFrame plans used before).
+        """
+        return range(len(self.steps))
+
+    def add(self, type, exptime=None, n=1, **kwargs):
+        """
+        Append a step to the plan.
+
+        Returns
+        -------
+        index: int
+            index of the new step.
+        """
+        self.steps.append(PlanStep(type, exptime=exptime, n=n, **kwargs))
+        return len(self.steps) - 1
+
+    def add_science(self, target, exptime, off_exptime, n_offs):
+        """
+        Append a science step and the calibration (off-band) step that is co-exposed with it,
+        linking the two.
+
+        Returns
+        -------
+        index: int
+            index of the science step.
+        """
+        science = self.add("science", exptime=exptime, target=target)
+        calibration = self.add("calibration", exptime=off_exptime, n=n_offs, target=target)
+        self.steps[science].calibration = calibration
+        return science
+
+    def calibration_for(self, index):
+        """
+        The calibration step of the science step at `index`, or None if it has none.
+        """
+        calibration = self.steps[index].calibration
+        if calibration is None:
+            return None
+        return self.steps[calibration]
+
+    @property
+    def total_exptime(self):
+        """
+        Total exposure time (s) of the flat, dark, standard and science steps.
+        """
+        return sum(
+            int(step.exptime)
+            for step in self.steps
+            if step.type in ["standard", "science", "flat", "dark"]
+        )
+
+    def copy(self):
+        plan = ObservingPlan()
+        plan.steps = [PlanStep(*step.to_tuple()) for step in self.steps]
+        return plan
+
+    def to_records(self):
+        """
+        The plan as a list of dicts.
+        """
+        return [step.to_dict() for step in self.steps]
+
+    def to_json(self):
+        """
+        Serialize the plan to a (compact) json string: the field names once, then one row per step.
+        """
+        return json.dumps(
+            {"fields": list(PlanStep.fields), "steps": [step.to_tuple() for step in self.steps]}
+        )
+
+    @classmethod
+    def from_json(cls, string):
+        """
+        Rebuild a plan serialized by `to_json`.
+        """
+        data = json.loads(string)
+        return cls([dict(zip(data["fields"], row)) for row in data["steps"]])
+
+    @property
+    def df(self):
+        """
+        DataFrame of the plan (one row per step), built on each access so that it reflects steps
+        changed in place.
+        """
+        return pd.DataFrame([step.to_tuple() for step in self.steps], columns=PlanStep.fields)
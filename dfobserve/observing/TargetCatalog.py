@@ -0,0 +1,224 @@
+"""
+Local catalog of target coordinates, so that target names are only resolved over the network once.
+"""
+
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import astropy.units as u
+from astropy.coordinates import SkyCoord
+from dfobserve.exceptions.exceptions import AstropyNameError
+
+__all__ = ["TargetCatalog", "get_target_catalog", "resolve_target"]
+
+TARGET_CATALOG_FILE = os.path.expanduser("~/.dfobserve/target_catalog.csv")
+
+
+def _key(name):
+    # 'NGC  5813', 'ngc 5813' and 'NGC 5813 ' are the same target.
+    return " ".join(name.split()).upper()
+
+
+class TargetCatalog:
+    """
+    Name -> (RA, Dec) cache of targets backed by a csv file. Names missing from the catalog are
+    resolved with `SkyCoord.from_name` (Sesame) and added to it; names already in the catalog
+    never touch the network.
+    """
+
+    def __init__(self, catalog_file=TARGET_CATALOG_FILE, offline=False):
+        """
+        Parameters
+        ----------
+        catalog_file: str
+            location of the catalog csv file (columns Name, RA, Dec in degrees, ICRS).
+            If None, the catalog is kept in memory only.
+        offline: bool, default: False
+            never go to the network; names missing from the catalog raise AstropyNameError.
+        """
+        self.catalog_file = catalog_file
+        self.offline = offline
+        self._coords = {}
+        self._names = {}
+        self._lock = threading.RLock()
+        self.load()
+
+    def __len__(self):
+        return len(self._coords)
+
+    def __contains__(self, name):
+        return _key(name) in self._coords
+
+    def load(self):
+        """
+        (Re)load the catalog file, if it exists.
+        """
+        if self.catalog_file is None or not os.path.exists(self.catalog_file):
+            return
+        catalog = pd.read_csv(self.catalog_file, header=0)
+        with self._lock:
+            for name, ra, dec in zip(catalog.Name, catalog.RA, catalog.Dec):
+                self._store(name, ra, dec)
+
+    def save(self):
+        """
+        Write the catalog file (atomically, so a concurrent reader never sees a partial file).
+        """
+        if self.catalog_file is None:
+            return
+        with self._lock:
+            keys = sorted(self._coords.keys())
+            catalog = pd.DataFrame(
+                {
+                    "Name": [self._names[k] for k in keys],
+                    "RA": [self._coords[k].ra.deg for k in keys],
+                    "Dec": [self._coords[k].dec.deg for k in keys],
+                }
+            )
+        directory = os.path.dirname(os.path.abspath(self.catalog_file))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                catalog.to_csv(f, index=False, float_format="%.8f")
+            os.replace(tmp, self.catalog_file)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def _store(self, name, ra, dec):
+        key = _key(name)
+        self._names[key] = name
+        self._coords[key] = SkyCoord(ra=ra * u.deg, dec=dec * u.deg, frame="icrs")
+        return self._coords[key]
+
+    def add(self, name, ra, dec, save=True):
+        """
+        Add (or replace) a target by hand, e.g. one unknown to Sesame.
+
+        Parameters
+        ----------
+        name: str
+            target name.
+        ra, dec: float
+            ICRS coordinates in degrees.
+        save: bool, default: True
+            write the catalog file afterwards.
+        """
+        with self._lock:
+            coord = self._store(name, ra, dec)
+        if save:
+            self.save()
+        return coord
+
+    def _lookup(self, name):
+        if self.offline:
+            raise AstropyNameError(f"{name} is not in the target catalog (offline).")
+        try:
+            coord = SkyCoord.from_name(name)
+        except Exception:
+            raise AstropyNameError("SkyCoord.from_name(target) raised an exception.")
+        return coord.icrs
+
+    def resolve(self, name, save=True):
+        """
+        Coordinates of a target, from the catalog or (on a miss) from the network.
+
+        Parameters
+        ----------
+        name: str
+            target name.
+        save: bool, default: True
+            write the catalog file after a network lookup.
+
+        Returns
+        -------
+        coord: astropy.coordinates.SkyCoord
+        """
+        with self._lock:
+            coord = self._coords.get(_key(name))
+        if coord is not None:
+            return coord
+        coord = self._lookup(name)
+        self.add(name, coord.ra.deg, coord.dec.deg, save=save)
+        return self._coords[_key(name)]
+
+    def prewarm(self, names, raise_errors=False, verbose=False, max_workers=8):
+        """
+        Resolve a whole target list ahead of time, writing the catalog file once at the end.
+        Names missing from the catalog are looked up concurrently.
+
+        Parameters
+        ----------
+        names: list
+            target names.
+        raise_errors: bool, default: False
+            raise AstropyNameError for the first name (in list order) that can't be resolved,
+            instead of reporting it.
+        verbose: bool, default: False
+            print the names that could not be resolved.
+        max_workers: int, default: 8
+            number of lookups in flight at once.
+
+        Returns
+        -------
+        missing: list
+            names that could not be resolved.
+        """
+        todo = {}
+        for name in names:
+            if name not in self:
+                todo.setdefault(_key(name), name)
+        todo = list(todo.values())
+        results = {}
+        if len(todo) > 0:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(todo)))) as pool:
+                futures = {name: pool.submit(self._lookup, name) for name in todo}
+                for name, future in futures.items():
+                    try:
+                        results[name] = future.result()
+                    except AstropyNameError as e:
+                        results[name] = e
+        missing = []
+        added = False
+        for name in todo:
+            result = results[name]
+            if isinstance(result, AstropyNameError):
+                if raise_errors:
+                    raise result
+                missing.append(name)
+                continue
+            self.add(name, result.ra.deg, result.dec.deg, save=False)
+            added = True
+        if added:
+            self.save()
+        if verbose and len(missing) > 0:
+            print("The following targets could not be resolved:")
+            for name in missing:
+                print(name)
+        return missing
+
+
+_default_catalog = None
+_default_catalog_lock = threading.Lock()
+
+
+def get_target_catalog():
+    """
+    Return the process-wide TargetCatalog, backed by TARGET_CATALOG_FILE.
+    """
+    global _default_catalog
+    with _default_catalog_lock:
+        if _default_catalog is None:
+            _default_catalog = TargetCatalog(catalog_file=TARGET_CATALOG_FILE)
+        return _default_catalog
+
+
+def resolve_target(name):
+    """
+    Coordinates of a target from the shared catalog (see TargetCatalog.resolve).
+    """
+    return get_target_catalog().resolve(name)
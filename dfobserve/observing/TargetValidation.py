@@ -0,0 +1,119 @@
+"""
+Validation of whole target lists against TheSkyX and the target catalog in one pass.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import astropy.units as u
+import numpy as np
+import pandas as pd
+from astropy.coordinates import SkyCoord
+
+from dfobserve.exceptions.exceptions import AstropyNameError, TargetNotFoundError
+from ..utils.SkyXUtils import SKYX_PORT, check_targets_exist
+from .TargetCatalog import get_target_catalog
+
+__all__ = ["validate_targets"]
+
+
+def validate_targets(
+    targets: list,
+    check_skyx: bool = True,
+    host: str = "127.0.0.1",
+    port: int = SKYX_PORT,
+    max_workers: int = 8,
+    raise_errors: bool = False,
+    verbose: bool = False,
+):
+    """
+    Check that every target is known to both TheSkyX and astropy (Sesame).
+
+    All TheSkyX lookups go out as a single script (see check_targets_exist), while the names
+    missing from the target catalog are resolved concurrently (see TargetCatalog.prewarm); the two
+    run at the same time. Names already in the catalog never touch the network.
+
+    Parameters
+    ----------
+    targets: list
+        target names, or Observation objects.
+    check_skyx: bool, default: True
+        whether to look the targets up in TheSkyX (False: astropy only).
+    host: str, default: '127.0.0.1'
+        IP address associated with TheSkyX server
+    port: int, default: 3040
+        port of TheSkyX TCP server.
+    max_workers: int, default: 8
+        number of astropy lookups in flight at once.
+    raise_errors: bool, default: False
+        raise AstropyNameError or TargetNotFoundError for the first bad target (in list order).
+    verbose: bool, default: False
+        print the targets that failed.
+
+    Returns
+    -------
+    valid_df: pandas.DataFrame
+        one row per target: Name, Resolved and RA/Dec (degrees) from astropy, InSkyX and
+        SkyX_RA/SkyX_Dec, the Separation (arcmin) between the two positions, and isGood.
+    """
+    names = [getattr(target, "target", target) for target in targets]
+    catalog = get_target_catalog()
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        if check_skyx:
+            skyx = pool.submit(check_targets_exist, names, host=host, port=port)
+        catalog.prewarm(names, max_workers=max_workers)
+        if check_skyx:
+            skyx = skyx.result()
+    if not check_skyx:
+        skyx = pd.DataFrame(
+            {"Name": names, "Found": np.nan, "RA": np.nan, "Dec": np.nan},
+            columns=["Name", "Found", "RA", "Dec"],
+        )
+
+    resolved, ras, decs = [], [], []
+    for name in names:
+        if name in catalog:
+            coord = catalog.resolve(name)
+            resolved.append(True)
+            ras.append(coord.ra.deg)
+            decs.append(coord.dec.deg)
+        else:
+            resolved.append(False)
+            ras.append(np.nan)
+            decs.append(np.nan)
+    valid_df = pd.DataFrame(
+        {
+            "Name": names,
+            "Resolved": resolved,
+            "RA": ras,
+            "Dec": decs,
+            "InSkyX": skyx.Found.values,
+            "SkyX_RA": skyx.RA.values,
+            "SkyX_Dec": skyx.Dec.values,
+        }
+    )
+    separation = np.full(len(valid_df), np.nan)
+    both = (valid_df.Resolved & (valid_df.InSkyX == True)).values
+    if both.any():
+        separation[both] = (
+            SkyCoord(ra=valid_df.RA[both].values * u.deg, dec=valid_df.Dec[both].values * u.deg)
+            .separation(
+                SkyCoord(
+                    ra=valid_df.SkyX_RA[both].values * u.deg,
+                    dec=valid_df.SkyX_Dec[both].values * u.deg,
+                )
+            )
+            .arcmin
+        )
+    valid_df["Separation"] = separation
+    valid_df["isGood"] = valid_df.Resolved & ((valid_df.InSkyX == True) | (not check_skyx))
+
+    bad = valid_df.loc[~valid_df.isGood]
+    if verbose and len(bad) > 0:
+        print("The following targets failed validation:")
+        print(bad[["Name", "Resolved", "InSkyX"]].to_string(index=False))
+    if raise_errors and len(bad) > 0:
+        row = bad.iloc[0]
+        if not row.Resolved:
+            raise AstropyNameError(f"{row.Name} could not be resolved by astropy.")
+        raise TargetNotFoundError(f"{row.Name} not in TheSkyX Database")
+    return valid_df
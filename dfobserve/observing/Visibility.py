@@ -0,0 +1,105 @@
+"""
+Rise, set and uptime of a whole list of targets, computed together.
+"""
+
+import numpy as np
+import pandas as pd
+import astropy.units as u
+from astropy.coordinates import SkyCoord, EarthLocation, AltAz
+
+from .Ephemeris import NMS_LOCATION, refine_crossings, above_intervals
+from .TargetCatalog import get_target_catalog, resolve_target
+
+__all__ = ["compute_visibility"]
+
+
+def compute_visibility(observations, date="today", utcoffset=-6):
+    """
+    Compute the altitude curves, rise and set times and uptimes of many targets at once.
+
+    All targets are transformed together on the shared coarse time grid (one stacked SkyCoord
+    transform), and all their rise/set crossings are refined together (one transform per refinement
+    step). The results are stored in each Observation's altitude curve memo, so that
+    `calc_target_rise`, `calc_target_set` and `construct_observing_plan` read them instead of
+    recomputing. `target_uptime` is set on each Observation, and so is `OBS_START` for those
+    whose start is configured (`configure_observation`), from the shared rise times and the
+    night's sunset/moonset (see Observation.check_observing_timings, whose errors are raised).
+
+    Parameters
+    ----------
+    observations: list
+        list of Observation objects.
+    date: str, default: 'today'
+        date to use in YYYY-MM-DD or 'today'.
+    utcoffset: float, default: -6
+        utc offset between NMS and UTC
+
+    Returns
+    -------
+    visibility: pandas.DataFrame
+        one row per target with its rise and set time (local), uptime (hours) and observing
+        start (OBS_START, or None if not configured). Targets that never reach their minimum
+        altitude after sunset have None for all four.
+    """
+    columns = ["target", "rise", "set", "uptime", "start"]
+    observations = list(observations)
+    if len(observations) == 0:
+        return pd.DataFrame(columns=columns)
+    get_target_catalog().prewarm(
+        [obs.target for obs in observations], raise_errors=True
+    )
+    curves = [
+        obs.target_altitude_curve(date=date, utcoffset=utcoffset) for obs in observations
+    ]
+    coords = [resolve_target(obs.target) for obs in observations]
+    coords = SkyCoord(
+        ra=[c.ra.deg for c in coords] * u.deg, dec=[c.dec.deg for c in coords] * u.deg
+    )
+    obsloc = EarthLocation(
+        lon=NMS_LOCATION["lon"] * u.deg,
+        lat=NMS_LOCATION["lat"] * u.deg,
+        height=NMS_LOCATION["height"] * u.m,
+    )
+    t_start = curves[0].t_start
+    x = curves[0].grid()
+    times = t_start + x * u.hr
+    alt = coords[:, None].transform_to(AltAz(obstime=times[None, :], location=obsloc)).alt.deg
+
+    thresholds = np.array([obs.min_altitude for obs in observations], dtype=float)
+    above = alt > thresholds[:, None]
+    rows, idx = np.where(above[:, :-1] != above[:, 1:])
+
+    def evaluate(hours, brackets):
+        targets = rows[brackets]
+        frame = AltAz(obstime=t_start + hours * u.hr, location=obsloc)
+        return coords[targets].transform_to(frame).alt.deg
+
+    roots = refine_crossings(
+        evaluate,
+        x[idx],
+        x[idx + 1],
+        above[rows, idx],
+        thresholds[rows],
+        curves[0].tolerance,
+        curves[0].subdivisions,
+    )
+
+    visibility = []
+    for i, (obs, curve) in enumerate(zip(observations, curves)):
+        curve._coarse = (x, alt[i])
+        curve._intervals[obs.min_altitude] = above_intervals(
+            roots[rows == i], above[i, 0], above[i, -1], curve.span
+        )
+        try:
+            rise = obs.calc_target_rise(date=date, utcoffset=utcoffset)
+            set_ = obs.calc_target_set(date=date, utcoffset=utcoffset)
+        except IndexError:
+            visibility.append([obs.target, None, None, None, None])
+            continue
+        obs.target_uptime = (set_ - rise).to_datetime().seconds / 3600
+        start = None
+        if hasattr(obs, "wait_until"):
+            obs.check_observing_timings(date, utcoffset=utcoffset)
+            start = obs.OBS_START
+        visibility.append([obs.target, rise, set_, obs.target_uptime, start])
+    return pd.DataFrame(visibility, columns=columns)
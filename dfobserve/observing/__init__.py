@@ -1,2 +1,8 @@
+from .Ephemeris import *
+from .TargetCatalog import *
+from .TargetValidation import *
+from .Visibility import *
+from .FastAltitude import *
+from .ObservingPlan import *
 from .Observation import *
 from .AutoObserve import *
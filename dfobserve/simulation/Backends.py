@@ -0,0 +1,309 @@
+"""
+Simulated mount, SkyX, roof and camera array for replaying a night on a virtual clock.
+
+Each backend provides functions with the same names and signatures as the ones AutoObserve
+imports from dfobserve.utils, which advance the clock by a modelled duration instead of talking
+to the hardware.
+"""
+
+import subprocess as sp
+import pandas as pd
+
+__all__ = [
+    "DEFAULT_DURATIONS",
+    "SimulatedArray",
+    "SimulatedMount",
+    "SimulatedRoof",
+    "SimulatedSkyX",
+    "completed",
+]
+
+# Modelled durations of hardware operations, in seconds.
+DEFAULT_DURATIONS = {
+    "slew": 90,
+    "mount_start": 2,
+    "mount_stop": 2,
+    "park": 90,
+    "dither": 20,
+    "guider_start": 5,
+    "guider_stop": 2,
+    "readout": 10,
+    "focus": 300,
+    "flipflat": 15,
+    "tilt": 5,
+    "cooldown": 90,
+    "webrequest": 0.5,
+}
+
+UNITS = [f"Dragonfly{i}" for i in range(301, 311)]
+
+
+def completed(args, stdout=""):
+    """
+    A CompletedProcess like the ones returned by the subprocess-based utilities.
+    """
+    return sp.CompletedProcess(args, 0, stdout=stdout.encode("utf-8"), stderr=b"")
+
+
+class SimulatedResponse:
+    """
+    Stand-in for a WebRequestSummary: every unit answered SUCCESS.
+    """
+
+    def __init__(self, command, units=UNITS):
+        self.command = command
+        self.df = pd.DataFrame(
+            {"Name": list(units), "command": command, "response_summary": "SUCCESS"}
+        )
+
+    def __repr__(self):
+        return self.df.__repr__()
+
+
+class _Backend:
+    def __init__(self, clock, durations=None):
+        self.clock = clock
+        self.durations = dict(DEFAULT_DURATIONS)
+        if durations is not None:
+            self.durations.update(durations)
+
+    def _spend(self, name, kind="overhead", label=None, seconds=None):
+        if seconds is None:
+            seconds = self.durations[name]
+        self.clock.advance(seconds, kind=kind, label=label or name)
+
+
+class SimulatedMount(_Backend):
+    """
+    Mount commands (MountUtils).
+    """
+
+    def __init__(self, clock, durations=None):
+        super().__init__(clock, durations)
+        self.pointing = None
+        self.tracking = False
+
+    def SlewMount(self, target):
+        self._spend("slew", label=f"slew to {target}")
+        self.pointing = target
+        return completed(f"mount --nmount 1 goto {target}", f"slewed to {target}")
+
+    def StartMount(self):
+        self._spend("mount_start")
+        self.tracking = True
+        return completed("mount --nmount 1 start")
+
+    def StopMount(self):
+        self._spend("mount_stop")
+        self.tracking = False
+        return completed("mount --nmount 1 stop")
+
+    def ParkMount(self):
+        self._spend("park")
+        self.pointing = "park"
+        return completed("mount --nmount 1 park")
+
+    def GuideMount(self):
+        return completed("autoguider start")
+
+    def DitherMount(self, east, north):
+        self._spend("dither", label=f"dither {east} E {north} N")
+        return f"dithered {east} E {north} N"
+
+
+class SimulatedSkyX(_Backend):
+    """
+    TheSkyX commands (SkyXUtils).
+    """
+
+    def StartAutoGuide(self):
+        self._spend("guider_start")
+        return completed("ncommand -l 'foo=new TSXAutoGuider(); foo.magic()'")
+
+    def StopAutoGuide(self):
+        self._spend("guider_stop")
+        return completed("ncommand -l 'foo=new TSXAutoGuider(); foo.stop()'")
+
+    def GetMountPointing(self, host="127.0.0.1", port=3040):
+        return {"RA": 0.0, "DEC": 0.0, "ALT": 90.0, "AZ": 0.0, "HA": 0.0}
+
+    def validate_targets(self, targets, check_skyx=True, raise_errors=False, **kwargs):
+        """
+        TargetValidation.validate_targets, with a TheSkyX that finds every target at its
+        catalog position (names are still resolved through the target catalog).
+        """
+        from dfobserve.observing.TargetValidation import validate_targets
+
+        valid_df = validate_targets(
+            targets, check_skyx=False, raise_errors=raise_errors, **kwargs
+        )
+        valid_df["InSkyX"] = True
+        valid_df["SkyX_RA"] = valid_df.RA
+        valid_df["SkyX_Dec"] = valid_df.Dec
+        valid_df["Separation"] = valid_df.Separation.where(~valid_df.Resolved, 0.0)
+        return valid_df
+
+
+class SimulatedRoof(_Backend):
+    """
+    Roof status (NMS_utils). The roof opens at `opens_at` (local datetime; None means it is
+    always open).
+    """
+
+    def __init__(self, clock, opens_at=None, durations=None):
+        super().__init__(clock, durations)
+        self.opens_at = opens_at
+
+    def isRoofOpen(self):
+        return self.opens_at is None or self.clock.now() >= self.opens_at
+
+
+class SimulatedArray(_Backend):
+    """
+    The camera/filter/flip-flat commands that go through the webservers on the pis.
+    Cameras reach any requested temperature and filters any requested tilt.
+    """
+
+    def __init__(self, clock, durations=None, units=UNITS):
+        super().__init__(clock, durations)
+        self.units = list(units)
+        self.temperature = 20.0
+        self.tilts = (0.0, 0.0)
+
+    def _response(self, command, skip=None):
+        self._spend("webrequest", label=command)
+        skip = skip or []
+        return SimulatedResponse(command, [u for u in self.units if u not in skip])
+
+    def AllScienceExposure(self, exptime, off_exptime=None, n_offs=None, name=None, **kwargs):
+        self._spend(
+            "science",
+            kind="science",
+            label=f"science {name} {exptime}s",
+            seconds=exptime + self.durations["readout"],
+        )
+        return SimulatedResponse(f"expose?type=light&time={exptime}")
+
+    def AllExpose(self, exptime, which="all", **kwargs):
+        self._spend(
+            "science",
+            kind="science",
+            label=f"expose {which} {exptime}s",
+            seconds=exptime + self.durations["readout"],
+        )
+        return SimulatedResponse(f"expose?type=light&time={exptime}")
+
+    def AllFlatFieldExposure(self, exptime, n=1, **kwargs):
+        self._spend(
+            "flat",
+            kind="calibration",
+            label=f"flat {exptime}s",
+            seconds=n * (exptime + self.durations["readout"]),
+        )
+        return SimulatedResponse(f"expose?type=flat&time={exptime}&n={n}")
+
+    def AllDarkExposure(self, exptime, **kwargs):
+        self._spend(
+            "dark",
+            kind="calibration",
+            label=f"dark {exptime}s",
+            seconds=exptime + self.durations["readout"],
+        )
+        return SimulatedResponse(f"expose?type=dark&time={exptime}")
+
+    def AutoFocus(self, **kwargs):
+        self._spend("focus", label="autofocus")
+        return SimulatedResponse("autofocus")
+
+    def AllSetCameraTemperatures(self, temperature, which="all", skip=None, **kwargs):
+        self.temperature = temperature
+        return self._response(f"device/cooler?command=set&temp={temperature}", skip)
+
+    def AllCheckCameraTemperatures(self, temperature, which="all", tol=5, **kwargs):
+        self._spend("webrequest", label="device/cooler?command=get")
+        isGood = abs(abs(temperature) - abs(self.temperature)) <= tol
+        temp_df = pd.DataFrame(
+            {
+                "Name": self.units,
+                "ExpectedTemp": temperature,
+                "CurrentTemp": self.temperature,
+                "isGood": isGood,
+            }
+        )
+        return temp_df, 0 if isGood else len(self.units)
+
+    def ConvergeCameraTemperatures(self, temperature=-20, tol=5, skip=[], **kwargs):
+        self._spend("cooldown", label=f"cool cameras to {temperature}")
+        self.temperature = temperature
+        units = [u for u in self.units if u not in skip]
+        temp_df = pd.DataFrame(
+            {
+                "Name": units,
+                "ExpectedTemp": temperature,
+                "CurrentTemp": temperature,
+                "isGood": True,
+                "ReadyAfter": self.durations["cooldown"],
+            }
+        )
+        return temp_df, 0
+
+    def AllTiltScienceFilters(self, ha_tilt, oiii_tilt, skip=None, **kwargs):
+        self._spend("tilt", label=f"tilt ha {ha_tilt} oiii {oiii_tilt}")
+        self.tilts = (ha_tilt, oiii_tilt)
+        return self._response("device/filtertilter?command=set", skip)
+
+    def AllGetFilterTilts(self, which="science", **kwargs):
+        return self._response("device/filtertilter?command=get")
+
+    def AllCheckFilterTilts(self, ha_tilt, oiii_tilt, tol=0.3, **kwargs):
+        self._spend("webrequest", label="device/filtertilter?command=get")
+        dfs = []
+        for goal, current in zip((ha_tilt, oiii_tilt), self.tilts):
+            dfs.append(
+                pd.DataFrame(
+                    {
+                        "Name": self.units,
+                        "TiltGoal": goal,
+                        "CurrentTilt": current,
+                        "isGood": abs(goal - current) <= tol,
+                    }
+                )
+            )
+        return dfs[0], dfs[1]
+
+    def ConvergeFilterTilts(self, ha_tilt, oiii_tilt, tol=0.3, skip=[], **kwargs):
+        self._spend("tilt", label=f"tilt ha {ha_tilt} oiii {oiii_tilt}")
+        self.tilts = (ha_tilt, oiii_tilt)
+        units = [u for u in self.units if u not in skip]
+        dfs = []
+        for goal in (ha_tilt, oiii_tilt):
+            dfs.append(
+                pd.DataFrame(
+                    {
+                        "Name": units,
+                        "TiltGoal": goal,
+                        "CurrentTilt": goal,
+                        "isGood": True,
+                        "Attempts": 1,
+                        "SettledAfter": self.durations["tilt"],
+                    }
+                )
+            )
+        return dfs[0], dfs[1]
+
+    def AllCloseFlipFlats(self, **kwargs):
+        self._spend("flipflat", label="close flip flats")
+        return self._response("flipflat close")
+
+    def AllOpenFlipFlats(self, **kwargs):
+        self._spend("flipflat", label="open flip flats")
+        return self._response("flipflat open")
+
+    def AllTurnOnFlipFlaps(self, **kwargs):
+        return self._response("flipflat light on")
+
+    def AllTurnOffFlipFlaps(self, **kwargs):
+        return self._response("flipflat light off")
+
+    def SendWebRequestNB(self, command, **kwargs):
+        return self._response(command, kwargs.get("skip"))
@@ -0,0 +1,327 @@
+"""
+Replay a night of AutoObserve on a virtual clock with simulated hardware.
+"""
+
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pandas as pd
+
+from dfobserve.exceptions.exceptions import EndOfNightError
+from dfobserve.utils.ClockUtils import set_clock
+from dfobserve.utils.HardwareUtils import HardwareStatus
+from dfobserve.utils.PointingUtils import PointingService
+from .VirtualClock import VirtualClock
+from .Backends import (
+    SimulatedArray,
+    SimulatedMount,
+    SimulatedRoof,
+    SimulatedSkyX,
+    completed,
+)
+
+__all__ = ["NightSimulator", "SimulationReport"]
+
+
+class SimulationReport:
+    """
+    Timeline of a simulated night, with the idle gaps and the on-sky efficiency.
+    """
+
+    def __init__(self, clock, stopped=None):
+        """
+        Parameters
+        ----------
+        clock: VirtualClock
+            the clock the night was run on.
+        stopped: str, optional
+            why the night ended early (e.g., the EndOfNightError message).
+        """
+        self.stopped = stopped
+        self.timeline = pd.DataFrame(
+            [
+                (
+                    clock.start + timedelta(seconds=start),
+                    clock.start + timedelta(seconds=start + duration),
+                    duration,
+                    kind,
+                    label,
+                )
+                for start, duration, kind, label in clock.events
+                if duration > 0
+            ],
+            columns=["start", "end", "duration", "kind", "label"],
+        )
+
+    @property
+    def idle_gaps(self):
+        """
+        Periods spent waiting (sleeps), with back-to-back waits merged.
+        """
+        gaps = []
+        for row in self.timeline.itertuples():
+            if row.kind != "wait":
+                continue
+            if len(gaps) > 0 and gaps[-1][1] == row.start:
+                gaps[-1][1] = row.end
+            else:
+                gaps.append([row.start, row.end])
+        gaps = pd.DataFrame(gaps, columns=["start", "end"])
+        gaps["duration"] = [(e - s).total_seconds() for s, e in zip(gaps.start, gaps.end)]
+        return gaps
+
+    def time_by_kind(self):
+        """
+        Total seconds spent per kind of event (science, calibration, overhead, wait).
+        """
+        return self.timeline.groupby("kind").duration.sum()
+
+    @property
+    def start(self):
+        """
+        Time the first non-waiting event started (i.e., when observing began).
+        """
+        active = self.timeline.loc[self.timeline.kind != "wait"]
+        if len(active) == 0:
+            return None
+        return active.start.iloc[0]
+
+    @property
+    def end(self):
+        if len(self.timeline) == 0:
+            return None
+        return self.timeline.end.iloc[-1]
+
+    @property
+    def efficiency(self):
+        """
+        Fraction of the time between the start of observing and the end of the run spent
+        exposing on science targets.
+        """
+        if self.start is None:
+            return 0.0
+        span = (self.end - self.start).total_seconds()
+        science = self.time_by_kind().get("science", 0.0)
+        return science / span if span > 0 else 0.0
+
+    def summary(self):
+        """
+        Dict with the main numbers of the night.
+        """
+        by_kind = self.time_by_kind()
+        return {
+            "start": self.start,
+            "end": self.end,
+            "science_hours": by_kind.get("science", 0.0) / 3600,
+            "calibration_hours": by_kind.get("calibration", 0.0) / 3600,
+            "overhead_hours": by_kind.get("overhead", 0.0) / 3600,
+            "idle_hours": self.idle_gaps.duration.sum() / 3600,
+            "efficiency": self.efficiency,
+            "stopped": self.stopped,
+        }
+
+    def __repr__(self):
+        lines = [f"{k}: {v}" for k, v in self.summary().items()]
+        return "SimulationReport(\n  " + "\n  ".join(lines) + "\n)"
+
+
+class NightSimulator:
+    """
+    Run `AutoObserve.observe` for a list of targets (or `QuickObserve.observe` for one, see
+    `run_quick`) on a virtual clock, with simulated mount, SkyX, roof and camera array, and
+    report the timeline. A whole night takes seconds.
+
+    The hardware functions are swapped in the AutoObserve module namespace for the duration of
+    `run`, and the observing scripts' clock (dfobserve.utils.ClockUtils) is set to the virtual one.
+    Target coordinates still come from the target catalog, so prewarm it (or run offline with a
+    filled catalog) beforehand.
+    """
+
+    def __init__(
+        self,
+        targetlist: list,
+        date: str,
+        start: str = "18:00:00",
+        utcoffset: float = -6,
+        roof_opens_at: str = None,
+        durations: dict = None,
+        log_dir: str = None,
+    ):
+        """
+        Parameters
+        ----------
+        targetlist: list
+            list of configured Observation objects, as for AutoObserve.
+        date: str
+            date of the night (evening), YYYY-MM-DD.
+        start: str, default: '18:00:00'
+            local time at which the script is started.
+        utcoffset: float, default: -6
+            offset between UTC and local time.
+        roof_opens_at: str, optional
+            local time 'YYYY-MM-DD HH:MM:SS' at which the roof opens. Default: always open.
+        durations: dict, optional
+            overrides of the modelled hardware durations (see Backends.DEFAULT_DURATIONS).
+        log_dir: str, optional
+            where to write the observing log and hardware status file. Default: a temporary directory.
+        """
+        self.targetlist = targetlist
+        self.date = date
+        self.clock = VirtualClock(
+            datetime.strptime(f"{date} {start}", "%Y-%m-%d %H:%M:%S"), utcoffset=utcoffset
+        )
+        if roof_opens_at is not None:
+            roof_opens_at = datetime.strptime(roof_opens_at, "%Y-%m-%d %H:%M:%S")
+        self.mount = SimulatedMount(self.clock, durations)
+        self.skyx = SimulatedSkyX(self.clock, durations)
+        self.roof = SimulatedRoof(self.clock, opens_at=roof_opens_at, durations=durations)
+        self.array = SimulatedArray(self.clock, durations)
+        self.pointing = PointingService(query=self.skyx.GetMountPointing)
+        if log_dir is None:
+            log_dir = tempfile.mkdtemp(prefix="dfobserve_sim_")
+        self.log_dir = log_dir
+        self.hardware_status = HardwareStatus(
+            status_file=os.path.join(log_dir, "HARDWARE_STATUS.csv")
+        )
+        self.hardware_status.InitializeHardwareStatus(units=self.array.units)
+        self.hardware_status.MarkUnitsUp(self.array.units)
+        self.stopped = None
+
+    def _run_command(self, command, *args, **kwargs):
+        # subprocess.run replacement for mount_pis / set_data_dir
+        return completed(command)
+
+    def replacements(self):
+        """
+        The names in the AutoObserve module namespace that are swapped for simulated ones.
+        """
+        replacements = {
+            "HardwareStatus": lambda *args, **kwargs: self.hardware_status,
+            "sp": SimpleNamespace(run=self._run_command),
+            "isRoofOpen": self.roof.isRoofOpen,
+            "StartAutoGuide": self.skyx.StartAutoGuide,
+            "StopAutoGuide": self.skyx.StopAutoGuide,
+            "get_pointing_service": lambda: self.pointing,
+            "validate_targets": self.skyx.validate_targets,
+        }
+        for name in [
+            "SlewMount",
+            "StartMount",
+            "StopMount",
+            "ParkMount",
+            "GuideMount",
+            "DitherMount",
+        ]:
+            replacements[name] = getattr(self.mount, name)
+        for name in [
+            "AllScienceExposure",
+            "AllExpose",
+            "AllFlatFieldExposure",
+            "AllDarkExposure",
+            "AutoFocus",
+            "AllSetCameraTemperatures",
+            "AllCheckCameraTemperatures",
+            "ConvergeCameraTemperatures",
+            "AllTiltScienceFilters",
+            "AllGetFilterTilts",
+            "AllCheckFilterTilts",
+            "ConvergeFilterTilts",
+            "AllCloseFlipFlats",
+            "AllOpenFlipFlats",
+            "AllTurnOnFlipFlaps",
+            "AllTurnOffFlipFlaps",
+            "SendWebRequestNB",
+        ]:
+            replacements[name] = getattr(self.array, name)
+        return replacements
+
+    @contextmanager
+    def patch(self):
+        """
+        Context manager that swaps in the virtual clock and simulated hardware.
+        """
+        module = sys.modules["dfobserve.observing.AutoObserve"]
+        saved = {}
+        for name, replacement in self.replacements().items():
+            saved[name] = getattr(module, name)
+            setattr(module, name, replacement)
+        previous_clock = set_clock(self.clock)
+        try:
+            yield
+        finally:
+            set_clock(previous_clock)
+            for name, original in saved.items():
+                setattr(module, name, original)
+
+    def run(self, guide=True, verbose=False, focus_kwargs={}):
+        """
+        Replay the night.
+
+        Parameters
+        ----------
+        guide: bool, default: True
+            passed on to AutoObserve.
+        verbose: bool, default: False
+            passed on to AutoObserve.observe.
+        focus_kwargs: dict
+            passed on to AutoObserve.observe.
+
+        Returns
+        -------
+        report: SimulationReport
+        """
+        from dfobserve.observing.AutoObserve import AutoObserve
+
+        with self.patch():
+            auto = AutoObserve(
+                self.targetlist,
+                guide=guide,
+                save_log_to=self.log_dir + os.sep,
+                data_dir_on_pis="simulation",
+            )
+            try:
+                auto.observe(verbose=verbose, focus_kwargs=focus_kwargs)
+            except EndOfNightError as e:
+                self.stopped = str(e)
+        self.report = SimulationReport(self.clock, stopped=self.stopped)
+        return self.report
+
+    def run_quick(
+        self,
+        target: str,
+        ha_tilt: float,
+        oiii_tilt: float,
+        exptime: int,
+        offband_exptime: int,
+        niter: int = 1,
+        dither_east: float = 0,
+        dither_north: float = 0,
+    ):
+        """
+        Replay a QuickObserve run (the targetlist is not used). The arguments are passed on to
+        QuickObserve and QuickObserve.observe.
+
+        Returns
+        -------
+        report: SimulationReport
+        """
+        from dfobserve.observing.AutoObserve import QuickObserve
+
+        with self.patch():
+            quick = QuickObserve(
+                target,
+                ha_tilt,
+                oiii_tilt,
+                exptime,
+                offband_exptime,
+                niter=niter,
+                save_log_to=self.log_dir + os.sep,
+                data_dir_on_pis="simulation",
+            )
+            quick.observe(dither_east=dither_east, dither_north=dither_north)
+        self.report = SimulationReport(self.clock, stopped=self.stopped)
+        return self.report
@@ -0,0 +1,250 @@
+"""
+Local stand-in for TheSkyX TCP server, for testing SkyXClient and the SkyX utilities without the
+observatory computer.
+"""
+
+import re
+import select
+import socketserver
+import threading
+import time
+
+from dfobserve.utils.SkyXUtils import BATCH_QUERY_END, BATCH_QUERY_START, BATCH_SEPARATOR
+
+__all__ = ["FakeSkyXServer"]
+
+_TARGET = re.compile(r"var Target = '((?:[^'\\]|\\.)*)';")
+_TRACKING = re.compile(r"SetTracking\((\d)")
+_JOG = re.compile(r"Jog\(([-\d.e]+), '([NSEW])'\)")
+_GUIDER = re.compile(r"foo\.(magic|stop)\(\)")
+
+
+def _sexagesimal(value, decimals=3):
+    sign = "-" if value < 0 else "+"
+    seconds = round(abs(value) * 3600, decimals)
+    d, seconds = divmod(seconds, 3600)
+    m, s = divmod(seconds, 60)
+    return sign, int(d), int(m), s
+
+
+class _SkyXServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, fake):
+        self.fake = fake
+        super().__init__(address, _SkyXRequestHandler)
+
+
+class _SkyXRequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        fake = self.server.fake
+        fake._opened(self.request)
+        try:
+            while True:
+                chunk = self.request.recv(65536)
+                if not chunk:
+                    return
+                script = chunk
+                # a script arrives in one or more chunks with no terminator; wait briefly for more
+                while select.select([self.request], [], [], 0.02)[0]:
+                    chunk = self.request.recv(65536)
+                    if not chunk:
+                        break
+                    script += chunk
+                self.request.sendall(fake.reply(script.decode("latin-1")).encode("latin-1"))
+        except OSError:
+            return
+        finally:
+            fake._closed(self.request)
+
+
+class FakeSkyXServer:
+    """
+    Answers the scripts sent by dfobserve.utils.SkyXUtils and MountClient (target lookups, mount
+    pointing, slews, tracking, park, home, dithers, the autoguider and batches of lookups) the way
+    TheSkyX does, on a localhost port. Connections are kept open until the client closes them,
+    like the real server.
+
+    `mount` holds the state of the mount: target, tracking, parked, guiding and the dithers.
+
+    Use as a context manager, or call `start()` and `stop()`.
+    """
+
+    def __init__(
+        self,
+        targets: dict = None,
+        pointing: dict = None,
+        mount_connected: bool = True,
+        slew_time: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """
+        Parameters
+        ----------
+        targets: dict or list, optional
+            names TheSkyX can find (case insensitive), optionally mapped to their (ra, dec) in
+            degrees.
+        pointing: dict, optional
+            position of the mount: ra, dec, alt, az (degrees) and ha (hours).
+        mount_connected: bool, default: True
+            whether the mount answers.
+        slew_time: float, default: 0
+            seconds a slew, park or home takes.
+        host: str, default: '127.0.0.1'
+            address to serve on.
+        port: int, default: 0
+            port to serve on (0 picks a free one).
+        """
+        if targets is None:
+            targets = {}
+        if not isinstance(targets, dict):
+            targets = {name: None for name in targets}
+        self.targets = {name.lower(): coords for name, coords in targets.items()}
+        self.pointing = {"ra": 0.0, "dec": 0.0, "alt": 90.0, "az": 0.0, "ha": 0.0}
+        if pointing is not None:
+            self.pointing.update(pointing)
+        self.mount_connected = mount_connected
+        self.slew_time = slew_time
+        self.mount = {
+            "target": None,
+            "tracking": False,
+            "parked": True,
+            "guiding": False,
+            "dithers": [],
+        }
+        self.host = host
+        self.port = port
+        self.connections = 0
+        self.requests = 0
+        self.scripts = []
+        self._sockets = set()
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self._server = _SkyXServer((self.host, self.port), self)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        self.drop_connections()
+
+    def drop_connections(self):
+        """
+        Close every open client connection (as TheSkyX does when it restarts).
+        """
+        with self._lock:
+            sockets = list(self._sockets)
+        for sock in sockets:
+            try:
+                sock.shutdown(2)
+            except OSError:
+                pass
+
+    def _opened(self, sock):
+        with self._lock:
+            self.connections += 1
+            self._sockets.add(sock)
+
+    def _closed(self, sock):
+        with self._lock:
+            self._sockets.discard(sock)
+
+    def _pointing_string(self):
+        p = self.pointing
+        _, h, m, s = _sexagesimal(p["ra"] / 15, 3)
+        sign, d, dm, ds = _sexagesimal(p["dec"], 2)
+        return (
+            f"RA: {h:02d}h {m:02d}m {s:06.3f}s  Dec: {sign}{d:02d}° {dm:02d}' {ds:05.2f}\""
+            f" Alt: {p['alt']:.4f} Az: {p['az']:.4f} HA: {p['ha']:.4f}"
+        )
+
+    def _mount_command(self, body):
+        # the `Out` of a mount or autoguider script, or None if the body is not one
+        if not self.mount_connected and "sky6RASCOMTele" in body:
+            return "Not connected"
+        target = _TARGET.search(body)
+        if "SlewToRaDec" in body and target is not None:
+            name = target.group(1).replace("\\'", "'").replace("\\\\", "\\")
+            if name.lower() not in self.targets:
+                return "NotFound"
+            time.sleep(self.slew_time)
+            self.mount.update(target=name, parked=False, tracking=True)
+            if self.targets[name.lower()] is not None:
+                self.pointing["ra"], self.pointing["dec"] = self.targets[name.lower()]
+            return f"Slewed to {name}"
+        if "SetTracking" in body:
+            self.mount["tracking"] = _TRACKING.search(body).group(1) == "1"
+            return f"Tracking {'started' if self.mount['tracking'] else 'stopped'}"
+        if "Park()" in body or "FindHome()" in body:
+            time.sleep(self.slew_time)
+            parked = "Park()" in body
+            self.mount.update(target="park" if parked else "home", parked=parked, tracking=False)
+            return "Mount parked" if parked else "Mount homed"
+        jog = _JOG.search(body)
+        if jog is not None:
+            self.mount["dithers"].append([float(jog.group(1)), jog.group(2)])
+            return f"Dithered {jog.group(1)} {jog.group(2)}"
+        guider = _GUIDER.search(body)
+        if guider is not None and "new TSXAutoGuider()" in body:
+            self.mount["guiding"] = guider.group(1) == "magic"
+            return f"Autoguider {'on' if self.mount['guiding'] else 'off'}"
+        return None
+
+    def evaluate(self, body):
+        """
+        The `Out` of one script body, or None if the script is not one the fake understands.
+        """
+        command = self._mount_command(body)
+        if command is not None:
+            return command
+        target = _TARGET.search(body)
+        if target is not None and "sky6StarChart.Find" in body:
+            name = target.group(1).replace("\\'", "'").replace("\\\\", "\\").lower()
+            if name not in self.targets:
+                return "NotFound"
+            if "sky6ObjectInformation" in body:
+                ra, dec = self.targets[name] or (0.0, 0.0)
+                return f"Found,{ra / 15:.8f},{dec:.8f}"
+            return "Found"
+        if "sky6RASCOMTele.GetRaDec" in body:
+            if not self.mount_connected:
+                return "Not connected"
+            return self._pointing_string()
+        return None
+
+    def reply(self, script):
+        """
+        TheSkyX's reply to a script.
+        """
+        with self._lock:
+            self.requests += 1
+            self.scripts.append(script)
+        if BATCH_QUERY_START in script:
+            bodies = [
+                part.split(BATCH_QUERY_END)[0] for part in script.split(BATCH_QUERY_START)[1:]
+            ]
+        else:
+            bodies = [script]
+        outputs = [self.evaluate(body) for body in bodies]
+        if any(output is None for output in outputs):
+            return "undefined|TypeError: unsupported script. Error = 1."
+        return BATCH_SEPARATOR.join(outputs) + "|No error. Error = 0."
@@ -0,0 +1,67 @@
+"""
+A clock that only moves when told to, recording what the time was spent on.
+"""
+
+from datetime import datetime, timedelta
+
+__all__ = ["VirtualClock"]
+
+UNIX_EPOCH = datetime(1970, 1, 1)
+
+
+class VirtualClock:
+    """
+    Drop-in replacement for dfobserve.utils.ClockUtils.SystemClock. `sleep` returns immediately
+    and moves the clock forward; simulated hardware moves it forward with `advance`. Every
+    advance is recorded as an event (start, duration, kind, label).
+    """
+
+    def __init__(self, start: datetime, utcoffset: float = -6):
+        """
+        Parameters
+        ----------
+        start: datetime
+            local time at which the clock starts.
+        utcoffset: float, default: -6
+            offset between UTC and local time (used for `time()`).
+        """
+        self.start = start
+        self.utcoffset = utcoffset
+        self.elapsed = 0.0
+        self.events = []
+
+    def now(self):
+        """
+        Current (virtual) local time.
+        """
+        return self.start + timedelta(seconds=self.elapsed)
+
+    def time(self):
+        """
+        Current (virtual) unix time in seconds.
+        """
+        utc = self.now() - timedelta(hours=self.utcoffset)
+        return (utc - UNIX_EPOCH).total_seconds()
+
+    def monotonic(self):
+        return self.elapsed
+
+    def advance(self, seconds, kind="overhead", label=""):
+        """
+        Move the clock forward, recording what the time was spent on.
+
+        Parameters
+        ----------
+        seconds: float
+            time to move forward.
+        kind: str, default: 'overhead'
+            category of the event, e.g. 'science', 'calibration', 'overhead' or 'wait'.
+        label: str
+            description of the event.
+        """
+        seconds = max(float(seconds), 0.0)
+        self.events.append((self.elapsed, seconds, kind, label))
+        self.elapsed += seconds
+
+    def sleep(self, seconds):
+        self.advance(seconds, kind="wait", label="sleep")
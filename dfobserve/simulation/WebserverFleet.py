@@ -0,0 +1,513 @@
+"""
+Local stand-ins for the webservers running on the pis, for load and latency testing of the
+fan-out and polling code without the instrument.
+"""
+
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import threading
+import time
+from http import HTTPStatus
+from urllib.parse import urlparse, parse_qs
+
+import pandas as pd
+
+__all__ = ["SimulatedUnit", "WebserverFleet"]
+
+# Filters of the units in the order of the real template, repeated for larger fleets.
+FILTER_CYCLE = [
+    "ha6647",
+    "ha6647",
+    "ha6647",
+    "ha_right",
+    "ha_left",
+    "oiii_right",
+    "oiii_left",
+    "OH_off",
+    "OH",
+    "oiii5071",
+]
+
+
+class SimulatedUnit:
+    """
+    State of one simulated unit (camera, cooler, filter tilter, focuser, flip flat) and the
+    handling of its api commands. Durations are in (simulated) seconds and are multiplied by
+    `time_scale` to get real seconds.
+    """
+
+    def __init__(
+        self,
+        name,
+        filter_name,
+        readout_time=5.0,
+        time_scale=1.0,
+        cooling_time=60.0,
+        tilt_time=3.0,
+        focus_time=5.0,
+        camera_test_time=4.0,
+        focuser_check_time=20.0,
+    ):
+        self.name = name
+        self.filter = filter_name
+        self.ip = None
+        self.readout_time = readout_time
+        self.time_scale = time_scale
+        self.cooling_time = cooling_time
+        self.tilt_time = tilt_time
+        self.focus_time = focus_time
+        self.camera_test_time = camera_test_time
+        self.focuser_check_time = focuser_check_time
+        # outcome of the health checks, reported once a check finishes
+        self.bias = "Acceptable"
+        self.read_noise = "Acceptable"
+        self.focuser_check_result = "success: simulated focuser check"
+        # number of cooler set points the unit ignores (a cooler that needs a second nudge)
+        self.ignore_cooler_sets = 0
+        # number of tilts that end `tilt_miss` degrees off the goal, and a tilter that never moves
+        self.tilt_misses = 0
+        self.tilt_miss = 1.0
+        self.tilt_stuck = False
+        self.lock = threading.Lock()
+        self.requests = 0
+        # state
+        self.busy = {}  # activity -> real time at which it ends
+        self.temperature = 20.0
+        self.temperature_time = time.monotonic()
+        self.set_point = 20.0
+        self.cooler_on = False
+        self.angle = 0.0  # where the tilter is heading
+        self.angle_from = 0.0
+        self.focus_position = 20000
+        self.focuser_check = None
+        self.camera_check = None
+        self._pending_check = None
+        self.flipflat = {"Cover": "open", "Light": "off", "Brightness": 0}
+        self.current_exposure = {"Type": None, "ExposureTime": 0, "Remaining": 0}
+        self.last_exposure = {"Type": None, "ExposureTime": 0}
+        self.calculation_error = False
+
+    def _start(self, activity, seconds):
+        self.busy[activity] = time.monotonic() + seconds * self.time_scale
+
+    def _active(self, activity, now):
+        return self.busy.get(activity, 0) > now
+
+    def _current_angle(self, now):
+        # the tilter moves at a constant rate from angle_from to angle over tilt_time
+        if not self._active("tilt", now):
+            return self.angle
+        remaining = (self.busy["tilt"] - now) / (self.tilt_time * self.time_scale)
+        return self.angle + (self.angle_from - self.angle) * remaining
+
+    def _tilt_to(self, goal):
+        now = time.monotonic()
+        self.angle_from = self._current_angle(now)
+        if self.tilt_stuck:
+            return
+        if self.tilt_misses > 0:
+            self.tilt_misses -= 1
+            goal += self.tilt_miss
+        self.angle = goal
+        self._start("tilt", self.tilt_time)
+
+    def _current_temperature(self, now):
+        # exponential approach to the set point (or ambient when the cooler is off)
+        goal = self.set_point if self.cooler_on else 20.0
+        dt = (now - self.temperature_time) / self.time_scale
+        tau = self.cooling_time / 3.0
+        self.temperature = goal + (self.temperature - goal) * math.exp(-dt / tau)
+        self.temperature_time = now
+        return self.temperature
+
+    def status(self):
+        """
+        The status response of the unit (same layout as the real webserver).
+        """
+        now = time.monotonic()
+        exposing = self._active("exposure", now)
+        if not exposing and self.current_exposure["Type"] is not None:
+            self.last_exposure = dict(self.current_exposure, Remaining=0)
+            self.current_exposure = {"Type": None, "ExposureTime": 0, "Remaining": 0}
+        if exposing:
+            self.current_exposure["Remaining"] = round(
+                (self.busy["exposure"] - now) / self.time_scale, 1
+            )
+        calculating = self._active("calculation", now)
+        if not calculating and self._pending_check is not None:
+            kind, result = self._pending_check
+            if kind == "focuser":
+                self.focuser_check = result
+            else:
+                self.camera_check = result
+            self._pending_check = None
+        activity = {
+            "Exposing": exposing,
+            "CalculationInProgress": calculating,
+            "FilterTilting": self._active("tilt", now),
+            "Focusing": self._active("focus", now),
+        }
+        activity["Any"] = any(activity.values())
+        return {
+            "Result": "OK",
+            "IPAddress": self.ip,
+            "Activity": activity,
+            "CameraProperties": {
+                "CurrentTemperature": round(self._current_temperature(now), 2),
+                "SetPointTemperature": self.set_point,
+                "CoolerOn": self.cooler_on,
+                "Bias": self.camera_check[0] if self.camera_check else None,
+                "ReadNoise": self.camera_check[1] if self.camera_check else None,
+            },
+            "CurrentExposure": dict(self.current_exposure),
+            "LastExposure": dict(self.last_exposure),
+            "Focus": {
+                "Position": self.focus_position,
+                "FocuserCheckResult": self.focuser_check,
+            },
+            "XtraCalculations": {
+                "CalculationErrorHasOccurred": self.calculation_error
+            },
+            "FlipFlat": dict(self.flipflat),
+            "FilterTilter": {"Angle": round(self._current_angle(now), 3)},
+        }
+
+    def handle(self, command, query):
+        """
+        Apply an api command.
+
+        Parameters
+        ----------
+        command: str
+            api path after /api/ (e.g., 'expose' or 'device/cooler').
+        query: dict
+            query parameters (single values).
+
+        Returns
+        -------
+        response: dict or None
+            status response after the command, or None if the command is not recognized.
+        """
+        with self.lock:
+            self.requests += 1
+            sub = query.get("command")
+            if command == "status":
+                pass
+            elif command == "expose":
+                exptime = float(query.get("time", 0))
+                n = int(query.get("n", 1))
+                self.current_exposure = {
+                    "Type": query.get("type", "light"),
+                    "ExposureTime": exptime,
+                    "Remaining": exptime,
+                }
+                self._start("exposure", n * (exptime + self.readout_time))
+            elif command == "device/cooler":
+                if sub == "set" and self.ignore_cooler_sets > 0:
+                    self.ignore_cooler_sets -= 1
+                elif sub == "set":
+                    self._current_temperature(time.monotonic())
+                    self.set_point = float(query.get("temp", self.set_point))
+                    self.cooler_on = True
+                elif sub == "disable":
+                    self._current_temperature(time.monotonic())
+                    self.cooler_on = False
+                elif sub != "get":
+                    return None
+            elif command == "device/filtertilter":
+                if sub == "set":
+                    self._tilt_to(float(query.get("argument", self.angle)))
+                elif sub == "move":
+                    self._tilt_to(self.angle + float(query.get("argument", 0)))
+                elif sub != "get":
+                    return None
+            elif command == "focuser":
+                if sub == "goto":
+                    self.focus_position = int(float(query.get("argument", 0)))
+                    self._start("focus", self.focus_time)
+                elif sub == "init":
+                    self._start("focus", self.focus_time)
+                elif sub != "status":
+                    return None
+            elif command == "autofocus":
+                self._start("focus", float(query.get("nsteps", 25)) * self.focus_time)
+            elif command == "calculation":
+                kind = query.get("type")
+                if kind == "check-camera":
+                    ntests = int(query.get("ntests", 10))
+                    self._start("calculation", ntests * self.camera_test_time)
+                    self.calculation_error = False
+                    self._pending_check = ("camera", (self.bias, self.read_noise))
+                elif kind == "check-focuser":
+                    self._start("calculation", self.focuser_check_time)
+                    self.focuser_check = None
+                    self._pending_check = ("focuser", self.focuser_check_result)
+                else:
+                    return None
+            elif command == "device/flipflat":
+                if sub == "open":
+                    self.flipflat["Cover"] = "open"
+                elif sub == "close":
+                    self.flipflat["Cover"] = "closed"
+                elif sub == "off":
+                    self.flipflat["Light"] = "off"
+                elif sub is not None:
+                    self.flipflat["Light"] = "on"
+                    self.flipflat["Brightness"] = sub
+            else:
+                return None
+            return self.status()
+
+
+def _http_response(code, body, keep_alive):
+    head = (
+        f"HTTP/1.1 {code} {HTTPStatus(code).phrase}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+async def _serve_unit(fleet, unit, reader, writer):
+    # one keep-alive HTTP/1.1 connection to a unit, like the real servers
+    fleet._connections.add(writer)
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                return
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in [b"\r\n", b"\n", b""]:
+                    break
+                key, _, value = line.decode("latin-1").partition(":")
+                headers[key.strip().lower()] = value.strip().lower()
+            length = int(headers.get("content-length", 0))
+            if length > 0:
+                await reader.readexactly(length)
+            parts = request_line.decode("latin-1").split()
+            if len(parts) < 3:
+                return
+            keep_alive = parts[2] == "HTTP/1.1" and headers.get("connection") != "close"
+            delay, outcome = fleet.draw()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if outcome == "drop":
+                writer.transport.abort()
+                return
+            url = urlparse(parts[1])
+            response = None
+            if outcome == "ok" and url.path.startswith("/api/"):
+                command = url.path[len("/api/") :].strip("/")
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                response = unit.handle(command, query)
+            if outcome == "error":
+                code, body = 500, b"simulated failure"
+            elif response is None:
+                code, body = 404, b"unknown command"
+            else:
+                code, body = 200, json.dumps(response).encode("utf-8")
+            writer.write(_http_response(code, body, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                return
+    except (ConnectionError, asyncio.IncompleteReadError):
+        return
+    finally:
+        fleet._connections.discard(writer)
+        writer.close()
+
+
+class WebserverFleet:
+    """
+    N simulated units, each serving the webserver api (status, expose, device/filtertilter,
+    device/cooler, focuser, autofocus, calculation, device/flipflat) on its own localhost port, with
+    configurable latency, jitter and failures. `write_template` writes a hardware template pointing
+    at them, which can be passed as `hardware_config_file` to SendWebRequestNB and the All* utilities.
+
+    All units are served from a single event loop in one background thread, so fleets of
+    1000 units start in a fraction of a second, and benchmarks measure the client rather than
+    the simulator.
+
+    Use as a context manager, or call `start()` and `stop()`.
+    """
+
+    def __init__(
+        self,
+        n_units: int = 10,
+        host: str = "127.0.0.1",
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        drop_rate: float = 0.0,
+        down_units: list = (),
+        readout_time: float = 5.0,
+        time_scale: float = 1.0,
+        seed: int = None,
+    ):
+        """
+        Parameters
+        ----------
+        n_units: int, default: 10
+            number of units (named Dragonfly301, Dragonfly302, ...).
+        host: str, default: '127.0.0.1'
+            address to serve on.
+        latency: float, default: 0
+            seconds added before every response.
+        jitter: float, default: 0
+            standard deviation (seconds) of a random extra delay (never below zero).
+        failure_rate: float, default: 0
+            fraction of requests answered with an HTTP 500.
+        drop_rate: float, default: 0
+            fraction of requests whose connection is dropped without an answer.
+        down_units: list, default: ()
+            names of units that are in the template but don't answer (connection refused).
+        readout_time: float, default: 5
+            simulated readout time of an exposure, in seconds.
+        time_scale: float, default: 1
+            real seconds per simulated second for exposures, tilts etc. (e.g. 0.01 to run a
+            600 s exposure in 6 s).
+        seed: int, optional
+            seed for the latency and failure draws.
+        """
+        self.host = host
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.drop_rate = drop_rate
+        self.down_units = set(down_units)
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self.units = [
+            SimulatedUnit(
+                f"Dragonfly{301 + i}",
+                FILTER_CYCLE[i % len(FILTER_CYCLE)],
+                readout_time=readout_time,
+                time_scale=time_scale,
+            )
+            for i in range(n_units)
+        ]
+        self._servers = []
+        self._connections = set()
+        self._loop = None
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def draw(self):
+        """
+        Draw the delay and outcome ('ok', 'error' or 'drop') of a request.
+        """
+        with self._random_lock:
+            delay = self.latency
+            if self.jitter > 0:
+                delay += abs(self._random.gauss(0, self.jitter))
+            r = self._random.random()
+        if r < self.drop_rate:
+            return delay, "drop"
+        if r < self.drop_rate + self.failure_rate:
+            return delay, "error"
+        return delay, "ok"
+
+    def start(self):
+        """
+        Start serving every unit that is not down on a free port. All units are served from one
+        event loop in one background thread, so a fleet of 1000 units costs one thread.
+        """
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        up = []
+        for unit in self.units:
+            if unit.name in self.down_units:
+                # reserve a port number that nothing listens on
+                with socket.socket() as s:
+                    s.bind((self.host, 0))
+                    port = s.getsockname()[1]
+                unit.ip = f"{self.host}:{port}"
+            else:
+                up.append(unit)
+
+        async def start_servers():
+            servers = []
+            for unit in up:
+                server = await asyncio.start_server(
+                    lambda r, w, unit=unit: _serve_unit(self, unit, r, w), self.host, 0
+                )
+                unit.ip = f"{self.host}:{server.sockets[0].getsockname()[1]}"
+                servers.append(server)
+            return servers
+
+        self._servers = asyncio.run_coroutine_threadsafe(start_servers(), self._loop).result()
+        return self
+
+    def stop(self):
+        if self._loop is None:
+            return
+
+        async def stop_servers():
+            for server in self._servers:
+                server.close()
+            for writer in list(self._connections):
+                writer.transport.abort()
+            for server in self._servers:
+                await server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(stop_servers(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+        self._thread = None
+        self._servers = []
+
+    @property
+    def ips(self):
+        return [unit.ip for unit in self.units]
+
+    def unit(self, name):
+        return next(unit for unit in self.units if unit.name == name)
+
+    def write_template(self, path):
+        """
+        Write a hardware template listing the simulated units.
+
+        Parameters
+        ----------
+        path: str
+            file to write.
+
+        Returns
+        -------
+        path: str
+        """
+        lines = [
+            f'{unit.ip}  {unit.name}  Unknown  Unknown  "22800-10.0*(x-33)"  {unit.filter}'
+            for unit in self.units
+        ]
+        with open(path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        return os.path.abspath(path)
+
+    def stats(self):
+        """
+        Number of requests handled by each unit.
+        """
+        return pd.DataFrame(
+            {
+                "Name": [unit.name for unit in self.units],
+                "ip": self.ips,
+                "requests": [unit.requests for unit in self.units],
+            }
+        )
@@ -0,0 +1,5 @@
+from .VirtualClock import *
+from .Backends import *
+from .NightSimulator import *
+from .WebserverFleet import *
+from .SkyXServer import *
@@ -0,0 +1,396 @@
+"""
+Benchmarks for the broadcast, polling, parsing and ephemeris hot paths.
+
+Run from this directory:
+
+    python benchmarks.py              # compare against benchmark_baselines.json (if written)
+    python benchmarks.py --update     # (re)write the baselines
+    python benchmarks.py webrequest_dispatch apiresponse_parse   # run a subset
+    python benchmarks.py webrequest_dispatch webrequest_polling --units 1000   # full-array scale
+
+Timings depend on the machine (and, for the ephemeris, on whether the IERS tables can be
+downloaded), so baselines are not part of the repository: write them with --update on the
+machine they are compared on. Benchmarks that talk to the simulated fleet are stored per
+number of units, so a --units 1000 run is only compared with a --units 1000 baseline.
+
+Only medians are compared (min and max are kept for information; a single slow round is
+common). A benchmark regressed if its median is more than --tolerance (default 1.5) times the
+baseline median; the script then exits with status 1.
+"""
+
+import argparse
+import inspect
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from dfobserve.observing import NightEphemeris, Observation, TargetCatalog, get_sunset
+from dfobserve.simulation import WebserverFleet
+from dfobserve.simulation.WebserverFleet import SimulatedUnit
+from dfobserve.utils.HardwareUtils import HardwareStatus
+from dfobserve.utils.NetworkUtils import get_status_df
+from dfobserve.webserver import ParseResponse, SendWebRequestNB, WrapDF
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baselines.json")
+
+# Coordinates used for the target benchmarks, so that no name resolution is needed.
+BENCHMARK_TARGET = ("NGC 5813", 225.2969, 1.7020)
+BENCHMARK_DATE = "2022-04-21"
+
+
+def measure(func, repeat=5, number=1, setup=None):
+    """
+    Time a function.
+
+    Parameters
+    ----------
+    func: callable
+        function to time (called without arguments).
+    repeat: int, default: 5
+        number of timed rounds.
+    number: int, default: 1
+        calls per round; the time per call is reported.
+    setup: callable, optional
+        called (untimed) before each round.
+
+    Returns
+    -------
+    result: dict
+        median, min and max seconds per call, and the repeat/number used.
+    """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - t0) / number)
+    return {
+        "median": float(np.median(times)),
+        "min": float(np.min(times)),
+        "max": float(np.max(times)),
+        "repeat": repeat,
+        "number": number,
+    }
+
+
+@contextmanager
+def _fleet_template(n_units, **kwargs):
+    tmpdir = tempfile.mkdtemp(prefix="dfobserve_bench_")
+    try:
+        with WebserverFleet(n_units, **kwargs) as fleet:
+            yield fleet, fleet.write_template(os.path.join(tmpdir, "template.txt"))
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+@contextmanager
+def _offline_target_catalog():
+    import importlib
+
+    target_catalog = importlib.import_module("dfobserve.observing.TargetCatalog")
+    catalog = TargetCatalog(catalog_file=None, offline=True)
+    catalog.add(*BENCHMARK_TARGET, save=False)
+    saved = target_catalog._default_catalog
+    target_catalog._default_catalog = catalog
+    try:
+        yield
+    finally:
+        target_catalog._default_catalog = saved
+
+
+def bench_webrequest_dispatch(n_units=10, repeat=5):
+    """
+    SendWebRequestNB broadcast of 'status' to N simulated units (dispatch + first responses).
+    """
+    with _fleet_template(n_units) as (fleet, template):
+        SendWebRequestNB("status", hardware_config_file=template, verbose=False)
+        return measure(
+            lambda: SendWebRequestNB(
+                "status",
+                hardware_config_file=template,
+                verbose=False,
+                wait_for_response=False,
+            ),
+            repeat=repeat,
+        )
+
+
+def bench_webrequest_polling(n_units=10, repeat=5):
+    """
+    SendWebRequestNB of a focuser move followed by polling 'status' until all units are idle.
+    """
+    with _fleet_template(n_units, time_scale=0.1) as (fleet, template):
+        return measure(
+            lambda: SendWebRequestNB(
+                "focuser?command=goto&argument=20000",
+                hardware_config_file=template,
+                verbose=False,
+            ),
+            repeat=repeat,
+        )
+
+
+def bench_exposure_completion(n_units=10, repeat=3, exptime=1, readout_time=1):
+    """
+    Time to completion of a (simulated) exposure on N units, as seen by SendWebRequestNB.
+    The floor is exptime + readout_time; the client allows up to 5 s for the readout.
+    """
+    with _fleet_template(n_units, readout_time=readout_time) as (fleet, template):
+        return measure(
+            lambda: SendWebRequestNB(
+                f"expose?type=light&time={exptime}",
+                hardware_config_file=template,
+                verbose=False,
+                request_type="exposure",
+                readout_time=5,
+                timeout_global=exptime + 5,
+            ),
+            repeat=repeat,
+        )
+
+
+def _status_payload():
+    unit = SimulatedUnit("Dragonfly301", "ha6647")
+    unit.ip = "127.0.0.1:3000"
+    return json.dumps(unit.status()).encode("utf-8")
+
+
+def bench_apiresponse_parse(repeat=5, number=1000):
+    """
+    ParseResponse of a status payload into an APIResponse, reading one field.
+    """
+    payload = _status_payload()
+    return measure(
+        lambda: ParseResponse(payload, return_type="API").Activity.Any,
+        repeat=repeat,
+        number=number,
+    )
+
+
+def bench_apiresponse_dataframes(repeat=5, number=100):
+    """
+    APIResponse construction with all field DataFrames built (construct_dataframes).
+    """
+    payload = _status_payload()
+    return measure(
+        lambda: ParseResponse(payload, return_type="API").construct_dataframes(),
+        repeat=repeat,
+        number=number,
+    )
+
+
+def bench_wrapdf(repeat=5, number=1000):
+    """
+    WrapDF of one status field, with its DataFrame and log string.
+    """
+    field = json.loads(_status_payload())["CameraProperties"]
+    return measure(lambda: WrapDF(dict(field)).logstring, repeat=repeat, number=number)
+
+
+def bench_get_status_df(n_units=10, repeat=5, number=100):
+    """
+    get_status_df of a hardware template (cached after the first read).
+    """
+    with _fleet_template(n_units) as (fleet, template):
+        get_status_df(template)
+        return measure(lambda: get_status_df(template), repeat=repeat, number=number)
+
+
+def bench_hardware_status_io(n_units=10, repeat=5, number=10):
+    """
+    HardwareStatus: fresh read of the status file, then marking units down and up.
+    """
+    tmpdir = tempfile.mkdtemp(prefix="dfobserve_bench_")
+    units = [f"Dragonfly{301 + i}" for i in range(n_units)]
+    status_file = os.path.join(tmpdir, "status.csv")
+    HardwareStatus(status_file=status_file).InitializeHardwareStatus(units=units)
+
+    def cycle():
+        status = HardwareStatus(status_file=status_file)
+        status.MarkUnitsDown(units[:2])
+        status.MarkUnitUp(units[0])
+        status.MarkUnitsUp(units)
+
+    try:
+        return measure(cycle, repeat=repeat, number=number)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def bench_sunset_cold(repeat=3):
+    """
+    Solving the sunset of a night from scratch (no memo, no disk cache).
+    """
+    return measure(
+        lambda: NightEphemeris(date=BENCHMARK_DATE, use_disk_cache=False).sunset(),
+        repeat=repeat,
+    )
+
+
+def bench_sunset_memoized(repeat=5, number=1000):
+    """
+    get_sunset once the night has been solved.
+    """
+    get_sunset(date=BENCHMARK_DATE)
+    return measure(lambda: get_sunset(date=BENCHMARK_DATE), repeat=repeat, number=number)
+
+
+def bench_calc_target_rise(repeat=3):
+    """
+    calc_target_rise for a new Observation (the night's ephemeris already solved).
+    """
+    get_sunset(date=BENCHMARK_DATE)
+    with _offline_target_catalog():
+        return measure(
+            lambda: Observation(target=BENCHMARK_TARGET[0]).calc_target_rise(
+                date=BENCHMARK_DATE
+            ),
+            repeat=repeat,
+        )
+
+
+BENCHMARKS = {
+    "webrequest_dispatch": bench_webrequest_dispatch,
+    "webrequest_polling": bench_webrequest_polling,
+    "exposure_completion": bench_exposure_completion,
+    "apiresponse_parse": bench_apiresponse_parse,
+    "apiresponse_dataframes": bench_apiresponse_dataframes,
+    "wrapdf": bench_wrapdf,
+    "get_status_df": bench_get_status_df,
+    "hardware_status_io": bench_hardware_status_io,
+    "sunset_cold": bench_sunset_cold,
+    "sunset_memoized": bench_sunset_memoized,
+    "calc_target_rise": bench_calc_target_rise,
+}
+
+
+def run_benchmarks(names=None, verbose=True, **kwargs):
+    """
+    Run benchmarks.
+
+    Parameters
+    ----------
+    names: list, optional
+        benchmarks to run (keys of BENCHMARKS). Default: all.
+    verbose: bool, default: True
+        print each result as it comes in.
+    **kwargs:
+        passed on to every benchmark that accepts them (e.g., repeat=1).
+
+    Returns
+    -------
+    results: dict
+        {name: measure() result}, with the number of units used for the fleet benchmarks.
+    """
+    if names is None:
+        names = list(BENCHMARKS.keys())
+    results = {}
+    for name in names:
+        parameters = inspect.signature(BENCHMARKS[name]).parameters
+        used = {k: v for k, v in kwargs.items() if k in parameters}
+        results[name] = BENCHMARKS[name](**used)
+        if "n_units" in parameters:
+            results[name]["n_units"] = used.get("n_units", parameters["n_units"].default)
+        if verbose:
+            print(f"{name:<24} {results[name]['median'] * 1e3:12.4f} ms")
+    return results
+
+
+def baseline_key(name, result):
+    """
+    Key of a result in the baselines: the benchmark name, plus the number of units for the
+    benchmarks that depend on it (e.g., 'webrequest_dispatch[1000 units]').
+    """
+    if "n_units" in result:
+        return f"{name}[{result['n_units']} units]"
+    return name
+
+
+def load_baseline(path=BASELINE_FILE):
+    """
+    Read stored baselines ({} if there are none).
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(results, path=BASELINE_FILE):
+    """
+    Store results as baselines, keeping the baselines of benchmarks that were not run.
+    """
+    baseline = load_baseline(path)
+    baseline.update({baseline_key(name, result): result for name, result in results.items()})
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+    return path
+
+
+def compare_to_baseline(results, baseline, tolerance=1.5):
+    """
+    Compare results to baselines.
+
+    Parameters
+    ----------
+    results: dict
+        output of run_benchmarks.
+    baseline: dict
+        output of load_baseline. Results are matched by baseline_key, so fleet benchmarks are
+        only compared with baselines for the same number of units.
+    tolerance: float, default: 1.5
+        a benchmark regressed if its median is more than `tolerance` times the baseline median.
+
+    Returns
+    -------
+    comparison: pandas.DataFrame
+        one row per benchmark (keyed as in the baselines): baseline and current median (s), ratio
+        and whether it regressed.
+        Benchmarks without a baseline have NaN baseline/ratio and never count as regressed.
+    """
+    rows = []
+    for name, result in results.items():
+        base = baseline.get(baseline_key(name, result), {}).get("median", np.nan)
+        ratio = result["median"] / base if base > 0 else np.nan
+        rows.append(
+            {
+                "benchmark": baseline_key(name, result),
+                "baseline": base,
+                "current": result["median"],
+                "ratio": ratio,
+                "regression": bool(ratio > tolerance),
+            }
+        )
+    return pd.DataFrame(rows, columns=["benchmark", "baseline", "current", "ratio", "regression"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("names", nargs="*", help="benchmarks to run (default: all)")
+    parser.add_argument("--update", action="store_true", help="store the results as baselines")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline json file")
+    parser.add_argument("--tolerance", type=float, default=1.5)
+    parser.add_argument("--units", type=int, default=10, help="number of simulated units")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.names or None, n_units=args.units)
+    if args.update:
+        print(f"Baselines written to {save_baseline(results, args.baseline)}")
+        return 0
+    comparison = compare_to_baseline(results, load_baseline(args.baseline), args.tolerance)
+    print(comparison.to_string(index=False))
+    return 1 if comparison.regression.any() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
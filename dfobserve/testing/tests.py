@@ -7,53 +7,136 @@ from dfobserve.observing import (
     get_morning_twilight,
     get_moonrise,
 )
-from dfobserve.webserver import SendWebRequestNB
-from dfobserve.utils.CameraUtils import AllScienceExposure
-from dfobserve.utils.FilterTilterUtils import AllTiltScienceFilters
+from dfobserve.observing import (
+    NightEphemeris,
+    AltitudeCurve,
+    TargetCatalog,
+    compute_visibility,
+    FastAltitudeModel,
+    ObservingPlan,
+    validate_targets,
+)
+from dfobserve.simulation import NightSimulator, WebserverFleet, FakeSkyXServer
+from dfobserve.utils.ClockUtils import get_clock, SystemClock
+from dfobserve.webserver import (
+    SendWebRequestNB,
+    SendCommand,
+    SessionPool,
+    APIResponse,
+    get_session_pool,
+    is_idempotent,
+)
+from dfobserve.utils.CameraUtils import AllScienceExposure, ConvergeCameraTemperatures
+from dfobserve.utils.FilterTilterUtils import (
+    AllTiltScienceFilters,
+    AllCheckFilterTilts,
+    ConvergeFilterTilts,
+)
 from dfobserve.exceptions import *
+from dfobserve.utils.HardwareUtils import HardwareStatus
+from dfobserve.utils.NetworkUtils import (
+    UnitIndex,
+    get_unit_index,
+    get_status_df,
+    get_hardware_template,
+)
+from dfobserve.utils.SkyXUtils import (
+    SkyXClient,
+    FIND_TARGET_SCRIPT,
+    GetMountPointing,
+    check_target_exists,
+    check_targets_exist,
+)
+from dfobserve.utils.PointingUtils import (
+    PointingService,
+    GetCachedMountPointing,
+    set_pointing_service,
+)
+from dfobserve.utils.MountClient import MountClient, set_mount_client
+from dfobserve.utils.MountUtils import (
+    SlewMount,
+    SlewMountAsync,
+    StartMount,
+    DitherMount,
+    ParkMount,
+)
+from dfobserve.utils.SkyXUtils import StartAutoGuide, StopAutoGuide
+from dfobserve.checks import (
+    AllCheckCameras,
+    AllCheckFocusers,
+    AllCheckDragonfly,
+    RunCheckGraph,
+    CalculationDone,
+    WatchUnitChecks,
+)
+import numpy as np
 import pandas as pd
+import astropy.units as u
+from astropy.coordinates import SkyCoord, EarthLocation, AltAz
 import pytest
+import importlib
+import json
+import subprocess
+import os
+from datetime import datetime
+import time
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _dfobserve_cache(tmp_path_factory):
+    """
+    Keep the ephemeris disk cache and the target catalog out of ~/.dfobserve. Session-wide, so
+    that nights memoized by one test keep a valid cache file for the next.
+    """
+    ephemeris = importlib.import_module("dfobserve.observing.Ephemeris")
+    target_catalog = importlib.import_module("dfobserve.observing.TargetCatalog")
+    cache = tmp_path_factory.mktemp("dfobserve")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(ephemeris, "EPHEMERIS_CACHE_DIR", str(cache / "ephemeris"))
+        mp.setattr(target_catalog, "TARGET_CATALOG_FILE", str(cache / "targets.csv"))
+        mp.setattr(target_catalog, "_default_catalog", None)
+        yield cache
 
 
 def test_get_sunset():
     DATE = "2022-04-21"
     ans = get_sunset(date=DATE).value.split(" ")[1]
-    expected = "19:33:02.968"
+    expected = "19:32:42.531"
     assert ans == expected
 
 
 def test_get_moonset():
     DATE = "2022-04-21"
     ans = get_moonset(date=DATE).value.split(" ")[1]
-    expected = "10:14:39.160"
+    expected = "10:17:30.593"
     assert ans == expected
 
 
 def test_get_moonrise():
     DATE = "2022-04-21"
     ans = get_moonrise(date=DATE).value.split(" ")[1]
-    expected = "02:40:08.619"
+    expected = "02:38:41.382"
     assert ans == expected
 
 
 def test_get_morning_twilight():
     DATE = "2022-04-21"
     ans = get_morning_twilight(date=DATE).value.split(" ")[1]
-    expected = "04:55:46.495"
+    expected = "04:56:01.897"
     assert ans == expected
 
 
 def test_get_morning_twilight_utc():
     DATE = "2022-04-21"
     ans = get_morning_twilight(date=DATE, return_local=False).value.split(" ")[1]
-    expected = "10:55:46.495"
+    expected = "10:56:01.897"
     assert ans == expected
 
 
 def test_get_moonrise():
     DATE = "2022-04-21"
     ans = get_moonrise(date=DATE).value.split(" ")[1]
-    expected = "02:40:08.619"
+    expected = "02:38:41.382"
     assert ans == expected
 
 
@@ -130,9 +213,10 @@ def test_good_custom_time_pre_midnight():
 def test_observation_calc_target_rise():
     DATE = "2022-04-21"
     obs = Observation(target="NGC 5813")
-    r = obs.calc_target_rise(date=DATE).value.split(" ")[1]
-    expected = "22:52:10.062"
-    assert r == expected
+    r = obs.calc_target_rise(date=DATE)
+    expected = Time("2022-04-21 22:50:18.940")
+    # solved crossing; allow for small changes in the name resolver's coordinates
+    assert abs((r - expected).to(u.s).value) < 1
 
 
 def test_webrequest_nb_all():
@@ -624,3 +708,951 @@ def test_AllTiltScienceFilters():
     oiii_command = f"device/filtertilter?command=set&argument=7.0"
     expected["command"] = [ha_command] * 3 + [oiii_command]
     pd.testing.assert_frame_equal(r, expected)
+
+
+def test_webrequest_nb_concurrent_dispatch(monkeypatch):
+    def slow_offline(command, ip, timeout_seconds=10, name=None, verbose=False):
+        time.sleep(0.5)
+        return ip, 1
+
+    monkeypatch.setattr("dfobserve.webserver.WebRequests.SendCommand", slow_offline)
+    start = time.time()
+    r = SendWebRequestNB(
+        "status",
+        which="all",
+        verbose=False,
+        hardware_config_file="test_hardware_template.txt",
+    )
+    elapsed = time.time() - start
+    assert elapsed < 2.0
+    assert list(r.df.response_summary) == ["Machine Down (URL err)"] * 10
+    assert list(r.df.ip)[0] == "192.168.50.11"
+
+
+def test_webrequest_nb_pending_poller(monkeypatch):
+    import json
+
+    start = time.time()
+    finish_after = {f"192.168.50.{i}": 0.2 * (i - 10) for i in range(11, 21)}
+    polls = {ip: 0 for ip in finish_after}
+
+    def fake_unit(command, ip, timeout_seconds=10, name=None, verbose=False):
+        if command == "status":
+            polls[ip] += 1
+        busy = time.time() - start < finish_after[ip]
+        return ip, json.dumps(
+            {"Result": "OK", "IPAddress": ip, "Activity": {"Any": busy}}
+        ).encode()
+
+    monkeypatch.setattr("dfobserve.webserver.WebRequests.SendCommand", fake_unit)
+    r = SendWebRequestNB(
+        "expose?type=light&time=1",
+        which="all",
+        verbose=False,
+        timeout_global=30,
+        hardware_config_file="test_hardware_template.txt",
+    )
+    assert list(r.df.response_summary) == ["SUCCESS"] * 10
+    assert time.time() - start < 6
+    # units that finish early stop being polled
+    assert polls["192.168.50.11"] < polls["192.168.50.20"]
+    assert r.Dragonfly301.Activity.Any == False
+
+
+def test_session_pool_keepalive():
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    client_ports = []
+    drops = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            client_ports.append(self.client_address[1])
+            if len(drops) > 0:
+                # hang up without answering, like a pi that dropped the kept-alive connection
+                drops.pop()
+                self.close_connection = True
+                return
+            body = b'{"Result": "OK"}'
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    ip = f"127.0.0.1:{server.server_address[1]}"
+    try:
+        for i in range(3):
+            assert SendCommand("status", ip=ip) == (ip, b'{"Result": "OK"}')
+        assert len(set(client_ports)) == 1
+
+        # a read is retried once on a fresh connection
+        drops.append(True)
+        assert SendCommand("status", ip=ip) == (ip, b'{"Result": "OK"}')
+        assert len(client_ports) == 5 and len(set(client_ports)) == 2
+        # a command that changes something is not sent twice
+        drops.append(True)
+        assert SendCommand("device/cooler?command=set&temp=-20", ip=ip) == (ip, 1)
+        assert len(client_ports) == 6
+        # the unit is only reported down when the retry fails too
+        drops.extend([True, True])
+        assert SendCommand("device/cooler?command=get", ip=ip) == (ip, 1)
+        assert len(client_ports) == 8
+        assert ip not in get_session_pool()._sessions
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert is_idempotent("status") and is_idempotent("device/cooler?command=get")
+    assert is_idempotent("device/focuser", params={"command": "get"})
+    assert not is_idempotent("device/cooler?command=set&temp=-20")
+
+    pool = SessionPool(max_hosts=2)
+    for host in ["10.0.0.1", "10.0.0.2", "10.0.0.3"]:
+        pool.get(host)
+    assert len(pool) == 2
+    pool.close()
+    assert len(pool) == 0
+
+
+def test_apiresponse_lazy_fields():
+    response = APIResponse(
+        {
+            "Result": "OK",
+            "IPAddress": "192.168.50.11",
+            "Activity": {"Any": False, "CalculationInProgress": False},
+            "FilterTilter": {"Angle": 5.1, "RawAngle": 5.3, "ZeropointAngle": 0.2},
+        }
+    )
+    assert response.response_fields == ["Activity", "FilterTilter"]
+    assert response.Activity.Any == False
+    assert response.FilterTilter.Angle == 5.1
+    assert response.FilterTilter.get("RawAngle") == 5.3
+    tilter = response.FilterTilter
+    assert tilter._df is None
+    assert tilter.logstring == tilter.df.to_string()
+    assert tilter.df.loc["ZeropointAngle"].values[0] == 0.2
+    assert response.FilterTilter is tilter
+    with pytest.raises(AttributeError):
+        response.Focus
+
+
+def test_unit_index_routing():
+    index = get_unit_index("test_hardware_template.txt")
+    assert index is get_unit_index("test_hardware_template.txt")
+    assert index.units("flathaving") == [
+        "Dragonfly301",
+        "Dragonfly302",
+        "Dragonfly303",
+        "Dragonfly308",
+        "Dragonfly309",
+        "Dragonfly310",
+    ]
+    assert index.name_to_ip["Dragonfly305"] == "192.168.50.15"
+    assert index.filter_units["OH"] == ("Dragonfly309",)
+    # the index is shared between callers
+    with pytest.raises(TypeError):
+        index.filter_units["OH"] = ("Dragonfly301",)
+    with pytest.raises(TypeError):
+        index.name_to_ip["Dragonfly305"] = "10.0.0.1"
+    df = index.route(
+        [("science", "a"), ("oiii", "b")], skip=["Dragonfly302", "Dragonfly999"]
+    )
+    assert list(df.Name) == ["Dragonfly301", "Dragonfly303", "Dragonfly310"]
+    assert list(df.command) == ["a", "a", "b"]
+
+    n = 500
+    big = pd.DataFrame(
+        {
+            "IP": [f"10.0.{i // 250}.{i % 250}" for i in range(n)],
+            "Name": [f"Dragonfly{1000 + i}" for i in range(n)],
+            "Filter": ["ha6647", "oiii5071", "ha_left", "OH"] * (n // 4),
+        }
+    )
+    big_index = UnitIndex(big)
+    routed = big_index.route([("halpha", "x")], skip=["Dragonfly1000"])
+    assert len(routed) == n // 4 - 1
+
+
+def test_hardware_template_cache(tmp_path):
+    import os
+
+    path = str(tmp_path / "template.txt")
+    with open("test_hardware_template.txt") as f:
+        lines = f.readlines()
+    with open(path, "w") as f:
+        f.writelines(lines)
+    template = get_hardware_template(path)
+    assert get_hardware_template(path) is template
+    assert len(template.records) == 10
+    df = get_status_df(path)
+    df.loc[0, "Name"] = "modified"
+    assert get_status_df(path).loc[0, "Name"] == "Dragonfly301"
+    template.df.loc[0, "Name"] = "modified"
+    assert template.df.loc[0, "Name"] == "Dragonfly301"
+    assert template.records[0][1] == "Dragonfly301"
+
+    with open(path, "w") as f:
+        f.writelines(lines[:3])
+    os.utime(path, ns=(0, template.signature[0] + 1))
+    assert len(get_status_df(path)) == 3
+    assert get_unit_index(path).names == ("Dragonfly301", "Dragonfly302", "Dragonfly303")
+
+
+def test_hardware_status_batched_writes(tmp_path):
+    import os
+
+    path = str(tmp_path / "status.csv")
+    hs = HardwareStatus(status_file=path)
+    other = HardwareStatus(status_file=path)
+    hs.InitializeHardwareStatus()
+    hs.MarkUnitsUp([f"Dragonfly{i}" for i in range(301, 311)])
+    hs.MarkUnitsDown(["Dragonfly302", "Dragonfly305"])
+    assert other.get_status("down", verbose=False) == ["Dragonfly302", "Dragonfly305"]
+
+    written = os.stat(path).st_mtime_ns
+    with hs.batch():
+        hs.MarkUnitDown("Dragonfly307")
+        hs.MarkUnitUp("Dragonfly302")
+        assert os.stat(path).st_mtime_ns == written
+        assert "Dragonfly307" in hs.get_status("down", verbose=False)
+    assert other.get_status("down", verbose=False) == ["Dragonfly305", "Dragonfly307"]
+
+    # changes from another process are merged on write
+    other.MarkUnitDown("Dragonfly310")
+    hs.MarkUnitDown("Dragonfly301")
+    assert hs.get_status("down", verbose=False) == [
+        "Dragonfly301",
+        "Dragonfly305",
+        "Dragonfly307",
+        "Dragonfly310",
+    ]
+    assert [f for f in os.listdir(tmp_path) if f.endswith(".tmp")] == []
+    with pytest.raises(AssertionError):
+        hs.MarkUnitsDown(["DF301"])
+    # unknown units are ignored, not added
+    hs.MarkUnitsDown(["Dragonfly399"])
+    assert "Dragonfly399" not in list(other.get_status(verbose=False).Name)
+
+    # reading a missing file doesn't create it; marking a unit does
+    missing = HardwareStatus(status_file=str(tmp_path / "missing.csv"))
+    with pytest.raises(FileNotFoundError):
+        missing.get_status(verbose=False)
+    assert not os.path.exists(missing.status_file)
+    missing.MarkUnitDown("Dragonfly303")
+    assert missing.get_status("down", verbose=False) == ["Dragonfly303"]
+    assert len(missing.get_status(verbose=False)) == 10
+
+
+def test_night_ephemeris_memoized(tmp_path, monkeypatch):
+    import dfobserve.observing.Ephemeris as ephemeris
+
+    DATE = "2022-04-21"
+    night = NightEphemeris.for_night(date=DATE)
+    assert NightEphemeris.for_night(date=DATE) is night
+    assert get_sunset(date=DATE) == night.sunset()
+
+    monkeypatch.setattr(ephemeris, "EPHEMERIS_CACHE_DIR", str(tmp_path))
+    first = NightEphemeris(date=DATE)
+    first.moonset()
+    first.morning_twilight()
+
+    def no_transform(*args, **kwargs):
+        raise AssertionError("ephemeris should come from the disk cache")
+
+    monkeypatch.setattr(ephemeris, "get_sun", no_transform)
+    monkeypatch.setattr(ephemeris, "get_moon", no_transform)
+    cached = NightEphemeris(date=DATE)
+    assert cached.sunset() == night.sunset()
+    assert cached.moonset() == night.moonset()
+    assert cached.morning_twilight(return_local=False) == night.morning_twilight(
+        return_local=False
+    )
+
+
+def test_shared_caches_stay_out_of_home(_dfobserve_cache):
+    target_catalog = importlib.import_module("dfobserve.observing.TargetCatalog")
+    assert target_catalog.get_target_catalog().catalog_file == str(_dfobserve_cache / "targets.csv")
+    assert NightEphemeris(date="2022-04-21").cache_file.startswith(str(_dfobserve_cache))
+
+
+def test_target_catalog_offline(tmp_path, monkeypatch):
+    target_catalog = importlib.import_module("dfobserve.observing.TargetCatalog")
+
+    lookups = []
+
+    def from_name(name):
+        lookups.append(name)
+        if name == "Nowhere":
+            raise ValueError("unknown")
+        return SkyCoord(ra=225.31 * u.deg, dec=1.70 * u.deg)
+
+    monkeypatch.setattr(target_catalog.SkyCoord, "from_name", from_name)
+    catalog_file = str(tmp_path / "targets.csv")
+    catalog = TargetCatalog(catalog_file=catalog_file)
+    missing = catalog.prewarm(["NGC 5813", "ngc  5813", "Nowhere"])
+    assert missing == ["Nowhere"]
+    assert sorted(lookups) == ["NGC 5813", "Nowhere"]
+    assert np.isclose(catalog.resolve("NGC 5813").ra.deg, 225.31)
+
+    # A fresh catalog reads the file and never goes to the network.
+    offline = TargetCatalog(catalog_file=catalog_file, offline=True)
+    assert np.isclose(offline.resolve("NGC 5813 ").dec.deg, 1.70)
+    assert len(lookups) == 2
+    with pytest.raises(AstropyNameError):
+        offline.resolve("NGC 7626")
+
+    monkeypatch.setattr(target_catalog, "_default_catalog", offline)
+    obs = Observation(target="NGC 5813")
+    assert obs.calc_target_altitude() in [True, False]
+
+
+def test_altitude_curve_solver():
+    # Parabola peaking at 40 deg at t0 + 6 h: crosses 30 deg at 6 h +/- sqrt(10) h.
+    t0 = Time("2022-04-21 12:00:00")
+    calls = []
+
+    def altitude(times):
+        calls.append(times.size)
+        hours = (times - t0).to(u.hr).value
+        return 40 - (hours - 6) ** 2
+
+    curve = AltitudeCurve(altitude, t0, t0 + 12 * u.hr)
+    rise, set_ = curve.intervals(30)[0]
+    assert abs((rise - t0).to(u.s).value - (6 - np.sqrt(10)) * 3600) < 0.1
+    assert abs((set_ - t0).to(u.s).value - (6 + np.sqrt(10)) * 3600) < 0.1
+    assert len(calls) <= 4
+    assert curve.first_below(30, after=rise) == set_
+    assert curve.first_above(30, after=t0 + 6 * u.hr) == t0 + 6 * u.hr
+    with pytest.raises(IndexError):
+        curve.first_above(50)
+
+
+def test_compute_visibility_batch(monkeypatch):
+    target_catalog = importlib.import_module("dfobserve.observing.TargetCatalog")
+    catalog = TargetCatalog(catalog_file=None, offline=True)
+    catalog.add("NGC 5813", 225.2969, 1.7020)
+    catalog.add("M 13", 250.4235, 36.4613)
+    catalog.add("Polaris", 37.9546, 89.2641)
+    monkeypatch.setattr(target_catalog, "_default_catalog", catalog)
+
+    DATE = "2022-04-21"
+    targets = ["NGC 5813", "M 13", "Polaris"]
+    min_altitude = [35, 35, 30]
+    batch = [Observation(target=t, min_altitude=m) for t, m in zip(targets, min_altitude)]
+    vis = compute_visibility(batch, date=DATE)
+    assert list(vis.target) == targets
+    for obs, row in zip(batch, vis.itertuples()):
+        single = Observation(target=obs.target, min_altitude=obs.min_altitude)
+        assert abs((single.calc_target_rise(date=DATE) - row.rise).to(u.s).value) < 0.2
+        assert abs((single.calc_target_set(date=DATE) - row.set).to(u.s).value) < 0.2
+        assert obs.target_uptime == row.uptime
+    # Polaris (never below 30 deg) is up from sunset to the end of the window
+    assert vis.rise[2] == get_sunset(date=DATE)
+    # start times are only set for configured observations
+    assert vis.start.isna().all()
+
+    batch[0].configure_observation(wait_until="target_rise")
+    batch[2].configure_observation(wait_until="sunset")
+    vis = compute_visibility(batch, date=DATE)
+    assert batch[0].OBS_START == vis.rise[0] and vis.start[0] == vis.rise[0]
+    assert batch[2].OBS_START == get_sunset(date=DATE)
+    assert vis.start[1] is None
+    # the plan reuses the start time instead of checking the timings again
+    monkeypatch.setattr(Observation, "check_observing_timings", None)
+    batch[0].construct_observing_plan(date=DATE)
+    assert batch[0].OBS_START == vis.rise[0]
+
+
+def test_fast_altitude_model():
+    coord = SkyCoord(ra=225.2969 * u.deg, dec=1.7020 * u.deg)
+    epoch = Time("2022-04-22 06:00:00")
+    model = FastAltitudeModel(coord, epoch=epoch)
+    times = epoch + np.linspace(-12, 12, 49) * u.hr
+    location = EarthLocation(lon=-105.5302 * u.deg, lat=32.9024 * u.deg, height=2225 * u.m)
+    expected = coord.transform_to(AltAz(obstime=times, location=location)).alt.deg
+    fast = np.array([model.altitude(t) for t in times])
+    assert np.max(np.abs(fast - expected)) < FastAltitudeModel.MAX_ERROR
+    # datetime (naive UTC) and unix seconds give the same answer
+    assert np.isclose(model.altitude(times[0].to_datetime()), fast[0])
+    assert np.isclose(model.altitude(times[0].unix), fast[0])
+
+
+def test_check_target_altitude_fast_path(monkeypatch):
+    target_catalog = importlib.import_module("dfobserve.observing.TargetCatalog")
+    catalog = TargetCatalog(catalog_file=None, offline=True)
+    catalog.add("Polaris", 37.9546, 89.2641)
+    monkeypatch.setattr(target_catalog, "_default_catalog", catalog)
+    assert Observation(target="Polaris", min_altitude=20).check_target_altitude()
+    assert not Observation(target="Polaris", min_altitude=40).check_target_altitude()
+
+
+def test_observing_plan_steps(monkeypatch):
+    target_catalog = importlib.import_module("dfobserve.observing.TargetCatalog")
+    catalog = TargetCatalog(catalog_file=None, offline=True)
+    catalog.add("NGC 5813", 225.2969, 1.7020)
+    monkeypatch.setattr(target_catalog, "_default_catalog", catalog)
+
+    obs = Observation(target="NGC 5813", exptime=600, iterations=2)
+    obs.configure_observation(wait_until="target_rise", off_band_exptime=300)
+    obs.configure_calibrations(n_darks=2, take_darks="after", n_flats=1, take_flats="before")
+    plan = obs.construct_observing_plan(date="2022-04-21")
+    assert plan is obs.observing_plan
+    assert [step.type for step in plan] == [
+        "flat",
+        "focus",
+        "science",
+        "calibration",
+        "science",
+        "calibration",
+        "dark",
+        "dark",
+    ]
+    # each science step is linked to its co-exposed calibration step
+    for row in plan.index:
+        if plan[row].type == "science":
+            calibration = plan.calibration_for(row)
+            assert calibration.type == "calibration"
+            assert (calibration.exptime, calibration.n) == (300, 2)
+    assert plan[0]["exptime"] == 10 and plan[0]["n"] == 1
+    assert plan.total_exptime == 10 + 2 * 600 + 2 * 10
+
+    copy = plan.copy()
+    copy[0].exptime = 20
+    assert plan[0].exptime == 10
+    assert ObservingPlan.from_json(plan.to_json()) == plan
+    assert list(plan.df.type) == [step.type for step in plan]
+    # the frame follows steps changed in place
+    plan[0].exptime = 30
+    assert plan.df.exptime[0] == 30
+
+
+def test_night_simulator(tmp_path, monkeypatch):
+    target_catalog = importlib.import_module("dfobserve.observing.TargetCatalog")
+    catalog = TargetCatalog(catalog_file=None, offline=True)
+    catalog.add("NGC 5813", 225.2969, 1.7020)
+    catalog.add("M 13", 250.4235, 36.4613)
+    monkeypatch.setattr(target_catalog, "_default_catalog", catalog)
+
+    targets = []
+    for name, wait_until in [("NGC 5813", "target_rise"), ("M 13", None)]:
+        obs = Observation(target=name, exptime=1800, iterations=2)
+        obs.configure_observation(wait_until=wait_until)
+        obs.configure_calibrations(n_darks=1)
+        obs.set_tilts("halpha", 10)
+        obs.set_tilts("oiii", 5)
+        targets.append(obs)
+    sim = NightSimulator(
+        targets,
+        date="2022-04-21",
+        roof_opens_at="2022-04-21 23:30:00",
+        log_dir=str(tmp_path),
+    )
+    t0 = time.time()
+    report = sim.run()
+    assert time.time() - t0 < 60
+    assert isinstance(get_clock(), SystemClock)
+
+    assert report.stopped is None
+    science = report.timeline.loc[report.timeline.kind == "science"]
+    assert len(science) == 4
+    assert science.duration.sum() == 4 * (1800 + 10)
+    # nothing starts before the roof opens, and the first wait lasts until target rise
+    assert report.start >= datetime(2022, 4, 21, 22, 50)
+    assert science.start.iloc[0] >= datetime(2022, 4, 21, 23, 30)
+    assert report.idle_gaps.duration.iloc[0] > 4 * 3600
+    assert 0.5 < report.efficiency < 1
+    assert os.path.exists(str(tmp_path / "2022-04-21_ObservingLog.log"))
+    assert not sim.pointing.running
+
+    # the pointing poller is stopped even when observing fails half-way
+    (tmp_path / "failed").mkdir()
+    sim = NightSimulator(targets[:1], date="2022-04-21", log_dir=str(tmp_path / "failed"))
+
+    def broken_slew(*args, **kwargs):
+        raise RuntimeError("mount fault")
+
+    monkeypatch.setattr(sim.mount, "SlewMount", broken_slew)
+    with pytest.raises(RuntimeError):
+        sim.run()
+    assert not sim.pointing.running
+
+
+def test_night_simulator_quick_observe(tmp_path):
+    sim = NightSimulator([], date="2022-04-21", start="22:00:00", log_dir=str(tmp_path))
+    report = sim.run_quick(
+        "NGC 5813", 1.5, -2.0, 600, 300, niter=2, dither_east=1.5, dither_north=-1
+    )
+    assert isinstance(get_clock(), SystemClock)
+    science = report.timeline.loc[report.timeline.kind == "science"]
+    assert len(science) == 2
+    assert science.duration.sum() == 2 * (600 + 10)
+    assert list(report.timeline.label).count("dither 1.5 E -1 N") == 1
+    assert sim.array.tilts == (1.5, -2.0)
+    assert sim.mount.pointing == "NGC 5813"
+    with open(tmp_path / "2022-04-21_ObservingLog_QUICK.log") as f:
+        log = f.read()
+    assert "dithered 1.5 E -1 N" in log
+    assert "slewed to NGC 5813" in log
+
+
+def test_auto_observe_validates_targets(tmp_path, monkeypatch):
+    target_catalog = importlib.import_module("dfobserve.observing.TargetCatalog")
+    auto_observe = importlib.import_module("dfobserve.observing.AutoObserve")
+    catalog = TargetCatalog(catalog_file=None, offline=True)
+    catalog.add("NGC 5813", 225.2969, 1.7020)
+    catalog.add("M 13", 250.4235, 36.4613)
+    monkeypatch.setattr(target_catalog, "_default_catalog", catalog)
+
+    targets = [Observation(target="NGC 5813"), Observation(target="M 13")]
+    sim = NightSimulator(targets, date="2022-04-21", log_dir=str(tmp_path) + os.sep)
+    with sim.patch(), FakeSkyXServer(targets=["NGC 5813"]) as skyx:
+        # the real validation, against a TheSkyX that doesn't know M 13
+        monkeypatch.setattr(
+            auto_observe,
+            "validate_targets",
+            lambda targets, **kwargs: validate_targets(targets, port=skyx.port, **kwargs),
+        )
+        auto = auto_observe.AutoObserve(targets, save_log_to=str(tmp_path) + os.sep)
+        with pytest.raises(TargetNotFoundError):
+            auto.check_targets_for_issues()
+        assert skyx.requests == 1
+    # the simulated TheSkyX knows every target, but names must still resolve
+    targets.append(Observation(target="Not A Galaxy"))
+    with pytest.raises(AstropyNameError):
+        sim.run()
+
+
+def test_webserver_fleet(tmp_path):
+    with WebserverFleet(10, down_units=["Dragonfly305"], latency=0.01, jitter=0.01, seed=1) as fleet:
+        template = fleet.write_template(str(tmp_path / "template.txt"))
+        r = SendWebRequestNB("status", hardware_config_file=template, verbose=False)
+        summary = r.df.set_index("Name").response_summary
+        assert summary["Dragonfly305"] == "Machine Down (URL err)"
+        assert (summary.drop("Dragonfly305") == "SUCCESS").all()
+
+        AllTiltScienceFilters(10, 5, hardware_config_file=template, verbose=False)
+        ha, oiii = AllCheckFilterTilts(10, 5, hardware_config_file=template)
+        assert ha.isGood.all() and oiii.isGood.all()
+        assert fleet.unit("Dragonfly301").angle == 10
+        assert fleet.stats().set_index("Name").requests["Dragonfly305"] == 0
+
+    with WebserverFleet(3, failure_rate=1.0) as fleet:
+        template = fleet.write_template(str(tmp_path / "failing.txt"))
+        r = SendWebRequestNB("status", hardware_config_file=template, verbose=False)
+        assert (r.df.response_summary != "SUCCESS").all()
+
+
+def test_benchmarks_baseline_roundtrip(tmp_path):
+    benchmarks = importlib.import_module("dfobserve.testing.benchmarks")
+    results = benchmarks.run_benchmarks(
+        ["apiresponse_parse", "wrapdf", "get_status_df", "hardware_status_io"],
+        verbose=False,
+        repeat=1,
+        number=2,
+        n_units=3,
+    )
+    assert all(r["median"] > 0 for r in results.values())
+    path = str(tmp_path / "baselines.json")
+    benchmarks.save_baseline(results, path)
+    assert len(json.load(open(path))) == len(results)
+    comparison = benchmarks.compare_to_baseline(results, benchmarks.load_baseline(path))
+    assert np.allclose(comparison.ratio, 1) and not comparison.regression.any()
+    slower = {k: dict(v, median=v["median"] * 10) for k, v in results.items()}
+    assert benchmarks.compare_to_baseline(slower, benchmarks.load_baseline(path)).regression.all()
+    # fleet benchmarks are only compared with baselines for the same number of units
+    assert "get_status_df[3 units]" in json.load(open(path))
+    bigger = dict(results["get_status_df"], n_units=100)
+    comparison = benchmarks.compare_to_baseline(
+        {"get_status_df": bigger}, benchmarks.load_baseline(path)
+    )
+    assert comparison.benchmark[0] == "get_status_df[100 units]"
+    assert np.isnan(comparison.baseline[0]) and not comparison.regression[0]
+
+
+def test_broadcast_handle(tmp_path):
+    with WebserverFleet(4, down_units=["Dragonfly304"], time_scale=0.1) as fleet:
+        fleet.unit("Dragonfly301").focus_time = 2
+        fleet.unit("Dragonfly302").focus_time = 8
+        fleet.unit("Dragonfly303").focus_time = 300
+        template = fleet.write_template(str(tmp_path / "template.txt"))
+        t0 = time.monotonic()
+        handle = SendWebRequestNB(
+            "focuser?command=goto&argument=21000",
+            hardware_config_file=template,
+            verbose=False,
+            return_handle=True,
+        )
+        assert time.monotonic() - t0 < 2 and not handle.done()
+        results = []
+        for name, summary, response in handle.as_completed(timeout=10):
+            results.append((name, summary, time.monotonic() - t0))
+            if len(results) == 3:
+                break
+        assert [r[:2] for r in results] == [
+            ("Dragonfly304", "Machine Down (URL err)"),
+            ("Dragonfly301", "SUCCESS"),
+            ("Dragonfly302", "SUCCESS"),
+        ]
+        assert results[-1][2] < 5
+        assert handle.pending == ["Dragonfly303"]
+        assert handle.wait(timeout=0.1) is False
+        assert handle.cancel() and handle.done()
+        assert handle.summary().df.set_index("Name").response_summary["Dragonfly303"] == "PENDING"
+        assert handle.futures["Dragonfly301"].result()[1].Focus.Position == 21000
+
+
+def test_checks_score_units_as_they_finish(tmp_path, monkeypatch):
+    units = [f"Dragonfly{i}" for i in range(301, 305)]
+    hs = HardwareStatus(status_file=str(tmp_path / "status.csv"))
+    hs.InitializeHardwareStatus(units=units)
+    hs.MarkUnitsUp(units)
+    for module in ["check_cameras", "check_focusers"]:
+        module = importlib.import_module(f"dfobserve.checks.{module}")
+        monkeypatch.setattr(module, "HardwareStatus", lambda: hs)
+
+    with WebserverFleet(4, down_units=["Dragonfly304"], time_scale=0.01) as fleet:
+        fleet.unit("Dragonfly302").bias = "Unacceptable"
+        fleet.unit("Dragonfly303").camera_test_time = 1000
+        template = fleet.write_template(str(tmp_path / "template.txt"))
+        t0 = time.monotonic()
+        AllCheckCameras(ntests=10, timeout=3, hardware_config_file=template)
+        # Dragonfly301 finishes after 0.4 s; only the stuck unit runs into the deadline
+        assert time.monotonic() - t0 < 5
+        assert hs.get_status(which="down", verbose=False) == units[1:]
+
+        # Dragonfly303 is still busy with its camera check and stays down
+        hs.MarkUnitsUp(units[:2])
+        fleet.unit("Dragonfly302").focuser_check_result = "fail: off by 20 steps"
+        t0 = time.monotonic()
+        # the focuser check (0.2 s) ends before the first poll, so it is never seen running
+        status = AllCheckFocusers(timeout=10, min_check_time=1, hardware_config_file=template)
+        assert time.monotonic() - t0 < 3
+        assert hs.get_status(which="down", verbose=False) == units[1:]
+        result = status.get_response_by_name("Dragonfly301").Focus.FocuserCheckResult
+        assert result.startswith("success")
+
+
+def test_calculation_done_waits_for_the_check_to_start():
+    is_done = CalculationDone(min_elapsed=0.3, busy=["CalculationInProgress", "Focusing"])
+
+    def status(ip, **activity):
+        return {"IPAddress": ip, "Activity": {"CalculationInProgress": False, **activity}}
+
+    # idle on the first poll: still the previous run's results
+    assert not is_done(status("10.0.0.1"))
+    assert not is_done(status("10.0.0.2", Focusing=True))
+    assert is_done(status("10.0.0.2"))
+    assert not is_done(status("10.0.0.1"))
+    time.sleep(0.35)
+    assert is_done(status("10.0.0.1"))
+    assert not is_done(status("10.0.0.3", CalculationInProgress=True))
+
+
+def test_watch_unit_checks_writes_status_once(tmp_path, monkeypatch):
+    units = [f"Dragonfly{i}" for i in range(301, 306)]
+    hs = HardwareStatus(status_file=str(tmp_path / "status.csv"))
+    hs.InitializeHardwareStatus(units=units)
+    hs.MarkUnitsUp(units)
+    writes = []
+    write = hs._write
+    monkeypatch.setattr(hs, "_write", lambda status: (writes.append(1), write(status)))
+
+    class Handle:
+        futures = dict.fromkeys(units[:4])
+        pending = [units[4]]
+
+        def as_completed(self):
+            yield units[0], "SUCCESS", "pass"
+            yield units[1], "SUCCESS", "fail"
+            yield units[2], "Connection refused", None
+            yield units[3], "SUCCESS", "fail"
+
+    score = lambda name, response: None if response == "pass" else f"{name} failed"
+    failed = WatchUnitChecks(Handle(), score, hs)
+    assert failed == units[1:]
+    assert len(writes) == 1
+    assert hs.get_status(which="down", verbose=False) == units[1:]
+
+    # without update only the unreachable unit is marked
+    hs.MarkUnitsUp(units)
+    writes.clear()
+    assert WatchUnitChecks(Handle(), score, hs, update=False) == units[1:]
+    assert len(writes) == 1
+    assert hs.get_status(which="down", verbose=False) == [units[2]]
+
+
+def test_check_dragonfly_runs_checks_concurrently(tmp_path, monkeypatch):
+    status_file = str(tmp_path / "status.csv")
+    check_dragonfly = importlib.import_module("dfobserve.checks.check_dragonfly")
+    monkeypatch.setattr(
+        check_dragonfly, "HardwareStatus", lambda: HardwareStatus(status_file=status_file)
+    )
+    def no_prompt(*args):
+        raise AssertionError("prompted for input")
+
+    monkeypatch.setattr("builtins.input", no_prompt)
+    with WebserverFleet(10, down_units=["Dragonfly305"], time_scale=0.05) as fleet:
+        fleet.unit("Dragonfly306").read_noise = "High"
+        template = fleet.write_template(str(tmp_path / "template.txt"))
+        status = AllCheckDragonfly(
+            skip=["mount"],
+            camera_kwargs=dict(ntests=5),
+            hardware_config_file=template,
+            reconnect=False,
+        )
+    report = status.check_report
+    assert list(report.index) == ["network", "focusers", "cameras", "filters"]
+    assert (report.status == "OK").all()
+    # the unit checks start once the network sweep is done; the camera check waits for the
+    # focuser check (one calculation per pi at a time), the filter check overlaps both
+    end = report.start + report.wall_time
+    unit_checks = report.loc[["focusers", "cameras", "filters"]]
+    assert (unit_checks.start >= end["network"]).all()
+    assert report.start["cameras"] >= end["focusers"]
+    assert report.start["filters"] < end["focusers"] and end["filters"] > report.start["focusers"]
+    down = HardwareStatus(status_file=status_file).get_status(which="down", verbose=False)
+    assert down == ["Dragonfly305", "Dragonfly306"]
+
+
+def test_run_check_graph_unsatisfiable():
+    t0 = time.monotonic()
+    report = RunCheckGraph(
+        {"a": lambda: 1, "b": lambda: 2, "c": lambda: 3},
+        dependencies={"a": ["b"], "b": ["a"], "c": []},
+    )
+    assert time.monotonic() - t0 < 5
+    assert list(report.status) == ["SKIPPED", "SKIPPED", "OK"]
+    assert report.result["c"] == 3
+    # checks that already ran count as dependencies and come first in the report
+    report = RunCheckGraph({"d": lambda: 4}, dependencies={"d": ["c"]}, finished=report)
+    assert list(report.index) == ["a", "b", "c", "d"]
+    assert report.status["d"] == "OK" and report.start["d"] >= report.start["c"]
+
+
+def test_converge_camera_temperatures(tmp_path):
+    with WebserverFleet(4, down_units=["Dragonfly304"], time_scale=0.02) as fleet:
+        fleet.unit("Dragonfly302").cooling_time = 180
+        fleet.unit("Dragonfly303").ignore_cooler_sets = 1
+        template = fleet.write_template(str(tmp_path / "template.txt"))
+        t0 = time.monotonic()
+        temps, bad = ConvergeCameraTemperatures(
+            -20,
+            tol=5,
+            timeout=10,
+            min_interval=0.1,
+            max_interval=0.5,
+            stall_time=0.5,
+            hardware_config_file=template,
+        )
+        elapsed = time.monotonic() - t0
+        requests = fleet.stats().set_index("Name").requests
+    temps = temps.set_index("Name")
+    assert bad == 1 and not temps.isGood["Dragonfly304"]
+    assert temps.isGood[["Dragonfly301", "Dragonfly302", "Dragonfly303"]].all()
+    # each camera is ready as soon as it converges, not after a fixed wait
+    assert temps.ReadyAfter["Dragonfly301"] < temps.ReadyAfter["Dragonfly302"] < elapsed
+    assert elapsed < 5
+    # only the stalled camera was sent the set point again
+    assert list(temps.Resends[["Dragonfly301", "Dragonfly302", "Dragonfly303"]]) == [0, 0, 1]
+    assert temps.Rate["Dragonfly302"] > 0
+    assert requests["Dragonfly301"] < requests["Dragonfly302"]
+
+
+def test_converge_filter_tilts(tmp_path):
+    hs = HardwareStatus(status_file=str(tmp_path / "status.csv"))
+    hs.InitializeHardwareStatus()
+    hs.MarkAllUnitsUp()
+    with WebserverFleet(10, time_scale=0.1) as fleet:
+        fleet.unit("Dragonfly302").tilt_misses = 1
+        fleet.unit("Dragonfly303").tilt_stuck = True
+        template = fleet.write_template(str(tmp_path / "template.txt"))
+        t0 = time.monotonic()
+        ha_df, oiii_df = ConvergeFilterTilts(
+            10,
+            5,
+            max_attempts=3,
+            min_interval=0.1,
+            max_interval=0.5,
+            hardware_status=hs,
+            hardware_config_file=template,
+        )
+        elapsed = time.monotonic() - t0
+        angle_301 = fleet.unit("Dragonfly301").angle
+    ha_df = ha_df.set_index("Name").loc[["Dragonfly301", "Dragonfly302", "Dragonfly303"]]
+    assert list(ha_df.isGood) == [True, True, False]
+    assert list(ha_df.Attempts) == [1, 2, 3]
+    assert oiii_df.isGood.all() and (oiii_df.oiii_tilt == 5).all()
+    assert ha_df.SettledAfter["Dragonfly301"] < ha_df.SettledAfter["Dragonfly302"]
+    assert angle_301 == 10
+    assert elapsed < 10
+    assert hs.get_status(which="down", verbose=False) == ["Dragonfly303"]
+
+
+def test_skyx_client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pointing = {"ra": 150.5, "dec": 12.25, "alt": 45.0, "az": 120.0, "ha": 1.5}
+    with FakeSkyXServer(targets=["M31", "NGC 5813"], pointing=pointing) as skyx:
+        check_target_exists("m31", port=skyx.port)
+        with pytest.raises(TargetNotFoundError):
+            check_target_exists("not a target", port=skyx.port)
+        d = GetMountPointing(port=skyx.port)
+        assert d == {
+            "ra": "10:02:00.000",
+            "dec": "12:15:00.00",
+            "altitude": "45.0000",
+            "azimuth": "120.0000",
+        }
+        # one connection for every query, and no temporary script file
+        assert skyx.connections == 1 and skyx.requests == 3
+        assert os.listdir(tmp_path) == []
+        with SkyXClient(port=skyx.port) as client:
+            names = ["M31", "foo", "NGC 5813"]
+            found = client.run_batch(
+                [FIND_TARGET_SCRIPT.format(target_name=name) for name in names]
+            )
+            assert found == ["Found", "NotFound", "Found"]
+            assert skyx.requests == 4
+            # a dropped connection is reopened
+            skyx.drop_connections()
+            assert client.run(FIND_TARGET_SCRIPT.format(target_name="M31")) == "Found"
+            with pytest.raises(UnknownCommunicationError):
+                client.run("var Out = Application.version;")
+        skyx.mount_connected = False
+        with pytest.raises(UnknownCommunicationError):
+            GetMountPointing(port=skyx.port)
+
+
+def test_pointing_service():
+    with FakeSkyXServer(pointing={"ra": 150.5, "dec": 12.25}) as skyx:
+        service = PointingService(port=skyx.port, interval=0.05, max_age=5)
+        previous = set_pointing_service(service)
+        try:
+            with service:
+                deadline = time.monotonic() + 2
+                while service.pointing is None and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                assert service.age is not None and service.age < 1
+            # the exposure utilities are served from the cache, without asking the mount
+            n = skyx.requests
+            assert GetCachedMountPointing()["ra"] == "10:02:00.000"
+            assert skyx.requests == n
+            # after a slew the next exposure waits for a fresh pointing
+            skyx.pointing["ra"] = 165.0
+            service.invalidate()
+            assert GetCachedMountPointing()["ra"] == "11:00:00.000"
+            assert skyx.requests == n + 1
+            GetCachedMountPointing(max_age=0)
+            assert skyx.requests == n + 2
+        finally:
+            set_pointing_service(previous)
+
+
+def test_validate_targets(tmp_path, monkeypatch):
+    target_catalog = importlib.import_module("dfobserve.observing.TargetCatalog")
+    lookups = []
+
+    def from_name(name):
+        lookups.append(name)
+        time.sleep(0.2)
+        if name.startswith("Nowhere"):
+            raise ValueError("unknown")
+        return SkyCoord(ra=10.6847 * u.deg, dec=41.2690 * u.deg)
+
+    monkeypatch.setattr(target_catalog.SkyCoord, "from_name", from_name)
+    catalog = TargetCatalog(catalog_file=str(tmp_path / "targets.csv"))
+    catalog.add("NGC 5813", 225.2969, 1.7020)
+    monkeypatch.setattr(target_catalog, "_default_catalog", catalog)
+    names = ["NGC 5813", "M31", "Nowhere 1", "Nowhere 2", "Andromeda", "Not In SkyX"]
+    skyx_targets = {
+        "NGC 5813": (225.2969, 1.7020),
+        "M31": (10.6847, 41.2690),
+        "Andromeda": (10.6847, 41.2690),
+        "Nowhere 1": None,
+    }
+    with FakeSkyXServer(targets=skyx_targets) as skyx:
+        t0 = time.monotonic()
+        valid = validate_targets(names, port=skyx.port).set_index("Name")
+        elapsed = time.monotonic() - t0
+        # every TheSkyX lookup in a single script
+        assert skyx.requests == 1
+        found = check_targets_exist(["m31", "Nowhere 2"], port=skyx.port)
+        assert list(found.Found) == [True, False]
+        with pytest.raises(TargetNotFoundError):
+            validate_targets(["Not In SkyX"], port=skyx.port, raise_errors=True)
+    # the catalog hit is not looked up, the misses are looked up concurrently
+    assert sorted(lookups) == ["Andromeda", "M31", "Not In SkyX", "Nowhere 1", "Nowhere 2"]
+    assert elapsed < 0.8
+    assert list(valid.isGood) == [True, True, False, False, True, False]
+    assert list(valid.Resolved) == [True, True, False, False, True, True]
+    assert list(valid.InSkyX) == [True, True, True, False, True, False]
+    assert valid.Separation["M31"] < 0.01
+    assert np.isclose(valid.SkyX_RA["NGC 5813"], 225.2969)
+
+
+def test_mount_client(tmp_path, monkeypatch):
+    library = tmp_path / "TSXAutoGuider.js"
+    library.write_text("function TSXAutoGuider() {}\n")
+    targets = {"M31": (10.6847, 41.2690), "NGC 5813": (225.2969, 1.7020)}
+    with FakeSkyXServer(targets=targets, slew_time=0.2) as skyx:
+        client = MountClient(port=skyx.port, timeout=5, guider_library=str(library))
+        previous_client = set_mount_client(client)
+        service = PointingService(query=lambda: {"ra": "0:0:0"}, max_age=60)
+        previous_service = set_pointing_service(service)
+
+        def no_process(*args, **kwargs):
+            raise AssertionError("a process was started")
+
+        # every command is a request on the open connection: no process is started
+        monkeypatch.setattr(subprocess.Popen, "_execute_child", no_process)
+        monkeypatch.setattr(os, "fork", no_process)
+        try:
+            service.refresh()
+            res = SlewMount("M31")
+            assert res.returncode == 0 and res.stdout.decode("utf-8") == "Slewed to M31\n"
+            assert service.pointing is None
+            assert skyx.pointing["ra"] == 10.6847
+            assert StartMount().returncode == 0
+            assert DitherMount(2, 3) == "Dithered 2 E\n\nDithered 3 N\n"
+            assert StartAutoGuide().stdout == b"Autoguider on\n"
+            assert skyx.mount["target"] == "M31" and skyx.mount["tracking"]
+            assert skyx.mount["guiding"]
+            assert skyx.mount["dithers"] == [[2.0, "E"], [3.0, "N"]]
+            StopAutoGuide()
+            assert not skyx.mount["guiding"]
+            # a slew in the background, while other work goes on
+            t0 = time.monotonic()
+            future = SlewMountAsync("NGC 5813")
+            assert time.monotonic() - t0 < 0.1
+            assert future.result(timeout=5).stdout == b"Slewed to NGC 5813\n"
+            ParkMount()
+            assert skyx.mount["parked"] and not skyx.mount["tracking"]
+            res = SlewMount("Not A Galaxy")
+            assert res.returncode == 1 and res.stderr
+            assert skyx.connections == 1 and skyx.requests == 9
+            with pytest.raises(ValueError):
+                client.dither("up", 1)
+        finally:
+            set_pointing_service(previous_service)
+            set_mount_client(previous_client)
+            client.close()
+    with pytest.raises(FileNotFoundError):
+        MountClient(guider_library=str(tmp_path / "missing.js")).start_autoguide()
+
+
+def test_mount_client_timeout():
+    with FakeSkyXServer(targets=["M101"], slew_time=0.5) as skyx:
+        with MountClient(port=skyx.port, timeout=5) as client:
+            assert client.start().returncode == 0
+            # a command that hangs times out (and isn't sent again); the next one reconnects
+            with pytest.raises(TimeoutError):
+                client.slew("M101", timeout=0.05)
+            assert client.start().returncode == 0
+            assert skyx.connections == 2 and skyx.requests == 3
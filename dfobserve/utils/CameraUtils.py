@@ -6,10 +6,12 @@ import warnings
 warnings.filterwarnings("ignore")
 import pandas as pd
 
+import json
 import numpy as np
 
-from dfobserve.utils.NetworkUtils import get_status_df
-from ..webserver import SendWebRequestNB
+from dfobserve.utils.ClockUtils import get_clock
+from dfobserve.utils.NetworkUtils import get_unit_index
+from ..webserver import SendWebRequestNB, SendCommandsParallel
 from .FlipFlatUtils import (
     AllCloseFlipFlats,
     AllOpenFlipFlats,
@@ -18,7 +20,7 @@ from .FlipFlatUtils import (
 )
 import time
 
-from dfobserve.utils.SkyXUtils import GetMountPointing
+from dfobserve.utils.PointingUtils import GetCachedMountPointing
 
 
 def AllScienceExposure(
@@ -49,7 +51,7 @@ def AllScienceExposure(
             offs_command += f"&{key}={extras[key]}"
             oh_command += f"&{key}={extras[key]}"
 
-    d = GetMountPointing()
+    d = GetCachedMountPointing()
     for key in d.keys():
         science_command += f"&{key}={d[key]}"
         offs_command += f"&{key}={d[key]}"
@@ -116,7 +118,7 @@ def AllExpose(
     if extras is not None:
         for key in extras.keys():
             command += f"&{key}={extras[key]}"
-    d = GetMountPointing()
+    d = GetCachedMountPointing()
     for key in d.keys():
         command += f"&{key}={d[key]}"
 
@@ -144,7 +146,7 @@ def AllFlatFieldExposure(
     Take a flatfield using all the science filters. (or some other set)
     """
     command = f"expose?type=flat&time={exptime}&n={n}"
-    d = GetMountPointing()
+    d = GetCachedMountPointing()
     for key in d.keys():
         command += f"&{key}={d[key]}"
     if extras is not None:
@@ -169,7 +171,7 @@ def AllDarkExposure(
     Take a dark exposure.
     """
     command = f"expose?type=dark&time={exptime}"
-    d = GetMountPointing()
+    d = GetCachedMountPointing()
     for key in d.keys():
         command += f"&{key}={d[key]}"
     if extras is not None:
@@ -228,8 +230,7 @@ def AllCheckCameraTemperatures(
     command = f"device/cooler?command=get"
     r = SendWebRequestNB(command=command, which=which, **kwargs)
     # confirm temps within tolerance
-    sdf = get_status_df()
-    df_units = list(sdf.Name.values)
+    df_units = list(get_unit_index(kwargs.get("hardware_config_file")).names)
     temp_df = pd.DataFrame(
         columns=["Name", "ExpectedTemp", "CurrentTemp", "absdiff", "tol", "isGood"]
     )
@@ -259,3 +260,165 @@ def AllCheckCameraTemperatures(
         print("----------")
         print(temp_df)
     return temp_df, bad
+
+
+def _cooling_rate(samples, target):
+    """
+    Rate (deg/min) at which a camera approaches `target`, from a least-squares fit to its
+    (time, temperature) samples. None with fewer than two samples.
+    """
+    if len(samples) < 2:
+        return None
+    t = np.array([s[0] for s in samples])
+    temps = np.array([s[1] for s in samples])
+    if np.ptp(t) == 0:
+        return None
+    slope = np.polyfit(t - t[0], temps, 1)[0] * 60
+    return -slope * np.sign(temps[-1] - target)
+
+
+def ConvergeCameraTemperatures(
+    temperature: float = -20,
+    tol: float = 5,
+    timeout: float = 600,
+    skip: list = [],
+    min_interval: float = 5,
+    max_interval: float = 30,
+    stall_time: float = 60,
+    min_rate: float = 0.5,
+    max_resends: int = 3,
+    hardware_config_file=None,
+    verbose: bool = True,
+):
+    """
+    Cool (or warm) the cameras to a set point and return as soon as every camera has converged.
+
+    The set point is sent once (cameras that can't be reached are given up on straight away); then
+    the cameras' CurrentTemperature is polled concurrently. A
+    camera is ready the moment it is within `tol` of the set point and is not polled again. Each
+    camera's approach rate is fitted from its recent readings and sets the time of the next poll
+    (half the shortest time any camera needs to converge). The set point is sent again only to
+    cameras that have stalled: slower than `min_rate` after `stall_time` since they were last set.
+
+    Parameters
+    ----------
+    temperature: float, default: -20
+        set point in degrees C.
+    tol: float, default: 5
+        a camera is ready once within this many degrees of the set point.
+    timeout: float, default: 600
+        give up on cameras that have not converged after this many seconds.
+    skip: list, default: []
+        units to leave out (e.g., those that are down).
+    min_interval, max_interval: float, default: 5, 30
+        shortest and longest time in seconds between two polls.
+    stall_time: float, default: 60
+        seconds after a set point was sent before a camera can be considered stalled.
+    min_rate: float, default: 0.5
+        approach rate in deg/min below which a camera that is not yet converged has stalled.
+    max_resends: int, default: 3
+        most times the set point is sent again to a single camera.
+    hardware_config_file: str, optional
+        hardware template to read the units from. Default (None) uses the standard location.
+    verbose: bool, default: True
+        print cameras as they converge or stall.
+
+    Returns
+    -------
+    temp_df: pandas.DataFrame
+        Name, ExpectedTemp, CurrentTemp, absdiff, tol and isGood as for AllCheckCameraTemperatures,
+        plus ReadyAfter (seconds, NaN if the camera did not converge), Rate (deg/min) and Resends.
+    bad: int
+        number of cameras that did not converge.
+    """
+    clock = get_clock()
+    index = get_unit_index(hardware_config_file)
+    units = index.route([("all", "device/cooler?command=get")], skip=skip)
+    names = list(units.Name)
+    ips = dict(zip(units.Name, units.ip))
+    set_command = f"device/cooler?command=set&temp={temperature}"
+
+    start = clock.monotonic()
+    samples = {name: [] for name in names}
+    last_set = {name: 0.0 for name in names}  # seconds since start
+    resends = {name: 0 for name in names}
+    current = {name: np.nan for name in names}
+    rates = {name: np.nan for name in names}
+    ready = {}
+
+    responses = SendCommandsParallel(
+        [set_command] * len(names), [ips[n] for n in names], names=names
+    )
+    # units that can't be reached are not waited for
+    pending = [name for name, (ip, content) in zip(names, responses) if content not in [0, 1, 2]]
+    if verbose and len(pending) < len(names):
+        print(f"Could not set the temperature of {[n for n in names if n not in pending]}.")
+    while len(pending) > 0:
+        responses = SendCommandsParallel(
+            ["device/cooler?command=get"] * len(pending),
+            [ips[n] for n in pending],
+            names=pending,
+        )
+        now = clock.monotonic() - start
+        for name, (ip, content) in zip(list(pending), responses):
+            if content in [0, 1, 2]:
+                continue
+            temp = json.loads(content)["CameraProperties"]["CurrentTemperature"]
+            current[name] = temp
+            samples[name].append((now, temp))
+            if abs(temp - temperature) <= tol:
+                ready[name] = now
+                pending.remove(name)
+                if verbose:
+                    print(f"{name} at {temp:.1f} C after {now:.0f} s.")
+        if len(pending) == 0 or now >= timeout:
+            break
+
+        stalled = []
+        etas = []
+        for name in pending:
+            recent = [s for s in samples[name] if s[0] >= now - stall_time]
+            rate = _cooling_rate(recent, temperature)
+            if rate is None:
+                continue
+            rates[name] = rate
+            if rate > 0:
+                etas.append(60 * (abs(current[name] - temperature) - tol) / rate)
+            if (
+                rate < min_rate
+                and now - last_set[name] >= stall_time
+                and resends[name] < max_resends
+            ):
+                stalled.append(name)
+        if len(stalled) > 0:
+            if verbose:
+                print(f"Cameras not cooling; sending the set point again to {stalled}.")
+            SendCommandsParallel(
+                [set_command] * len(stalled), [ips[n] for n in stalled], names=stalled
+            )
+            for name in stalled:
+                resends[name] += 1
+                last_set[name] = now
+                samples[name] = []
+
+        interval = min(etas) / 2 if len(etas) > 0 else min_interval
+        interval = min(max(interval, min_interval), max_interval, timeout - now)
+        clock.sleep(max(interval, 0))
+
+    temp_df = pd.DataFrame(
+        {
+            "Name": names,
+            "ExpectedTemp": temperature,
+            "CurrentTemp": [current[n] for n in names],
+            "absdiff": [abs(current[n] - temperature) for n in names],
+            "tol": tol,
+            "isGood": [n in ready for n in names],
+            "ReadyAfter": [ready.get(n, np.nan) for n in names],
+            "Rate": [rates[n] for n in names],
+            "Resends": [resends[n] for n in names],
+        }
+    )
+    bad = len(temp_df.loc[temp_df.isGood == False])
+    if verbose:
+        print(f"{len(ready)} cameras at temperature, {bad} not converged.")
+    return temp_df, bad
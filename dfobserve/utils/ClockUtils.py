@@ -0,0 +1,58 @@
+"""
+The clock used by the observing scripts. Normally the system clock; the simulator swaps in a
+virtual one so that a night can be replayed without waiting for it.
+"""
+
+import time
+from datetime import datetime
+
+__all__ = ["SystemClock", "get_clock", "set_clock"]
+
+
+class SystemClock:
+    """
+    Wall clock: local time from datetime.now() and real sleeps.
+    """
+
+    def now(self):
+        """
+        Current local time (naive datetime).
+        """
+        return datetime.now()
+
+    def time(self):
+        """
+        Current unix time in seconds.
+        """
+        return time.time()
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+_clock = SystemClock()
+
+
+def get_clock():
+    """
+    Return the clock currently in use.
+    """
+    return _clock
+
+
+def set_clock(clock=None):
+    """
+    Set the clock used by the observing scripts (None restores the system clock).
+
+    Returns
+    -------
+    previous: clock
+        the clock that was in use, so that it can be restored.
+    """
+    global _clock
+    previous = _clock
+    _clock = SystemClock() if clock is None else clock
+    return previous
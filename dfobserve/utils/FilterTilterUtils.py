@@ -4,9 +4,11 @@ Utility functions for interacting with the filter tilters via the webserver
 import warnings
 
 warnings.filterwarnings("ignore")
+import json
 import numpy as np
-from dfobserve.utils.NetworkUtils import get_status_df
-from dfobserve.webserver import SendWebRequestNB
+from dfobserve.utils.ClockUtils import get_clock
+from dfobserve.utils.NetworkUtils import get_unit_index
+from dfobserve.webserver import SendWebRequestNB, SendCommandsParallel
 import pandas as pd
 from dfobserve.webserver import WrapDF
 
@@ -94,9 +96,9 @@ def AllGetFilterTilts(which="science", debug=False, **kwargs):
     # This is a summary object. Let's make a new WrapDF with just the params for FilterTilter
     cols = ["Name", "Filter", "Angle", "RawAngle", "ZeropointAngle"]
     df = pd.DataFrame(columns=cols)
-    sdf = get_status_df()
-    halpha = list(sdf.loc[sdf.Filter == "ha6647", "Name"])
-    oiii = list(sdf.loc[sdf.Filter == "oiii5071", "Name"])
+    index = get_unit_index(kwargs.get("hardware_config_file"))
+    halpha = index.units("halpha")
+    oiii = index.units("oiii")
     units = halpha + oiii
     unit_type = ["halpha6647"] * len(halpha) + ["oiii5071"] * len(oiii)
     for i, filt in zip(units, unit_type):
@@ -140,9 +142,9 @@ def AllCheckFilterTilts(
     res = SendWebRequestNB(
         ha_command=command, oiii_command=command, verbose=False, **kwargs
     )  # Summary obj
-    sdf = get_status_df()
-    halpha = sdf.loc[sdf.Filter == "ha6647", "Name"].values
-    oiii = sdf.loc[sdf.Filter == "oiii5071", "Name"].values
+    index = get_unit_index(kwargs.get("hardware_config_file"))
+    halpha = index.units("halpha")
+    oiii = index.units("oiii")
     if "skip" in kwargs.keys():
         halpha = [i for i in halpha if i not in kwargs["skip"]]
         oiii = [i for i in oiii if i not in kwargs["skip"]]
@@ -206,5 +208,170 @@ def AllCheckFilterTilts(
     return ha_df, oiii_df
 
 
+def ConvergeFilterTilts(
+    ha_tilt: float,
+    oiii_tilt: float,
+    tol: float = 0.3,
+    timeout: float = 60,
+    max_attempts: int = 4,
+    settle_polls: int = 2,
+    settle_eps: float = 0.01,
+    min_interval: float = 0.5,
+    max_interval: float = 5,
+    skip: list = [],
+    hardware_status=None,
+    hardware_config_file=None,
+    verbose: bool = False,
+):
+    """
+    Tilt the science filters and return as soon as every unit is either in tolerance or given up on.
+
+    Every unit runs its own set -> settle -> verify loop. The units that are still moving are
+    polled together. A unit has settled once its angle has stopped changing (by more than
+    `settle_eps`) for `settle_polls` polls in a row. A settled unit is then verified against its
+    tilt goal: a unit in tolerance is done and is not touched again, and a unit out of tolerance
+    is sent its tilt again (that unit only), up to `max_attempts` tilts in total. The poll interval
+    starts at `min_interval` and backs off towards `max_interval` while nothing moves.
+
+    Parameters
+    ----------
+    ha_tilt: float
+        tilt goal for the H-alpha filters.
+    oiii_tilt: float
+        tilt goal for the OIII filters.
+    tol: float, default: 0.3
+        tolerance between the reported and goal tilt.
+    timeout: float, default: 60
+        give up on units that have not converged after this many seconds.
+    max_attempts: int, default: 4
+        most tilt commands sent to a single unit.
+    settle_polls: int, default: 2
+        number of consecutive unchanged readings after which a unit has settled.
+    settle_eps: float, default: 0.01
+        change in angle (degrees) below which a reading counts as unchanged.
+    min_interval, max_interval: float, default: 0.5, 5
+        shortest and longest time in seconds between two polls.
+    skip: list, default: []
+        units to leave out (e.g., those that are down).
+    hardware_status: HardwareStatus, optional
+        if given, the units that fail are marked DOWN in it, with a single bulk update.
+    hardware_config_file: str, optional
+        hardware template to read the units from. Default (None) uses the standard location.
+    verbose: bool, default: False
+        print units as they converge, are retried or fail.
+
+    Returns
+    -------
+    ha_df, oiii_df: pandas.DataFrame
+        results per unit as for AllCheckFilterTilts, plus Attempts and SettledAfter (seconds
+        until the unit was verified in tolerance; NaN if it failed).
+    """
+    clock = get_clock()
+    index = get_unit_index(hardware_config_file)
+    units = index.route(
+        [
+            ("halpha", f"device/filtertilter?command=set&argument={ha_tilt}"),
+            ("oiii", f"device/filtertilter?command=set&argument={oiii_tilt}"),
+        ],
+        skip=skip,
+    )
+    names = list(units.Name)
+    ips = dict(zip(units.Name, units.ip))
+    set_commands = dict(zip(units.Name, units.command))
+    halpha = [name for name in index.units("halpha") if name in ips]
+    goals = {name: ha_tilt if name in halpha else oiii_tilt for name in names}
+
+    start = clock.monotonic()
+    angles = {name: np.nan for name in names}
+    attempts = {name: 0 for name in names}
+    unchanged = {name: 0 for name in names}
+    settled_after = {}
+    failed = []
+
+    def send_tilt(group):
+        responses = SendCommandsParallel(
+            [set_commands[n] for n in group], [ips[n] for n in group], names=group
+        )
+        for name, (ip, content) in zip(group, responses):
+            attempts[name] += 1
+            unchanged[name] = 0
+            if content in [0, 1, 2]:
+                failed.append(name)
+                if verbose:
+                    print(f"{name} could not be reached.")
+        return [name for name in group if name not in failed]
+
+    pending = send_tilt(names)
+    interval = min_interval
+    while len(pending) > 0:
+        clock.sleep(interval)
+        responses = SendCommandsParallel(
+            ["device/filtertilter?command=get"] * len(pending),
+            [ips[n] for n in pending],
+            names=pending,
+        )
+        now = clock.monotonic() - start
+        moved = False
+        retry = []
+        for name, (ip, content) in zip(list(pending), responses):
+            if content in [0, 1, 2]:
+                continue
+            response = json.loads(content)
+            angle = float(response["FilterTilter"]["Angle"])
+            tilting = response.get("Activity", {}).get("FilterTilting", False)
+            if not tilting and abs(angle - angles[name]) <= settle_eps:
+                unchanged[name] += 1
+            else:
+                unchanged[name] = 0
+                moved = True
+            angles[name] = angle
+            if unchanged[name] < settle_polls:
+                continue
+            if abs(angle - goals[name]) <= tol:
+                settled_after[name] = now
+                pending.remove(name)
+                if verbose:
+                    print(f"{name} at {angle} (goal {goals[name]}) after {now:.1f} s.")
+            elif attempts[name] < max_attempts:
+                retry.append(name)
+            else:
+                pending.remove(name)
+                failed.append(name)
+                if verbose:
+                    print(f"{name} stuck at {angle} (goal {goals[name]}); giving up.")
+        if len(retry) > 0:
+            if verbose:
+                print(f"Tilting {retry} again.")
+            kept = send_tilt(retry)
+            pending = [name for name in pending if name not in retry or name in kept]
+            moved = True
+        if now >= timeout:
+            failed += pending
+            pending = []
+        interval = min_interval if moved else min(interval * 1.5, max_interval)
+        interval = min(interval, max(timeout - now, 0))
+
+    if hardware_status is not None and len(failed) > 0:
+        hardware_status.MarkUnitsDown(failed)
+
+    dfs = []
+    for prefix, group in [("ha", halpha), ("oiii", [n for n in names if n not in halpha])]:
+        dfs.append(
+            pd.DataFrame(
+                {
+                    "Name": group,
+                    f"{prefix}_tiltgoal": [goals[n] for n in group],
+                    f"{prefix}_tilt": [angles[n] for n in group],
+                    f"{prefix}_diff": [abs(angles[n] - goals[n]) for n in group],
+                    "tol": tol,
+                    "isGood": [n in settled_after for n in group],
+                    "Attempts": [attempts[n] for n in group],
+                    "SettledAfter": [settled_after.get(n, np.nan) for n in group],
+                }
+            )
+        )
+    return dfs[0], dfs[1]
+
+
 def AllSetTiltsToZero():
     pass
@@ -4,7 +4,7 @@ Utility functions for interacting with the cameras.
 import warnings
 
 from dfobserve.webserver.WebRequests import SendWebRequestNB
-from dfobserve.utils.NetworkUtils import get_status_df
+from dfobserve.utils.NetworkUtils import get_unit_index
 
 warnings.filterwarnings("ignore")
 import pandas as pd
@@ -31,8 +31,7 @@ def SetFocus(focus_val, which="all", verbose=False, **kwargs):
     command = f"focuser?command=goto&argument={focus_val}"
     if isinstance(which, list):
         use_list = which
-        sdf = get_status_df()
-        names = list(sdf.Name.values)
+        names = get_unit_index(kwargs.get("hardware_config_file")).names
         skip = [i for i in names if i not in use_list]
         r = SendWebRequestNB(
             command=command, which="all", skip=skip, verbose=verbose, **kwargs
@@ -1,87 +1,255 @@
 import pandas as pd
 import fire
 import os
+import tempfile
+import threading
+from contextlib import contextmanager
 from dfobserve.webserver import SendWebRequestNB
 
+try:
+    import fcntl
+except ImportError:  # no advisory file locks on Windows
+    fcntl = None
+
 
 class HardwareStatus:
     def __init__(
         self,
         status_file="/home/dragonfly/git/Dragonfly-Configuration/DRAGONFLY_HARDWARE_CURRENT_STATUS.csv",
+        autoflush=True,
     ):
+        """
+        Up/Down status of each unit, kept in memory and backed by a csv file.
+
+        Changes are written back with an atomic replace of the file, under a file lock so that
+        other processes (checks, observing scripts) always read a complete file. The file is only
+        re-read when it has changed on disk.
+
+        Parameters
+        ----------
+        status_file: str
+            location of the status csv file.
+        autoflush: bool, default: True
+            write each change (or bulk change) to disk straight away. If False, changes are only
+            written by `flush()` or at the end of a `batch()` block.
+        """
         self.status_file = status_file
+        self.lock_file = status_file + ".lock"
+        self.autoflush = autoflush
+        self._status = {}
+        self._changes = {}
+        self._signature = None
+        self._batch_depth = 0
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def _file_lock(self, exclusive):
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_file, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _file_signature(self):
+        try:
+            st = os.stat(self.status_file)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_ino, st.st_size)
+
+    def _read(self):
+        status = pd.read_csv(self.status_file, header=0)
+        return dict(zip(status.Name, status.Status))
+
+    def _write(self, status):
+        directory = os.path.dirname(os.path.abspath(self.status_file))
+        fd, tmp = tempfile.mkstemp(
+            dir=directory, prefix=f".{os.path.basename(self.status_file)}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w") as f:
+                pd.DataFrame(
+                    {"Name": list(status.keys()), "Status": list(status.values())}
+                ).to_csv(f, index=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.status_file)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self._signature = self._file_signature()
+
+    def _refresh(self, initialize=False):
+        # Reload from disk if another process changed the file, keeping our unwritten changes.
+        # A missing file is only created (all UNDETERMINED) when about to mark units.
+        signature = self._file_signature()
+        if signature is None:
+            if not initialize:
+                raise FileNotFoundError(
+                    f"{self.status_file} does not exist. Run InitializeHardwareStatus first."
+                )
+            changes = self._changes
+            self.InitializeHardwareStatus()
+            changes = {unit: value for unit, value in changes.items() if unit in self._status}
+            self._status.update(changes)
+            self._changes = changes
+        elif signature != self._signature:
+            with self._file_lock(exclusive=False):
+                self._status = self._read()
+                self._signature = self._file_signature()
+            self._status.update(self._changes)
+
+    def InitializeHardwareStatus(self, units=None):
+        """
+        Write a fresh status file with every unit UNDETERMINED.
 
-    def InitializeHardwareStatus(self):
-        df = pd.DataFrame(columns=["Name", "Status"])
-        df["Name"] = [f"Dragonfly{i}" for i in range(301, 311)]
-        df["Status"] = "UNDETERMINED"
-        df.to_csv(self.status_file, index=False)
+        Parameters
+        ----------
+        units: list, optional
+            names of the units. Default is Dragonfly301 to Dragonfly310.
+        """
+        if units is None:
+            units = [f"Dragonfly{i}" for i in range(301, 311)]
+        with self._lock:
+            with self._file_lock(exclusive=True):
+                self._status = {unit: "UNDETERMINED" for unit in units}
+                self._changes = {}
+                self._write(self._status)
         return
 
-    def MarkUnitDown(self, unit):
+    @staticmethod
+    def _check_unit(unit):
         if not isinstance(unit, str):
             raise AssertionError("Input must be String")
         elif not unit.startswith("Dragonfly"):
             raise AssertionError("Input must be in form DragonflyXXX")
-        if not os.path.exists(self.status_file):
-            self.InitializeHardwareStatus()
-        status = pd.read_csv(self.status_file, header=0)
-        status.loc[status.Name == unit, "Status"] = "DOWN"
-        status.to_csv(self.status_file, index=False)
+
+    @contextmanager
+    def batch(self):
+        """
+        Context manager that holds back writes until the end of the block, so that a series of
+        marks (e.g., from a check run) results in a single write of the status file.
+        """
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self.flush()
+
+    def flush(self):
+        """
+        Write pending changes to the status file. The file is re-read under the lock first, so
+        changes made meanwhile by other processes to other units are kept.
+        """
+        with self._lock:
+            if len(self._changes) == 0:
+                return
+            with self._file_lock(exclusive=True):
+                if self._file_signature() is not None:
+                    status = self._read()
+                else:
+                    status = dict(self._status)
+                status.update(self._changes)
+                self._write(status)
+                self._status = status
+                self._changes = {}
+
+    def _mark(self, units, value):
+        for unit in units:
+            self._check_unit(unit)
+        with self._lock:
+            self._refresh(initialize=True)
+            for unit in units:
+                if unit not in self._status:
+                    # units missing from the status file are ignored
+                    continue
+                self._status[unit] = value
+                self._changes[unit] = value
+            if self.autoflush and self._batch_depth == 0:
+                self.flush()
+
+    def MarkUnitsDown(self, units):
+        """
+        Mark several units DOWN with a single write.
+
+        Parameters
+        ----------
+        units: list
+            names of the units, in the form DragonflyXXX
+        """
+        self._mark(list(units), "DOWN")
+        return
+
+    def MarkUnitsUp(self, units):
+        """
+        Mark several units UP with a single write.
+
+        Parameters
+        ----------
+        units: list
+            names of the units, in the form DragonflyXXX
+        """
+        self._mark(list(units), "UP")
+        return
+
+    def MarkUnitDown(self, unit):
+        self.MarkUnitsDown([unit])
         return
 
     def MarkUnitUp(self, unit):
-        if not isinstance(unit, str):
-            raise AssertionError("Input must be String")
-        elif not unit.startswith("Dragonfly"):
-            raise AssertionError("Input must be in form DragonflyXXX")
-        if not os.path.exists(self.status_file):
-            self.InitializeHardwareStatus()
-        status = pd.read_csv(self.status_file, header=0)
-        status.loc[status.Name == unit, "Status"] = "UP"
-        status.to_csv(self.status_file, index=False)
+        self.MarkUnitsUp([unit])
         return
 
-    def MarkAccessibleUnitsUp(self):
-        res = SendWebRequestNB("status", verbose=False)
+    def MarkAccessibleUnitsUp(self, **kwargs):
+        res = SendWebRequestNB("status", verbose=False, **kwargs)
         units_up = list(res.df.loc[res.df.response_summary == "SUCCESS", "Name"])
+        units_down = list(res.df.loc[res.df.response_summary != "SUCCESS", "Name"])
         print(
             "The Following Units were accessible via the web server and will be marked UP."
         )
         for i in units_up:
             print(i)
-            self.MarkUnitUp(i)
-        units_down = list(res.df.loc[res.df.response_summary != "SUCCESS", "Name"])
         print(
             "The Following Units were NOT accessible via the web server and will be marked DOWN."
         )
         for i in units_down:
             print(i)
-            self.MarkUnitDown(i)
         if len(units_down) == 0:
             print("NONE. ALL UNITS ARE ACCESSIBLE.")
+        with self.batch():
+            self.MarkUnitsUp(units_up)
+            self.MarkUnitsDown(units_down)
         return
 
     def MarkAllUnitsUp(
         self,
     ):
-        if not os.path.exists(self.status_file):
-            self.InitializeHardwareStatus()
-        status = pd.read_csv(self.status_file, header=0)
-        status["Status"] = "UP"
-        status.to_csv(self.status_file, index=False)
+        with self._lock:
+            self._refresh(initialize=True)
+            self._mark(list(self._status.keys()), "UP")
 
     def MarkAllUnitsDown(
         self,
     ):
-        if not os.path.exists(self.status_file):
-            self.InitializeHardwareStatus()
-        status = pd.read_csv(self.status_file, header=0)
-        status["Status"] = "Down"
-        status.to_csv(self.status_file, index=False)
+        with self._lock:
+            self._refresh(initialize=True)
+            self._mark(list(self._status.keys()), "DOWN")
 
     def get_status(self, which="all", verbose=True, return_units=True):
-        status = pd.read_csv(self.status_file, header=0)
+        with self._lock:
+            self._refresh()
+            status = pd.DataFrame(
+                {"Name": list(self._status.keys()), "Status": list(self._status.values())}
+            )
         up = status.loc[status.Status == "UP"]
         up = up.reset_index(drop=True)
         if len(up) == 0:
@@ -0,0 +1,268 @@
+"""
+Mount and autoguider control through TheSkyX TCP server, so that slews, dithers and guider
+toggles are single requests on an open connection instead of new processes.
+"""
+
+import os
+import re
+import subprocess as sp
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .SkyXUtils import SKYX_PORT, SkyXClient, _js_string
+
+__all__ = ["MountClient", "get_mount_client", "set_mount_client"]
+
+# JS library defining TSXAutoGuider (what `ncommand -l` loaded), sent ahead of the guider scripts.
+GUIDER_LIBRARY = os.path.expanduser("~/.dfobserve/TSXAutoGuider.js")
+
+# Script bodies (see SkyXClient). Each one leaves its answer in `Out`.
+SLEW_SCRIPT = """
+var Target = '{target}';
+var Out = "";
+sky6RASCOMTele.Connect();
+sky6StarChart.LASTCOMERROR = 0;
+sky6StarChart.Find(Target);
+if (sky6StarChart.LASTCOMERROR != 0)
+{{
+    Out = "NotFound";
+}}
+else
+{{
+    sky6ObjectInformation.Property(54);
+    var dRA = sky6ObjectInformation.ObjInfoPropOut;
+    sky6ObjectInformation.Property(55);
+    var dDec = sky6ObjectInformation.ObjInfoPropOut;
+    sky6RASCOMTele.Asynchronous = 0;
+    sky6RASCOMTele.SlewToRaDec(dRA, dDec, Target);
+    Out = "Slewed to " + Target;
+}}
+"""
+
+TRACKING_SCRIPT = """
+var Out = "";
+sky6RASCOMTele.Connect();
+sky6RASCOMTele.SetTracking({on}, 1, 0, 0);
+Out = "Tracking {state}";
+"""
+
+PARK_SCRIPT = """
+var Out = "";
+sky6RASCOMTele.Connect();
+sky6RASCOMTele.Asynchronous = 0;
+sky6RASCOMTele.Park();
+Out = "Mount parked";
+"""
+
+HOME_SCRIPT = """
+var Out = "";
+sky6RASCOMTele.Connect();
+sky6RASCOMTele.Asynchronous = 0;
+sky6RASCOMTele.FindHome();
+Out = "Mount homed";
+"""
+
+DITHER_SCRIPT = """
+var Out = "";
+sky6RASCOMTele.Connect();
+sky6RASCOMTele.Asynchronous = 0;
+sky6RASCOMTele.Jog({amount}, '{direction}');
+Out = "Dithered {amount} {direction}";
+"""
+
+GUIDER_SCRIPT = """
+{library}
+var Out = "";
+var foo = new TSXAutoGuider();
+foo.{method}();
+Out = "Autoguider {state}";
+"""
+
+_ERROR_CODE = re.compile(r"Error = (-?\d+)\.")
+
+
+class MountClient:
+    """
+    Mount and autoguider commands sent as scripts to TheSkyX over one kept-open connection (see
+    SkyXClient). No process is started per command.
+
+    Every method returns a subprocess.CompletedProcess (as the `mount` and `ncommand` tools did):
+    returncode is TheSkyX's error code (1 for a target it can't find), stdout the script's answer
+    and stderr TheSkyX's message when there was an error. The `*_async` methods return a
+    concurrent.futures.Future of it instead; commands still run one at a time, in order.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = SKYX_PORT,
+        timeout: float = 600,
+        guider_library: str = GUIDER_LIBRARY,
+    ):
+        """
+        Parameters
+        ----------
+        host: str, default: '127.0.0.1'
+            IP address of TheSkyX server.
+        port: int, default: 3040
+            port of TheSkyX TCP server.
+        timeout: float, default: 600
+            seconds to wait for a command (a slew or park) before giving up.
+        guider_library: str, default: ~/.dfobserve/TSXAutoGuider.js
+            javascript file defining TSXAutoGuider, read on the first guider command.
+        """
+        # a connection of its own, so that pointing queries don't wait behind a slew
+        self.skyx = SkyXClient(host, port, timeout=timeout)
+        self.timeout = timeout
+        self.guider_library = guider_library
+        self._library = None
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.skyx.close()
+
+    def run(self, action: str, script: str, timeout: float = None, retry: bool = True):
+        """
+        Send a script to TheSkyX.
+
+        Parameters
+        ----------
+        action: str
+            description of the command (the `args` of the result).
+        script: str
+            script body, leaving its answer in `Out`.
+        timeout: float, optional
+            seconds to wait. Default: the client's timeout. Raises TimeoutError.
+        retry: bool, default: True
+            resend on a new connection if the connection drops (not for relative moves).
+
+        Returns
+        -------
+        result: subprocess.CompletedProcess
+        """
+        output, message = self.skyx.send(
+            script, timeout=self.timeout if timeout is None else timeout, retry=retry
+        )
+        code = _ERROR_CODE.search(message)
+        returncode = int(code.group(1)) if code is not None else -1
+        if returncode == 0 and output == "NotFound":
+            returncode, message = 1, "Target not in TheSkyX Database"
+        stderr = b"" if returncode == 0 else message.encode("utf-8")
+        stdout = f"{output}\n".encode("utf-8")
+        return sp.CompletedProcess(action, returncode, stdout=stdout, stderr=stderr)
+
+    def submit(self, action: str, script: str, timeout: float = None, retry: bool = True):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        return self._executor.submit(self.run, action, script, timeout, retry)
+
+    def _library_source(self):
+        if self._library is None:
+            if not os.path.exists(self.guider_library):
+                raise FileNotFoundError(
+                    f"Autoguider library {self.guider_library} not found (it defines TSXAutoGuider)."
+                )
+            with open(self.guider_library) as f:
+                self._library = f.read()
+        return self._library
+
+    def _slew(self, target):
+        return f"goto {target}", SLEW_SCRIPT.format(target=_js_string(target))
+
+    def _guider(self, on):
+        script = GUIDER_SCRIPT.format(
+            library=self._library_source(),
+            method="magic" if on else "stop",
+            state="on" if on else "off",
+        )
+        return f"autoguider {'start' if on else 'stop'}", script
+
+    def _dither(self, direction, amount):
+        if direction not in ["N", "S", "E", "W"]:
+            raise ValueError("direction must be one of N, S, E, W")
+        amount = f"{float(amount):g}"
+        script = DITHER_SCRIPT.format(amount=amount, direction=direction)
+        return f"dither {amount} {direction}", script
+
+    def slew(self, target: str, timeout: float = None):
+        return self.run(*self._slew(target), timeout)
+
+    def slew_async(self, target: str, timeout: float = None):
+        return self.submit(*self._slew(target), timeout)
+
+    def start(self, timeout: float = None):
+        return self.run("start", TRACKING_SCRIPT.format(on=1, state="started"), timeout)
+
+    def stop(self, timeout: float = None):
+        return self.run("stop", TRACKING_SCRIPT.format(on=0, state="stopped"), timeout)
+
+    def park(self, timeout: float = None):
+        return self.run("park", PARK_SCRIPT, timeout)
+
+    def park_async(self, timeout: float = None):
+        return self.submit("park", PARK_SCRIPT, timeout)
+
+    def home(self, timeout: float = None):
+        return self.run("home", HOME_SCRIPT, timeout)
+
+    def dither(self, direction: str, amount: float, timeout: float = None):
+        """
+        Dither `amount` (arcmin) towards `direction` ('E' or 'N'). Not resent if the connection
+        drops, since the mount may already have moved.
+        """
+        return self.run(*self._dither(direction, amount), timeout, retry=False)
+
+    def dither_async(self, direction: str, amount: float, timeout: float = None):
+        return self.submit(*self._dither(direction, amount), timeout, retry=False)
+
+    def start_autoguide(self, timeout: float = None):
+        return self.run(*self._guider(True), timeout)
+
+    def start_autoguide_async(self, timeout: float = None):
+        return self.submit(*self._guider(True), timeout)
+
+    def stop_autoguide(self, timeout: float = None):
+        return self.run(*self._guider(False), timeout)
+
+    def stop_autoguide_async(self, timeout: float = None):
+        return self.submit(*self._guider(False), timeout)
+
+
+_mount_client = None
+_mount_client_lock = threading.Lock()
+
+
+def get_mount_client():
+    """
+    Return the MountClient used by the mount and guider utilities (created on first use).
+    """
+    global _mount_client
+    with _mount_client_lock:
+        if _mount_client is None:
+            _mount_client = MountClient()
+        return _mount_client
+
+
+def set_mount_client(client=None):
+    """
+    Set the MountClient used by the mount and guider utilities (None: a new default one).
+
+    Returns
+    -------
+    previous: MountClient
+        the client that was in use, so that it can be restored.
+    """
+    global _mount_client
+    with _mount_client_lock:
+        previous = _mount_client
+        _mount_client = MountClient() if client is None else client
+    return previous
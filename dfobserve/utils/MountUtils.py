@@ -1,8 +1,12 @@
 """
 Utility functions for controlling the mount.
+
+The commands are sent to TheSkyX over a kept-open connection (see MountClient), so that they
+don't each start a new process.
 """
 
-import subprocess as sp
+from dfobserve.utils.MountClient import get_mount_client
+from dfobserve.utils.PointingUtils import get_pointing_service
 
 send_web_request = "python3 C:/Dragonfly/Programs/SendWebRequestToArray.py"
 # Not needed here because the mount will be directly accessible
@@ -15,22 +19,24 @@ def DitherMount(east, north):
     """
     # In arcmin -- do any needed transformations here
 
-    east_command = f"mount dither {east} E"
-    north_command = f"mount dither {north} N"
+    client = get_mount_client()
+    responses = []
     if east != 0:
-        r = sp.run(east_command, shell=True, capture_output=True)
+        r = client.dither("E", east)
+        responses.append(r.stdout.decode("utf-8"))
     if north != 0:
-        r1 = sp.run(north_command, shell=True, capture_output=True)
-    string_response = r.stdout.decode("utf-8") + "\n" + r1.stdout.decode("utf-8")
+        r1 = client.dither("N", north)
+        responses.append(r1.stdout.decode("utf-8"))
+    get_pointing_service().invalidate()
+    string_response = "\n".join(responses)
     return string_response
 
 
 def GuideMount():
     """
-    Attempt to start guiding
+    Attempt to start guiding (the autoguider's magic(): same as StartAutoGuide)
     """
-    comm = f"'guider magic'"  # NEEDS some checks apparently
-    res = sp.run(comm, shell=True, capture_output=True)
+    res = get_mount_client().start_autoguide()  # NEEDS some checks apparently
     return res
 
 
@@ -38,8 +44,8 @@ def HomeMount():
     """
     Home the Mount
     """
-    comm = f"mount home"
-    res = sp.run(comm, shell=True, capture_output=True)
+    res = get_mount_client().home()
+    get_pointing_service().invalidate()
     return res
 
 
@@ -47,16 +53,16 @@ def StartMount():
     """
     Start tracking
     """
-    comm = f"mount --nmount 1 start"
-    res = sp.run(comm, shell=True, capture_output=True)
+    res = get_mount_client().start()
+    return res
 
 
 def ParkMount():
     """
     Park Mount
     """
-    comm = f"mount --nmount 1 park"
-    res = sp.run(comm, shell=True, capture_output=True)
+    res = get_mount_client().park()
+    get_pointing_service().invalidate()
     return res
 
 
@@ -64,8 +70,7 @@ def StopMount():
     """
     Stop mount
     """
-    comm = f"mount --nmount 1 stop"
-    res = sp.run(comm, shell=True, capture_output=True)
+    res = get_mount_client().stop()
     return res
 
 
@@ -78,6 +83,26 @@ def SlewMount(target):
     target: str
         target to slew the mount to
     """
-    comm = f"mount --nmount 1 goto {target}"
-    res = sp.run(comm, shell=True, capture_output=True)
+    res = get_mount_client().slew(target)
+    get_pointing_service().invalidate()
     return res
+
+
+def SlewMountAsync(target):
+    """
+    Start slewing the mount to a target and return without waiting for the slew.
+
+    Parameters
+    ----------
+    target: str
+        target to slew the mount to
+
+    Returns
+    -------
+    future: concurrent.futures.Future
+        resolving to the result of the slew, as returned by SlewMount.
+    """
+    get_pointing_service().invalidate()
+    future = get_mount_client().slew_async(target)
+    future.add_done_callback(lambda f: get_pointing_service().invalidate())
+    return future
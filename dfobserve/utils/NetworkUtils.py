@@ -7,9 +7,24 @@ import re
 import pandas as pd
 import subprocess as sp
 import io
+import threading
 import numpy as np
+from collections import namedtuple
+from types import MappingProxyType
 
-__all__ = ["get_network_df", "get_status_df", "get_config_df"]
+__all__ = [
+    "get_network_df",
+    "get_status_df",
+    "get_config_df",
+    "UnitIndex",
+    "get_unit_index",
+    "HardwareTemplate",
+    "get_hardware_template",
+]
+
+HARDWARE_TEMPLATE_PATH = (
+    "/home/dragonfly/git/Dragonfly-Configuration/DRAGONFLY_HARDWARE_TEMPLATE.txt"
+)
 
 
 def get_network_df(
@@ -48,7 +63,7 @@ def get_network_df(
 
 
 def get_status_df(
-    hardware_config_path="/home/dragonfly/git/Dragonfly-Configuration/DRAGONFLY_HARDWARE_TEMPLATE.txt",
+    hardware_config_path=HARDWARE_TEMPLATE_PATH,
     verbose=False,
 ) -> pd.DataFrame:
     """
@@ -66,12 +81,208 @@ def get_status_df(
     status_df: pandas.DataFrame
         df containing IP addresses and UP/Down status (and other info)
     """
-    df = pd.read_csv(
-        hardware_config_path,
-        delim_whitespace=True,
-        names=["IP", "Name", "something", "something2", "TempModel", "Filter"],
-        dtype=str,
-    )
+    df = get_hardware_template(hardware_config_path).df
     if verbose:
         print(df)
     return df
+
+
+class UnitIndex:
+    """
+    Precompiled lookup tables for routing commands to groups of units.
+
+    Units are kept in IP order and each one is given a bit, so that a group of units
+    (e.g., all H-alpha units) or a list of units to skip is a single integer mask.
+
+    An index is shared by every caller of get_unit_index, so its tables are read-only (tuples
+    and read-only mappings).
+    """
+
+    GROUPS = {
+        "all": None,
+        "science": ["ha6647", "oiii5071"],
+        "science offs": ["ha_left", "ha_right", "oiii_left", "oiii_right"],
+        "OH": ["OH_off", "OH"],
+        "halpha": ["ha6647"],
+        "oiii": ["oiii5071"],
+        "flathaving": ["ha6647", "OH", "OH_off", "oiii5071"],
+        "ha offs": ["ha_left", "ha_right"],
+        "oiii offs": ["oiii_left", "oiii_right"],
+        "OH on": ["OH"],
+        "OH off": ["OH_off"],
+    }
+
+    def __init__(self, status_df: pd.DataFrame):
+        """
+        Parameters
+        ----------
+        status_df: pandas.DataFrame
+            hardware template as returned by get_status_df
+        """
+        order = sorted(range(len(status_df)), key=lambda i: status_df.IP.values[i])
+        self.names = tuple(status_df.Name.values[i] for i in order)
+        self.ips = tuple(status_df.IP.values[i] for i in order)
+        self.filters = tuple(status_df.Filter.values[i] for i in order)
+        self.position = MappingProxyType({name: pos for pos, name in enumerate(self.names)})
+        self.name_to_ip = MappingProxyType(dict(zip(self.names, self.ips)))
+        filter_units = {}
+        for name, filt in zip(self.names, self.filters):
+            filter_units.setdefault(filt, []).append(name)
+        self.filter_units = MappingProxyType(
+            {filt: tuple(names) for filt, names in filter_units.items()}
+        )
+        self.all_mask = (1 << len(self.names)) - 1
+        group_masks = {}
+        group_positions = {}
+        for group, filters in self.GROUPS.items():
+            if filters is None:
+                positions = tuple(range(len(self.names)))
+            else:
+                positions = tuple(
+                    pos for pos, filt in enumerate(self.filters) if filt in filters
+                )
+            group_positions[group] = positions
+            group_masks[group] = sum(1 << pos for pos in positions)
+        self.group_masks = MappingProxyType(group_masks)
+        self.group_positions = MappingProxyType(group_positions)
+
+    def __len__(self):
+        return len(self.names)
+
+    def units(self, group: str):
+        """
+        Names of the units in a group (see UnitIndex.GROUPS), in IP order.
+        """
+        return [self.names[pos] for pos in self.group_positions[group]]
+
+    def mask(self, units: list):
+        """
+        Bitmask for a list of unit names. Names not in the template are ignored.
+        """
+        mask = 0
+        for name in units:
+            pos = self.position.get(name)
+            if pos is not None:
+                mask |= 1 << pos
+        return mask
+
+    def route(self, assignments: list, skip: list = []):
+        """
+        Work out which command goes to which unit.
+
+        Parameters
+        ----------
+        assignments: list
+            (group, command) pairs. Later pairs overwrite earlier ones for the units they share,
+            and pairs with a command of None are ignored.
+        skip: list, default: []
+            names of units to leave out.
+
+        Returns
+        -------
+        webrequest_df: pandas.DataFrame
+            columns Name, ip and command, sorted by ip.
+        """
+        commands = [None] * len(self.names)
+        for group, command in assignments:
+            if command is None:
+                continue
+            for pos in self.group_positions[group]:
+                commands[pos] = command
+        skip_mask = self.mask(skip)
+        rows = [
+            pos
+            for pos in range(len(self.names))
+            if commands[pos] is not None and not (skip_mask >> pos) & 1
+        ]
+        return pd.DataFrame(
+            {
+                "Name": [self.names[pos] for pos in rows],
+                "ip": [self.ips[pos] for pos in rows],
+                "command": [commands[pos] for pos in rows],
+            }
+        )
+
+
+HARDWARE_TEMPLATE_COLUMNS = ["IP", "Name", "something", "something2", "TempModel", "Filter"]
+
+
+class HardwareTemplate(
+    namedtuple("HardwareTemplate", ["path", "signature", "records", "index"])
+):
+    """
+    Parsed hardware template, shared between callers. `records` holds one (IP, Name, something,
+    something2, TempModel, Filter) tuple per line and `index` the compiled UnitIndex.
+    """
+
+    __slots__ = ()
+
+    @property
+    def df(self):
+        """
+        The template as a dataframe, built on each access so that callers can modify it.
+        """
+        return pd.DataFrame(list(self.records), columns=HARDWARE_TEMPLATE_COLUMNS)
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+def _file_signature(path):
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_ino, st.st_size)
+
+
+def get_hardware_template(hardware_config_path=HARDWARE_TEMPLATE_PATH):
+    """
+    Return the parsed hardware template. The file is parsed once per process and only read
+    again when its modification time, inode or size change.
+
+    Parameters
+    ----------
+    hardware_config_path: str (optional)
+        location of the hardware config file. None means the default location.
+
+    Returns
+    -------
+    template: HardwareTemplate
+    """
+    if hardware_config_path is None:
+        hardware_config_path = HARDWARE_TEMPLATE_PATH
+    signature = _file_signature(hardware_config_path)
+    template = _templates.get(hardware_config_path)
+    if template is not None and template.signature == signature:
+        return template
+    with _templates_lock:
+        template = _templates.get(hardware_config_path)
+        if template is None or template.signature != signature:
+            df = pd.read_csv(
+                hardware_config_path,
+                delim_whitespace=True,
+                names=HARDWARE_TEMPLATE_COLUMNS,
+                dtype=str,
+            )
+            template = HardwareTemplate(
+                path=hardware_config_path,
+                signature=signature,
+                records=tuple(df.itertuples(index=False, name=None)),
+                index=UnitIndex(df),
+            )
+            _templates[hardware_config_path] = template
+    return template
+
+
+def get_unit_index(hardware_config_path=HARDWARE_TEMPLATE_PATH):
+    """
+    Return the UnitIndex for a hardware template (see get_hardware_template).
+
+    Parameters
+    ----------
+    hardware_config_path: str (optional)
+        location of the hardware config file. None means the default location.
+
+    Returns
+    -------
+    index: UnitIndex
+    """
+    return get_hardware_template(hardware_config_path).index
@@ -0,0 +1,204 @@
+"""
+Cached mount pointing for the exposure headers, kept fresh by a background poller so that
+exposures don't wait on TheSkyX.
+"""
+
+import threading
+
+from dfobserve.utils.ClockUtils import get_clock
+from dfobserve.utils.SkyXUtils import SKYX_PORT, GetMountPointing
+
+__all__ = [
+    "GetCachedMountPointing",
+    "PointingService",
+    "get_pointing_service",
+    "set_pointing_service",
+]
+
+
+class PointingService:
+    """
+    Latest mount pointing (as returned by GetMountPointing) with the time it was read.
+
+    `start()` polls the mount in a background thread every `interval` seconds. `get()` returns the
+    cached pointing if it is younger than `max_age` and no slew has happened since it was read,
+    and otherwise queries the mount synchronously. The mount utilities call `invalidate()` after
+    every slew, dither, park or home, so that a pointing read before a move is never used after it.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = SKYX_PORT,
+        interval: float = 10,
+        max_age: float = 30,
+        query=None,
+    ):
+        """
+        Parameters
+        ----------
+        host: str, default: '127.0.0.1'
+            IP address of TheSkyX server.
+        port: int, default: 3040
+            port of TheSkyX TCP server.
+        interval: float, default: 10
+            seconds between two background polls.
+        max_age: float, default: 30
+            oldest pointing (seconds) that get() returns without querying the mount.
+        query: callable, optional
+            function returning the pointing dict. Default: GetMountPointing(host, port).
+        """
+        if query is None:
+            query = lambda: GetMountPointing(host=host, port=port)
+        self.query = query
+        self.interval = interval
+        self.max_age = max_age
+        self.pointing = None
+        self.timestamp = None
+        self.last_error = None
+        self.queries = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def age(self):
+        """
+        Seconds since the cached pointing was read (None if there is none).
+        """
+        with self._lock:
+            if self.timestamp is None:
+                return None
+            return get_clock().monotonic() - self.timestamp
+
+    def start(self):
+        """
+        Start polling the mount in the background (no-op if already running).
+        """
+        if self.running:
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._poll, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _poll(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                # keep polling; get() will query (and raise) if the cached value gets stale
+                self.last_error = e
+            self._stop.wait(self.interval)
+
+    def invalidate(self):
+        """
+        Forget the cached pointing (the mount has moved). Queries already in flight are discarded.
+        """
+        with self._lock:
+            self._generation += 1
+            self.pointing = None
+            self.timestamp = None
+
+    def refresh(self):
+        """
+        Query the mount now and cache the result.
+
+        Returns
+        -------
+        pointing: dict
+        """
+        while True:
+            with self._lock:
+                generation = self._generation
+            pointing = self.query()
+            with self._lock:
+                self.queries += 1
+                if generation != self._generation:
+                    # the mount moved while we were asking: ask again
+                    continue
+                self.pointing = pointing
+                self.timestamp = get_clock().monotonic()
+                self.last_error = None
+                return dict(pointing)
+
+    def get(self, max_age: float = None):
+        """
+        The current pointing: the cached one if fresh enough, otherwise read from the mount.
+
+        Parameters
+        ----------
+        max_age: float, optional
+            oldest acceptable pointing in seconds. Default: the service's max_age.
+
+        Returns
+        -------
+        pointing: dict
+            ra, dec, altitude and azimuth, as from GetMountPointing.
+        """
+        if max_age is None:
+            max_age = self.max_age
+        with self._lock:
+            if (
+                self.pointing is not None
+                and get_clock().monotonic() - self.timestamp <= max_age
+            ):
+                return dict(self.pointing)
+        return self.refresh()
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_pointing_service():
+    """
+    Return the pointing service used by the exposure utilities (created on first use; the
+    background poller is only running once started).
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = PointingService()
+        return _service
+
+
+def set_pointing_service(service=None):
+    """
+    Set the pointing service used by the exposure utilities (None: a new default one).
+
+    Returns
+    -------
+    previous: PointingService
+        the service that was in use, so that it can be restored.
+    """
+    global _service
+    with _service_lock:
+        previous = _service
+        _service = PointingService() if service is None else service
+    return previous
+
+
+def GetCachedMountPointing(max_age: float = None):
+    """
+    Mount pointing for an exposure header, from the pointing service (see PointingService.get).
+    """
+    return get_pointing_service().get(max_age=max_age)
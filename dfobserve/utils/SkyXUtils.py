@@ -1,88 +1,63 @@
-import subprocess as sp
+import re
+import socket
+import threading
+import numpy as np
+import pandas as pd
 from ..exceptions import *
 
-__all__ = ["check_target_exists"]
+__all__ = ["SkyXClient", "check_target_exists", "check_targets_exist", "get_skyx_client"]
 
+SKYX_PORT = 3040
 
-def check_target_exists(target_name: str, host: str = "127.0.0.1"):
-    """
-    Check whether a target name is recognized by TheSkyX.
-    This function constructs a js query which is saved to a temporary
-    file that is then sent to TheSkyX via the `skysend` command.
-
-    Parameters
-    ----------
-    target_name: str
-        name to check in the database.
-    host: str, default: '127.0.0.1'
-        IP address associated with TheSkyX server
-
-    Returns
-    -------
-    found: bool
-        If the target is found, returns true, else false. If another response occurs,
-        an error is thrown.
-    """
-    query1 = f"""
-/* Java Script */
-
+# Script bodies (without the '/* Java Script */' header, which SkyXClient adds). Each one leaves
+# its answer in `Out`.
+FIND_TARGET_SCRIPT = """
 var Target = '{target_name}';
 var Out="";
 var err;
 sky6StarChart.LASTCOMERROR=0;
 sky6StarChart.Find(Target);
 err = sky6StarChart.LASTCOMERROR;
-if (err!=0)"""
-    query2 = """
-{
+if (err!=0)
+{{
 Out = "NotFound";
-}
+}}
 else
-{
+{{
     Out = "Found";
-}
-        """
-    query = query1 + query2
-    fn = "tmp.js"
-    with open(fn, "w") as f:
-        f.write(query)
-    command = f"skysend {host} {fn}"
-    r = sp.run(command, shell=True, capture_output=True, encoding="utf-8")
-    s = r.stdout
-    s = s.split("|")[0]
-    if s == "Found":
-        return
-    elif s == "NotFound":
-        raise TargetNotFoundError("Target not in TheSkyX Databasex")
-    else:
-        raise UnknownCommunicationError("Error Communicating with SkyX")
-
-
-def StartAutoGuide():
-    command = "ncommand -l 'foo=new TSXAutoGuider(); foo.magic()'"
-    r = sp.run(command, shell=True, capture_output=True)
-    return r
-
-
-def StopAutoGuide():
-    command = "ncommand -l 'foo=new TSXAutoGuider(); foo.stop()'"
-    r = sp.run(command, shell=True, capture_output=True)
-    return r
+}}
+"""
 
+# Like FIND_TARGET_SCRIPT, but also returns the J2000 RA (hours) and Dec (degrees) of the target.
+FIND_TARGET_COORDS_SCRIPT = """
+var Target = '{target_name}';
+var Out="";
+var err;
+sky6StarChart.LASTCOMERROR=0;
+sky6StarChart.Find(Target);
+err = sky6StarChart.LASTCOMERROR;
+if (err!=0)
+{{
+    Out = "NotFound";
+}}
+else
+{{
+    sky6ObjectInformation.Property(54);
+    var dRA = sky6ObjectInformation.ObjInfoPropOut;
+    sky6ObjectInformation.Property(55);
+    var dDec = sky6ObjectInformation.ObjInfoPropOut;
+    Out = "Found," + dRA + "," + dDec;
+}}
+"""
 
-def GetMountPointing(host: str = "127.0.0.1"):
-    """
-    Retrieve the position of the mount (RA,DEC,ALT,AZ,HA)
-    """
-    query = """
-/* Java Script */
+MOUNT_POINTING_SCRIPT = """
 var Out;
 var dRA;
 var dDec;
 var dAz;
 var dAlt;
+var dHA;
 var coordsString1;
-var coordsString2;
 sky6RASCOMTele.Connect();
 if (sky6RASCOMTele.IsConnected==0) {
     Out = "Not connected"
@@ -101,22 +76,280 @@ if (sky6RASCOMTele.IsConnected==0) {
     Out += " HA: " + parseFloat(Math.round(dHA*10000)/10000).toFixed(4);
 };
 """
-    fn = "tmp.js"
-    with open(fn, "w") as f:
-        f.write(query)
-    command = f"skysend {host} {fn}"
-    r = sp.run(command, shell=True, capture_output=True)
-    s = r.stdout.decode("latin-1")
-    response = s.split("|")[0]
-    comment = s.split("|")[1]
-    if comment.startswith("No error."):
-        splits = response.split()
-        ra = splits[1][:-1] + ":" + splits[2][:-1] + ":" + splits[3][:-1]
-        dec = splits[5][1:-1] + ":" + splits[6][:-1] + ":" + splits[7][:-1]
-        alt = splits[9]
-        az = splits[11]
-        ha = splits[-1]
-        out_dict = {"ra": ra, "dec": dec, "altitude": alt, "azimuth": az}
-        return out_dict
+
+# Separator between the answers of a batch (see SkyXClient.run_batch).
+BATCH_SEPARATOR = "\t"
+BATCH_QUERY_START = "Results.push((function () {"
+BATCH_QUERY_END = "return Out;\n})());"
+
+# TheSkyX ends every reply with '|<message> Error = <code>.'
+_REPLY_END = re.compile(r"Error = (-?\d+)\.\s*$")
+
+
+class SkyXClient:
+    """
+    Connection to TheSkyX TCP server, kept open between queries.
+
+    TheSkyX runs every script it receives on the socket and answers
+    '<Out>|<message> Error = <code>.'.
+    Scripts are sent straight from memory, so there is no temporary file and no `skysend` process,
+    and a lock lets several threads share one client. A dropped connection is reopened once
+    before giving up.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = SKYX_PORT, timeout: float = 10):
+        """
+        Parameters
+        ----------
+        host: str, default: '127.0.0.1'
+            IP address of TheSkyX server.
+        port: int, default: 3040
+            port of TheSkyX TCP server.
+        timeout: float, default: 10
+            seconds to wait for a connection or a reply.
+        """
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._sock = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def connect(self):
+        if self._sock is None:
+            self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        return self._sock
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+
+    def _exchange(self, script, timeout):
+        sock = self.connect()
+        sock.settimeout(self.timeout if timeout is None else timeout)
+        sock.sendall(script.encode("latin-1"))
+        reply = b""
+        while True:
+            chunk = sock.recv(4096)
+            if not chunk:
+                raise ConnectionError("TheSkyX closed the connection")
+            reply += chunk
+            text = reply.decode("latin-1")
+            if _REPLY_END.search(text):
+                return text
+
+    def send(self, script: str, timeout: float = None, retry: bool = True):
+        """
+        Run a script and return TheSkyX's reply.
+
+        Parameters
+        ----------
+        script: str
+            javascript to run. The '/* Java Script */' header is added if missing.
+        timeout: float, optional
+            seconds to wait for the reply. Default: the client's timeout. A script that times out
+            raises TimeoutError (it is not sent again) and the connection is closed.
+        retry: bool, default: True
+            send the script again on a new connection if the connection drops. Only for scripts
+            that are safe to run twice.
+
+        Returns
+        -------
+        output, message: str
+            the script's `Out` and TheSkyX's status message (e.g., 'No error. Error = 0.').
+        """
+        if not script.lstrip().startswith("/* Java Script */"):
+            script = "/* Java Script */\n" + script
+        with self._lock:
+            try:
+                text = self._exchange(script, timeout)
+            except socket.timeout as e:
+                # the reply may still come: don't read it as the answer to the next script
+                self.close()
+                raise TimeoutError(f"TheSkyX did not answer in time: {e}") from e
+            except OSError as e:
+                # the server may have dropped an idle connection; reconnect once
+                self.close()
+                if not retry:
+                    raise UnknownCommunicationError(f"Error Communicating with SkyX: {e}")
+                try:
+                    text = self._exchange(script, timeout)
+                except socket.timeout as e:
+                    self.close()
+                    raise TimeoutError(f"TheSkyX did not answer in time: {e}") from e
+                except OSError as e:
+                    self.close()
+                    raise UnknownCommunicationError(f"Error Communicating with SkyX: {e}")
+        output, _, message = text.rpartition("|")
+        return output, message.strip()
+
+    def run(self, script: str, timeout: float = None, retry: bool = True):
+        """
+        Run a script and return its `Out`; raise UnknownCommunicationError if TheSkyX reports
+        an error. See `send` for the arguments.
+        """
+        output, message = self.send(script, timeout=timeout, retry=retry)
+        if not message.startswith("No error."):
+            raise UnknownCommunicationError(f"Error Communicating with SkyX: {message}")
+        return output
+
+    def run_batch(self, scripts: list):
+        """
+        Run several scripts in one round-trip.
+
+        Each script body (which must leave its answer in `Out`) is wrapped in its own function, so
+        their variables don't clash, and the answers are joined in a single reply.
+
+        Parameters
+        ----------
+        scripts: list
+            script bodies, e.g. FIND_TARGET_SCRIPT.format(target_name=...).
+
+        Returns
+        -------
+        outputs: list
+            the `Out` of each script, in order.
+        """
+        if len(scripts) == 0:
+            return []
+        parts = ["var Results = [];"]
+        for script in scripts:
+            parts.append(BATCH_QUERY_START + script.rstrip() + "\n" + BATCH_QUERY_END)
+        parts.append('Out = Results.join("\\t");')
+        outputs = self.run("\n".join(parts)).split(BATCH_SEPARATOR)
+        if len(outputs) != len(scripts):
+            raise UnknownCommunicationError(
+                f"Error Communicating with SkyX: expected {len(scripts)} answers, got {len(outputs)}"
+            )
+        return outputs
+
+
+def _js_string(text: str):
+    # contents of a single-quoted javascript string literal
+    return text.replace("\\", "\\\\").replace("'", "\\'")
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_skyx_client(host: str = "127.0.0.1", port: int = SKYX_PORT):
+    """
+    The shared SkyXClient for a server (created on first use).
+    """
+    with _clients_lock:
+        if (host, port) not in _clients:
+            _clients[(host, port)] = SkyXClient(host, port)
+        return _clients[(host, port)]
+
+
+def check_target_exists(target_name: str, host: str = "127.0.0.1", port: int = SKYX_PORT):
+    """
+    Check whether a target name is recognized by TheSkyX.
+    The query is sent over the shared connection to TheSkyX (see SkyXClient).
+
+    Parameters
+    ----------
+    target_name: str
+        name to check in the database.
+    host: str, default: '127.0.0.1'
+        IP address associated with TheSkyX server
+    port: int, default: 3040
+        port of TheSkyX TCP server.
+
+    Returns
+    -------
+    found: bool
+        If the target is found, returns true, else false. If another response occurs,
+        an error is thrown.
+    """
+    s = get_skyx_client(host, port).run(
+        FIND_TARGET_SCRIPT.format(target_name=_js_string(target_name))
+    )
+    if s == "Found":
+        return
+    elif s == "NotFound":
+        raise TargetNotFoundError("Target not in TheSkyX Databasex")
     else:
         raise UnknownCommunicationError("Error Communicating with SkyX")
+
+
+def check_targets_exist(target_names: list, host: str = "127.0.0.1", port: int = SKYX_PORT):
+    """
+    Look up a whole list of targets in TheSkyX with a single generated script (one round-trip).
+
+    Parameters
+    ----------
+    target_names: list
+        names to check in the database.
+    host: str, default: '127.0.0.1'
+        IP address associated with TheSkyX server
+    port: int, default: 3040
+        port of TheSkyX TCP server.
+
+    Returns
+    -------
+    found_df: pandas.DataFrame
+        one row per name: Name, Found, and the J2000 RA and Dec (degrees) TheSkyX has for it
+        (NaN if not found).
+    """
+    outputs = get_skyx_client(host, port).run_batch(
+        [FIND_TARGET_COORDS_SCRIPT.format(target_name=_js_string(n)) for n in target_names]
+    )
+    found, ras, decs = [], [], []
+    for name, output in zip(target_names, outputs):
+        if output == "NotFound":
+            found.append(False)
+            ras.append(np.nan)
+            decs.append(np.nan)
+        elif output.startswith("Found,"):
+            _, ra, dec = output.split(",")
+            found.append(True)
+            ras.append(float(ra) * 15)
+            decs.append(float(dec))
+        else:
+            raise UnknownCommunicationError(f"Error Communicating with SkyX: {output}")
+    return pd.DataFrame(
+        {"Name": list(target_names), "Found": found, "RA": ras, "Dec": decs},
+        columns=["Name", "Found", "RA", "Dec"],
+    )
+
+
+def StartAutoGuide():
+    from .MountClient import get_mount_client
+
+    r = get_mount_client().start_autoguide()
+    return r
+
+
+def StopAutoGuide():
+    from .MountClient import get_mount_client
+
+    r = get_mount_client().stop_autoguide()
+    return r
+
+
+def _parse_pointing(response: str):
+    if response == "Not connected":
+        raise UnknownCommunicationError("Error Communicating with SkyX: mount not connected")
+    splits = response.split()
+    ra = splits[1][:-1] + ":" + splits[2][:-1] + ":" + splits[3][:-1]
+    dec = splits[5][1:-1] + ":" + splits[6][:-1] + ":" + splits[7][:-1]
+    alt = splits[9]
+    az = splits[11]
+    return {"ra": ra, "dec": dec, "altitude": alt, "azimuth": az}
+
+
+def GetMountPointing(host: str = "127.0.0.1", port: int = SKYX_PORT):
+    """
+    Retrieve the position of the mount (RA,DEC,ALT,AZ,HA)
+    """
+    return _parse_pointing(get_skyx_client(host, port).run(MOUNT_POINTING_SCRIPT))
@@ -0,0 +1,205 @@
+"""
+Persistent (keep-alive) HTTP sessions to the webservers running on the pis.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qsl
+
+import requests
+from requests.adapters import HTTPAdapter
+
+__all__ = ["SessionPool", "get_session_pool", "is_idempotent", "unit_url"]
+
+
+def unit_url(ip: str, command: str, port: int = 3000):
+    """
+    Build the api url for a command on a unit.
+
+    Parameters
+    ----------
+    ip: str
+        IP address of the unit. May also be given as 'host:port', in which case `port` is ignored.
+    command: str
+        api command (e.g., 'status' or 'device/cooler?command=get')
+    port: int, default: 3000
+        port the webserver listens on.
+    """
+    if ":" in ip:
+        return f"http://{ip}/api/{command}"
+    return f"http://{ip}:{port}/api/{command}"
+
+
+def is_idempotent(command: str, params: dict = None):
+    """
+    Whether an api command only reads from the unit ('status', or a device '?command=get'), so
+    that it is safe to send twice.
+    """
+    path, _, query = command.partition("?")
+    args = dict(parse_qsl(query))
+    if params is not None:
+        args.update(params)
+    return path.strip("/") == "status" or args.get("command") == "get"
+
+
+class SessionPool:
+    """
+    Pool of keep-alive HTTP sessions, one per unit, so that repeated commands and status polls
+    to the same pi reuse an open connection instead of doing a new TCP handshake each time.
+    """
+
+    def __init__(
+        self,
+        max_hosts: int = 256,
+        connections_per_host: int = 4,
+        idle_timeout: float = 300.0,
+    ):
+        """
+        Parameters
+        ----------
+        max_hosts: int, default: 256
+            maximum number of units with an open session. The least recently used session is closed
+            when a new unit would exceed this.
+        connections_per_host: int, default: 4
+            maximum number of idle connections kept open to a single unit.
+        idle_timeout: float, default: 300
+            seconds after which an unused session is closed.
+        """
+        self.max_hosts = max_hosts
+        self.connections_per_host = connections_per_host
+        self.idle_timeout = idle_timeout
+        self._sessions = OrderedDict()
+        self._last_used = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _new_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.connections_per_host,
+            max_retries=0,
+        )
+        session.mount("http://", adapter)
+        return session
+
+    def _evict_idle(self, now):
+        for ip in list(self._sessions.keys()):
+            if now - self._last_used[ip] > self.idle_timeout:
+                self._sessions.pop(ip).close()
+                del self._last_used[ip]
+
+    def get(self, ip: str):
+        """
+        Get the session for a unit, opening one if needed.
+
+        Parameters
+        ----------
+        ip: str
+            IP address (or 'host:port') of the unit.
+
+        Returns
+        -------
+        session: requests.Session
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._evict_idle(now)
+            if ip in self._sessions:
+                self._sessions.move_to_end(ip)
+            else:
+                self._sessions[ip] = self._new_session()
+                while len(self._sessions) > self.max_hosts:
+                    oldest, session = self._sessions.popitem(last=False)
+                    session.close()
+                    del self._last_used[oldest]
+            self._last_used[ip] = now
+            return self._sessions[ip]
+
+    def evict(self, ip: str):
+        """
+        Close and forget the session of a unit (e.g., after its connection died).
+        """
+        with self._lock:
+            session = self._sessions.pop(ip, None)
+            self._last_used.pop(ip, None)
+        if session is not None:
+            session.close()
+
+    def close(self):
+        """
+        Close all sessions.
+        """
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            self._last_used.clear()
+        for session in sessions:
+            session.close()
+
+    def send(
+        self,
+        ip: str,
+        command: str,
+        port: int = 3000,
+        params: dict = None,
+        timeout=10,
+    ):
+        """
+        Send a GET request for an api command over the unit's persistent session.
+
+        If the connection fails, the unit's session is evicted. Commands that only read (see
+        is_idempotent) are then sent once more on a fresh connection, since a kept-alive
+        connection may have been closed by the pi in the meantime; the error is only raised if
+        that fails too (or if connecting timed out, which a new connection won't fix).
+
+        Parameters
+        ----------
+        ip: str
+            IP address (or 'host:port') of the unit.
+        command: str
+            api command (e.g., 'status')
+        port: int, default: 3000
+            port the webserver listens on.
+        params: dict, optional
+            query parameters to add to the request.
+        timeout: float or tuple, default: 10
+            timeout passed on to requests.
+
+        Returns
+        -------
+        response: requests.Response
+        """
+        url = unit_url(ip, command, port=port)
+        try:
+            return self.get(ip).get(url, params=params, timeout=timeout)
+        except requests.ConnectTimeout:
+            self.evict(ip)
+            raise
+        except requests.ConnectionError:
+            self.evict(ip)
+            if not is_idempotent(command, params):
+                raise
+        try:
+            return self.get(ip).get(url, params=params, timeout=timeout)
+        except requests.ConnectionError:
+            self.evict(ip)
+            raise
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_session_pool():
+    """
+    Return the process-wide SessionPool shared by SendCommand, Status and the status pollers.
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = SessionPool()
+        return _default_pool
@@ -6,21 +6,27 @@ import urllib.request, urllib.error, urllib.parse
 import json
 
 import time
+import threading
 
 from datetime import datetime
 import os
 from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
 
 from tqdm import tqdm
 
 import pandas as pd
 import requests
-from ..utils.NetworkUtils import get_status_df
+from ..utils.NetworkUtils import get_status_df, get_unit_index
+from .SessionPool import get_session_pool, unit_url
 
 
 __all__ = [
     "SendCommand",
+    "SendCommandsParallel",
     "SendWebRequestNB",
+    "CompletionTracker",
+    "BroadcastHandle",
     "Status",
     "NewSendCommand",
     "ParseResponse",
@@ -44,9 +50,11 @@ def printHeader(hdr):
 
 def NewSendCommand(command: str, ip: str, port=3000, params: dict = {}, timeout=(5, 5)):
     try:
-        r = requests.get(
-            f"http://{ip}:{port}/api/{command}", params=params, timeout=timeout
-        ).json()
+        r = (
+            get_session_pool()
+            .send(ip, command, port=port, params=params, timeout=timeout)
+            .json()
+        )
         return r
     except requests.ConnectionError:
         return "ConnectionError"
@@ -134,23 +142,34 @@ def SendCommand(
     timeout_seconds: int = 10,
     name: str = None,
     verbose: bool = False,
+    port: int = 3000,
 ):
+    """
+    Send a single command to a unit over its persistent session (see SessionPool).
 
-    url = f"http://{ip}:3000/api/{command}"
+    Returns
+    -------
+    ip, content: tuple
+        content is the raw response body, or 0 (HTTP error), 1 (machine offline) or 2 (other error).
+    """
+    url = unit_url(ip, command, port=port)
     if verbose:
         print(f"Sending command: {url}")
     try:
-        response = urllib.request.urlopen(url, timeout=timeout_seconds)
-        content = response.read()
+        response = get_session_pool().send(
+            ip, command, port=port, timeout=timeout_seconds
+        )
+        response.raise_for_status()
+        content = response.content
         if verbose:
             print(f"Received: {content}")
         return ip, content
-    except urllib.error.HTTPError as e:
+    except requests.HTTPError as e:
         if verbose:
             print(f"Unknown command {command} on machine {ip} ({name})")
         return ip, 0
 
-    except urllib.error.URLError:
+    except requests.ConnectionError:
         if verbose:
             print(f"Machine {ip} ({name}) is offline")
         return ip, 1
@@ -161,6 +180,57 @@ def SendCommand(
         return ip, 2
 
 
+def SendCommandsParallel(
+    commands: list,
+    ips: list,
+    names: list = None,
+    timeout_seconds: int = 10,
+    max_workers: int = 64,
+    verbose: bool = False,
+):
+    """
+    Send commands to several units at once. Each unit gets its own connection, so an offline
+    unit only holds up its own slot and the total time is roughly that of the slowest unit.
+
+    Parameters
+    ----------
+    commands: list
+        command to send to each unit.
+    ips: list
+        IP address of each unit, in the same order as `commands`.
+    names: list, optional
+        names of the units, only used for verbose messages. (Default: None)
+    timeout_seconds: int, default: 10
+        time in seconds after which to close a connection and mark a machine as failed. (Default: 10)
+    max_workers: int, default: 64
+        maximum number of units contacted simultaneously. (Default: 64)
+    verbose: bool, default: False
+        print out info along the way. (Default: False)
+
+    Returns
+    -------
+    responses: list
+        (ip, content) tuples as returned by `SendCommand`, in the same order as the inputs.
+    """
+    if names is None:
+        names = [None] * len(ips)
+    if len(ips) == 0:
+        return []
+    with ThreadPoolExecutor(max_workers=min(len(ips), max_workers)) as executor:
+        futures = [
+            executor.submit(
+                SendCommand,
+                command,
+                ip=ip,
+                timeout_seconds=timeout_seconds,
+                name=name,
+                verbose=verbose,
+            )
+            for command, ip, name in zip(commands, ips, names)
+        ]
+        return [future.result() for future in futures]
+
+
 def SendWebRequestNB(
     command: str = None,
     which: str = "all",
@@ -178,6 +248,10 @@ def SendWebRequestNB(
     timeout_seconds: int = 10,
     dryrun=False,
     hardware_config_file=None,
+    max_workers: int = 64,
+    return_handle: bool = False,
+    is_done=None,
+    max_poll_interval: float = 30,
     **kwargs,
 ):
     """
@@ -226,19 +300,29 @@ def SendWebRequestNB(
         time in seconds after which to close the connection and mark a machine as failed. (Default: 10)
     dryrun: bool, default: False
         don't execute the command, but show what commands will be sent to which IP addresses. (Default: False)
+    hardware_config_file: str, optional
+        hardware template to read the units from. Default (None) uses the standard location.
+    max_workers: int, default: 64
+        maximum number of units contacted simultaneously. All units are sent their command at once
+        (up to this limit), so the dispatch takes as long as the slowest unit. (Default: 64)
+    return_handle: bool, default: False
+        return a BroadcastHandle right after dispatch, which keeps polling the pending units in the
+        background, instead of blocking. (Default: False)
+    is_done: callable, optional
+        function taking a parsed status dictionary and returning True once a unit has finished.
+        Default (None) waits until the unit reports no activity.
+    max_poll_interval: float, default: 30
+        longest time in seconds between two status polls of a pending unit. (Default: 30)
 
     Returns
     -------
-    result_df or WebRequestSummary: pandas.DataFrame
-        dataframe (or wrapped version) containing the webrequest results.
+    result_df, WebRequestSummary or BroadcastHandle:
+        dataframe (or wrapped version) containing the webrequest results, or a handle on them
+        if `return_handle` is set.
 
     """
-    if hardware_config_file is not None:
-        df = get_status_df(hardware_config_file)
-    else:
-        df = get_status_df()
+    index = get_unit_index(hardware_config_file)
 
-    command_dict = {}
     # Parse selection
     # If initial command is given, figure out where to send it
     if command is not None:
@@ -246,122 +330,20 @@ def SendWebRequestNB(
             raise AssertionError(
                 "unit selection not recognized. Must select from: 'all','science','science offs','OH','halpha','oiii'"
             )
-        if which == "all":
-            for ind in df.index:
-                unit = df.loc[ind, "Name"]
-                ip = df.loc[ind, "IP"]
-                name = ind
-                command_dict[name] = {"Name": unit, "ip": ip, "command": command}
-        elif which == "science":
-            mini = df.loc[((df["Filter"] == "ha6647") | (df["Filter"] == "oiii5071"))]
-            for ind in mini.index:
-                unit = df.loc[ind, "Name"]
-                name = ind
-                ip = mini.loc[ind, "IP"]
-                command_dict[name] = {"Name": unit, "ip": ip, "command": command}
-        elif which == "science offs":
-            mini = df.loc[
-                (
-                    (df["Filter"] == "ha_left")
-                    | (df["Filter"] == "ha_right")
-                    | (df["Filter"] == "oiii_left")
-                    | (df["Filter"] == "oiii_right")
-                )
-            ]
-            for ind in mini.index:
-                unit = df.loc[ind, "Name"]
-                name = ind
-                ip = mini.loc[ind, "IP"]
-                command_dict[name] = {"Name": unit, "ip": ip, "command": command}
-        elif which == "OH":
-            mini = df.loc[((df["Filter"] == "OH_off") | (df["Filter"] == "OH"))]
-            for ind in mini.index:
-                unit = df.loc[ind, "Name"]
-                name = ind
-                ip = mini.loc[ind, "IP"]
-                command_dict[name] = {"Name": unit, "ip": ip, "command": command}
-        elif which == "halpha":
-            mini = df.loc[df["Filter"] == "ha6647"]
-            for ind in mini.index:
-                unit = df.loc[ind, "Name"]
-                name = ind
-                ip = mini.loc[ind, "IP"]
-                command_dict[name] = {"Name": unit, "ip": ip, "command": command}
-        elif which == "oiii":
-            mini = df.loc[df["Filter"] == "oiii5071"]
-            for ind in mini.index:
-                unit = df.loc[ind, "Name"]
-                name = ind
-                ip = mini.loc[ind, "IP"]
-                command_dict[name] = {"Name": unit, "ip": ip, "command": command}
-
-    if all_flathaving_command is not None:
-        mini = df.loc[
-            (
-                (df["Filter"] == "ha6647")
-                | (df["Filter"] == "OH")
-                | (df["Filter"] == "OH_off")
-                | (df["Filter"] == "oiii5071")
-            )
-        ]
-        for ind in mini.index:
-            unit = df.loc[ind, "Name"]
-            name = ind
-            ip = mini.loc[ind, "IP"]
-            command_dict[name] = {
-                "Name": unit,
-                "ip": ip,
-                "command": all_flathaving_command,
-            }
-
-    # Now go through and overwrite any specifically asked for ones
-    if ha_command is not None:
-        mini = df.loc[(df["Filter"] == "ha6647")]
-        for ind in mini.index:
-            unit = df.loc[ind, "Name"]
-            name = ind
-            ip = mini.loc[ind, "IP"]
-            command_dict[name] = {"Name": unit, "ip": ip, "command": ha_command}
-    if oiii_command is not None:
-        mini = df.loc[(df["Filter"] == "oiii5071")]
-        for ind in mini.index:
-            unit = df.loc[ind, "Name"]
-            name = ind
-            ip = mini.loc[ind, "IP"]
-            command_dict[name] = {"Name": unit, "ip": ip, "command": oiii_command}
-    if ha_off_command is not None:
-        mini = df.loc[((df["Filter"] == "ha_left") | (df["Filter"] == "ha_right"))]
-        for ind in mini.index:
-            unit = df.loc[ind, "Name"]
-            name = ind
-            ip = mini.loc[ind, "IP"]
-            command_dict[name] = {"Name": unit, "ip": ip, "command": ha_off_command}
-    if oiii_off_command is not None:
-        mini = df.loc[((df["Filter"] == "oiii_left") | (df["Filter"] == "oiii_right"))]
-        for ind in mini.index:
-            unit = df.loc[ind, "Name"]
-            name = ind
-            ip = mini.loc[ind, "IP"]
-            command_dict[name] = {"Name": unit, "ip": ip, "command": oiii_off_command}
-    if OH_command is not None:
-        mini = df.loc[(df["Filter"] == "OH")]
-        for ind in mini.index:
-            unit = df.loc[ind, "Name"]
-            name = ind
-            ip = mini.loc[ind, "IP"]
-            command_dict[name] = {"Name": unit, "ip": ip, "command": OH_command}
-    if OH_off_command is not None:
-        mini = df.loc[(df["Filter"] == "OH_off")]
-        for ind in mini.index:
-            unit = df.loc[ind, "Name"]
-            name = ind
-            ip = mini.loc[ind, "IP"]
-            command_dict[name] = {"Name": unit, "ip": ip, "command": OH_off_command}
-
-    webrequest_df = pd.DataFrame.from_dict(command_dict, orient="index")
-    webrequest_df.sort_values(by="ip", inplace=True)
-    webrequest_df = webrequest_df[~webrequest_df.Name.isin(skip)]
-    webrequest_df = webrequest_df.reset_index(drop=True)
+    # Specifically asked for commands overwrite the general one, in this order
+    webrequest_df = index.route(
+        [
+            (which, command),
+            ("flathaving", all_flathaving_command),
+            ("halpha", ha_command),
+            ("oiii", oiii_command),
+            ("ha offs", ha_off_command),
+            ("oiii offs", oiii_off_command),
+            ("OH on", OH_command),
+            ("OH off", OH_off_command),
+        ],
+        skip=skip,
+    )
 
     if (verbose) or (dryrun):
         print("The following commands are queued to send to the following units")
@@ -374,14 +356,14 @@ def SendWebRequestNB(
             print("Sending Request...")
         responses = []
         fulltext = []
-        for ind in webrequest_df.index:
-            response = SendCommand(
-                webrequest_df.loc[ind, "command"],
-                ip=webrequest_df.loc[ind, "ip"],
-                name=ind,
-                timeout_seconds=timeout_seconds,
-            )
-
+        dispatched = SendCommandsParallel(
+            list(webrequest_df["command"]),
+            list(webrequest_df["ip"]),
+            names=list(webrequest_df.index),
+            timeout_seconds=timeout_seconds,
+            max_workers=max_workers,
+        )
+        for response in dispatched:
             if response[1] not in [0, 1, 2]:
                 response_dict = json.loads(response[1])
                 res = APIResponse(response_dict)
@@ -409,91 +391,360 @@ def SendWebRequestNB(
         ].count()
         if verbose:
             print(f"nPending: {nPending}")
+        expected_duration = None
+        if kwargs.get("request_type") == "exposure":
+            expected_duration = timeout_global - kwargs["readout_time"]
+        if return_handle:
+            return BroadcastHandle(
+                webrequest_df,
+                timeout_global=timeout_global,
+                timeout_seconds=timeout_seconds,
+                expected_duration=expected_duration,
+                max_workers=max_workers,
+                is_done=is_done,
+                max_interval=max_poll_interval,
+            )
         if not wait_for_response:
             return WebRequestSummary(webrequest_df)
         elif nPending == 0:
             return WebRequestSummary(webrequest_df)
-        elif nPending > 0:
-            start_time = datetime.now()
-
-            if "request_type" in kwargs.keys():
-                if kwargs["request_type"] == "exposure":
-                    pbar_time = timeout_global - kwargs["readout_time"]
-                    print(
-                        f"Exposing for {pbar_time} sec, then waiting up {kwargs['readout_time']} s for readout."
-                    )
-                with tqdm(total=pbar_time) as pbar:
-                    while nPending > 0:
-                        time.sleep(0.5)
-                        pbar.update(0.5)
-                        pending_df = webrequest_df.loc[
-                            (webrequest_df.response_summary == "PENDING")
-                        ]
-                        for ind in pending_df.index:
-                            response = SendCommand(
-                                command="status",
-                                ip=pending_df.loc[ind, "ip"],
-                                timeout_seconds=timeout_seconds,
-                            )
-                            if response[1] in [0, 1, 2]:
-                                print("pending machine went offline!")
-                                webrequest_df.loc[
-                                    ind, "response_summary"
-                                ] = "Machine Down"
-                                nPending -= 1
-
-                            else:
-                                response_dict = json.loads(response[1])
-                                response_res = APIResponse(response_dict)
-                                if response_res.Activity.Any == False:
-                                    nPending -= 1
-                                    webrequest_df.loc[
-                                        ind, "response_summary"
-                                    ] = "SUCCESS"
-                                    webrequest_df.loc[
-                                        ind, "full_response"
-                                    ] = response_res
-
-                            time_delta = datetime.now() - start_time
-                            if time_delta.total_seconds() >= timeout_global:
-                                print("Time Limit Exceeded waiting.")
-                                return WebRequestSummary(webrequest_df)
-            else:
-                while nPending > 0:
-                    time.sleep(0.5)
-                    pending_df = webrequest_df.loc[
-                        (webrequest_df.response_summary == "PENDING")
-                    ]
-                    for ind in pending_df.index:
-                        response = SendCommand(
-                            command="status",
-                            ip=pending_df.loc[ind, "ip"],
-                            timeout_seconds=timeout_seconds,
-                        )
-                        if response[1] in [0, 1, 2]:
-                            print("pending machine went offline!")
-                            webrequest_df.loc[ind, "response_summary"] = "Machine Down"
-                            nPending -= 1
-                        else:
-                            response_dict = json.loads(response[1])
-                            response_res = APIResponse(response_dict)
-                            if response_res.Activity.Any == False:
-                                nPending -= 1
-                                webrequest_df.loc[ind, "response_summary"] = "SUCCESS"
-                                webrequest_df.loc[ind, "full_response"] = response_res
-
-                    time_delta = datetime.now() - start_time
-                    if time_delta.total_seconds() >= timeout_global:
-                        print("Time Limit Exceeded waiting.")
-                        return WebRequestSummary(webrequest_df)
 
-            return WebRequestSummary(webrequest_df)
+        if expected_duration is not None:
+            print(
+                f"Exposing for {expected_duration} sec, then waiting up {kwargs['readout_time']} s for readout."
+            )
+        tracker = CompletionTracker(
+            webrequest_df,
+            timeout_seconds=timeout_seconds,
+            expected_duration=expected_duration,
+            max_workers=max_workers,
+            is_done=is_done,
+            max_interval=max_poll_interval,
+        )
+        if expected_duration is not None:
+            with tqdm(total=expected_duration) as pbar:
+                finished = tracker.run(timeout_global, pbar=pbar)
         else:
-            return WebRequestSummary(webrequest_df)
-    else:
+            finished = tracker.run(timeout_global)
+        if not finished:
+            print("Time Limit Exceeded waiting.")
         return WebRequestSummary(webrequest_df)
 
 
+def _unit_is_idle(response_dict: dict):
+    """
+    Default completion test for a status response: the unit reports no activity.
+    """
+    return response_dict["Activity"]["Any"] == False
+
+
+class CompletionTracker:
+    """
+    Tracks the units of a broadcast that are still working (response_summary of "PENDING")
+    and polls their status concurrently until each one finishes.
+
+    Every unit has its own polling schedule. When the expected duration of the request is known
+    (e.g., an exposure), a unit is polled at half the time remaining until it is expected to finish,
+    so polls are sparse early on and tight around readout. Otherwise the interval starts at
+    `min_interval` and backs off geometrically. A unit is no longer polled once it has finished.
+    """
+
+    def __init__(
+        self,
+        webrequest_df: pd.DataFrame,
+        timeout_seconds: int = 10,
+        expected_duration: float = None,
+        min_interval: float = 0.5,
+        max_interval: float = 30.0,
+        backoff: float = 1.25,
+        max_workers: int = 64,
+        is_done=None,
+        on_finish=None,
+    ):
+        """
+        Parameters
+        ----------
+        webrequest_df: pandas.DataFrame
+            dataframe built by SendWebRequestNB, with `response_summary` and `full_response` columns.
+            It is updated in place as units finish.
+        timeout_seconds: int, default: 10
+            connection timeout for each status poll. (Default: 10)
+        expected_duration: float, optional
+            seconds after which the units are expected to finish (e.g., the exposure time). (Default: None)
+        min_interval: float, default: 0.5
+            shortest time in seconds between two polls of the same unit. (Default: 0.5)
+        max_interval: float, default: 30
+            longest time in seconds between two polls of the same unit. (Default: 30)
+        backoff: float, default: 1.25
+            growth factor of the polling interval when no expected duration is given. (Default: 1.25)
+        max_workers: int, default: 64
+            maximum number of units polled simultaneously. (Default: 64)
+        is_done: callable, optional
+            function taking a parsed status dictionary and returning True once the unit has finished.
+            Default (None) waits until the unit reports no activity.
+        on_finish: callable, optional
+            called with the index value of each unit as soon as it finishes (or goes offline).
+        """
+        self.df = webrequest_df
+        self.timeout_seconds = timeout_seconds
+        self.expected_duration = expected_duration
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.max_workers = max_workers
+        self.is_done = is_done if is_done is not None else _unit_is_idle
+        self.on_finish = on_finish
+        self.cancelled = threading.Event()
+        self.pending = list(
+            self.df.loc[self.df.response_summary == "PENDING"].index.values
+        )
+        self.start_time = time.monotonic()
+        self.intervals = {}
+        self.next_poll = {}
+        self.npolls = {}
+        for ind in self.pending:
+            self.npolls[ind] = 0
+            self.schedule(ind)
+
+    def elapsed(self):
+        return time.monotonic() - self.start_time
+
+    def schedule(self, ind):
+        """
+        Set the time of the next status poll for a unit.
+        """
+        if self.expected_duration is not None:
+            remaining = self.expected_duration - self.elapsed()
+            interval = remaining / 2.0
+        elif ind in self.intervals:
+            interval = self.intervals[ind] * self.backoff
+        else:
+            interval = self.min_interval
+        interval = min(max(interval, self.min_interval), self.max_interval)
+        self.intervals[ind] = interval
+        self.next_poll[ind] = time.monotonic() + interval
+
+    def finish(self, ind, summary, response=None):
+        self.df.loc[ind, "response_summary"] = summary
+        if response is not None:
+            self.df.loc[ind, "full_response"] = response
+        self.pending.remove(ind)
+        del self.next_poll[ind]
+        if self.on_finish is not None:
+            self.on_finish(ind)
+
+    def cancel(self):
+        """
+        Stop polling; `run` returns at its next wake-up. Units still pending stay PENDING.
+        """
+        self.cancelled.set()
+
+    def poll(self, units: list):
+        """
+        Poll the status of the given units at once, and mark the ones that are done.
+
+        Parameters
+        ----------
+        units: list
+            index values (in the webrequest dataframe) of the units to poll.
+
+        Returns
+        -------
+        finished: list
+            index values of the units that finished (or went offline) on this poll.
+        """
+        finished = []
+        if len(units) == 0:
+            return finished
+        responses = SendCommandsParallel(
+            ["status"] * len(units),
+            [self.df.loc[ind, "ip"] for ind in units],
+            timeout_seconds=self.timeout_seconds,
+            max_workers=self.max_workers,
+        )
+        for ind, response in zip(units, responses):
+            self.npolls[ind] += 1
+            if response[1] in [0, 1, 2]:
+                print("pending machine went offline!")
+                self.finish(ind, "Machine Down")
+                finished.append(ind)
+                continue
+            response_dict = json.loads(response[1])
+            if self.is_done(response_dict):
+                self.finish(ind, "SUCCESS", APIResponse(response_dict))
+                finished.append(ind)
+            else:
+                self.schedule(ind)
+        return finished
+
+    def run(self, timeout_global: float, pbar=None):
+        """
+        Poll pending units until all of them finish or the global timeout is reached.
+
+        Parameters
+        ----------
+        timeout_global: float
+            time in seconds (since the tracker was created) to wait for pending units.
+        pbar: tqdm.tqdm, optional
+            progress bar to advance by the time spent waiting. (Default: None)
+
+        Returns
+        -------
+        finished: bool
+            True if every unit finished, False if the timeout was reached (or the tracker was
+            cancelled) first.
+        """
+        while len(self.pending) > 0:
+            if self.elapsed() >= timeout_global or self.cancelled.is_set():
+                return False
+            now = time.monotonic()
+            wake = min(min(self.next_poll.values()), self.start_time + timeout_global)
+            if wake > now:
+                if self.cancelled.wait(wake - now):
+                    return False
+                if pbar is not None:
+                    pbar.update(wake - now)
+            now = time.monotonic()
+            due = [ind for ind in self.pending if self.next_poll[ind] <= now]
+            self.poll(due)
+        return True
+
+
+class BroadcastHandle:
+    """
+    Handle on a broadcast whose pending units are polled in the background (see CompletionTracker).
+
+    Each unit has a future that resolves to its final (response_summary, full_response) as soon as
+    that unit finishes, so callers can move on with the fast units while slow ones are still busy.
+    Units that failed on dispatch (offline, unknown command) are resolved straight away.
+    Returned by `SendWebRequestNB(..., return_handle=True)`.
+    """
+
+    def __init__(self, webrequest_df: pd.DataFrame, timeout_global: float = 120, **kwargs):
+        """
+        Parameters
+        ----------
+        webrequest_df: pandas.DataFrame
+            dataframe built by SendWebRequestNB, with `response_summary` and `full_response` columns.
+        timeout_global: float, default: 120
+            time in seconds to keep polling pending units.
+        **kwargs:
+            passed on to CompletionTracker (e.g., `expected_duration`, `is_done`).
+        """
+        self.df = webrequest_df
+        self.timeout_global = timeout_global
+        self.futures = {}
+        self._names = {}
+        for ind in self.df.index:
+            future = Future()
+            name = self.df.loc[ind, "Name"]
+            self.futures[name] = future
+            self._names[future] = name
+            if self.df.loc[ind, "response_summary"] != "PENDING":
+                future.set_result(
+                    (self.df.loc[ind, "response_summary"], self.df.loc[ind, "full_response"])
+                )
+        self.tracker = CompletionTracker(webrequest_df, on_finish=self._finished, **kwargs)
+        self.finished = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _finished(self, ind):
+        self.futures[self.df.loc[ind, "Name"]].set_result(
+            (self.df.loc[ind, "response_summary"], self.df.loc[ind, "full_response"])
+        )
+
+    def _run(self):
+        try:
+            self.finished = self.tracker.run(self.timeout_global)
+        finally:
+            # units still pending at the timeout (or cancellation) will not resolve; notifying
+            # the cancellation also releases anyone blocked in as_completed
+            for future in self.futures.values():
+                if future.cancel():
+                    future.set_running_or_notify_cancel()
+
+    @property
+    def pending(self):
+        """
+        Names of the units that have not finished yet.
+        """
+        return [
+            name
+            for name, future in self.futures.items()
+            if future.cancelled() or not future.done()
+        ]
+
+    def done(self):
+        """
+        True once polling has stopped (every unit finished, timeout or cancellation).
+        """
+        return not self._thread.is_alive()
+
+    def wait(self, timeout: float = None):
+        """
+        Block until polling stops.
+
+        Parameters
+        ----------
+        timeout: float, optional
+            longest time in seconds to block. Default (None) waits as long as the broadcast does.
+
+        Returns
+        -------
+        finished: bool
+            True if every unit finished.
+        """
+        self._thread.join(timeout)
+        return self.done() and bool(self.finished)
+
+    def as_completed(self, timeout: float = None):
+        """
+        Yield the result of each unit as soon as it finishes, fastest first.
+
+        Parameters
+        ----------
+        timeout: float, optional
+            raise concurrent.futures.TimeoutError if not all units are through after this many
+            seconds. Units still pending when polling stops are not yielded.
+
+        Yields
+        ------
+        name, summary, response: tuple
+            unit name, response_summary (e.g., 'SUCCESS' or 'Machine Down') and full_response
+            (the final APIResponse, or the error code).
+        """
+        for future in as_completed(list(self.futures.values()), timeout=timeout):
+            if future.cancelled():
+                continue
+            summary, response = future.result()
+            yield self._names[future], summary, response
+
+    def cancel(self):
+        """
+        Stop polling. Units still pending stay PENDING in `df` and are not yielded by
+        `as_completed`. The units themselves are not interrupted.
+
+        Returns
+        -------
+        cancelled: bool
+            True if polling was still going on.
+        """
+        running = not self.done()
+        self.tracker.cancel()
+        self._thread.join()
+        return running
+
+    def summary(self):
+        """
+        WebRequestSummary of the broadcast as it stands.
+        """
+        return WebRequestSummary(self.df)
+
+    def __repr__(self):
+        return f"BroadcastHandle[{len(self.futures) - len(self.pending)}/{len(self.futures)} done]"
+
+
 class WebRequestSummary:
     def __init__(self, webrequest_df: pd.DataFrame):
         """
@@ -537,11 +788,19 @@ class WebRequestSummary:
 
 
 class APIResponse:
+    """
+    Container for webserver response.
+    Use APIResponse.info() to see fields.
+
+    Each top-level field of the response (e.g., `Activity`, `FilterTilter`) is available as an
+    attribute returning a WrapDF. The wrappers read the parsed dictionary directly and are only
+    created the first time a field is accessed.
+    """
+
+    __slots__ = ("response_dict", "result", "IP", "response_fields", "_views")
+
     def __init__(self, response_dict):
         """
-        Container for webserver response.
-        Use APIResponse.info() to see fields.
-
         Parameters
         ----------
         response_dict: dict
@@ -550,7 +809,26 @@ class APIResponse:
         self.response_dict = response_dict
         self.result = self.response_dict["Result"]
         self.IP = self.response_dict["IPAddress"]
-        self.response_fields = self.construct_dataframes()
+        self.response_fields = [
+            i for i in self.response_dict.keys() if i not in ["Result", "IPAddress"]
+        ]
+        self._views = {}
+
+    def __getattr__(self, name):
+        # Only reached when normal attribute lookup fails, i.e. for response fields.
+        try:
+            response_dict = object.__getattribute__(self, "response_dict")
+            views = object.__getattribute__(self, "_views")
+        except AttributeError:
+            raise AttributeError(name)
+        if name in ["Result", "IPAddress"] or name not in response_dict:
+            raise AttributeError(f"APIResponse has no field '{name}'")
+        if name not in views:
+            views[name] = WrapDF(response_dict[name])
+        return views[name]
+
+    def __dir__(self):
+        return list(object.__dir__(self)) + list(self.response_fields)
 
     def __repr__(self):
         return f"APIResponse[{self.IP}]"
@@ -581,19 +859,11 @@ class APIResponse:
     def construct_dataframes(self):
         """
         Constructs individual DataFrames for each main field in the status response, and wrap them.
+        Fields are otherwise built lazily on access; this forces all of them at once.
         """
-        response_fields = []
-        for i in self.response_dict.keys():
-            if i not in ["Result", "IPAddress"]:
-                setattr(
-                    self,
-                    i,
-                    WrapDF(
-                        pd.DataFrame.from_dict(self.response_dict[i], orient="index")
-                    ),
-                )
-                response_fields.append(i)
-        return response_fields
+        for i in self.response_fields:
+            getattr(self, i).df
+        return self.response_fields
 
 
 def ParseResponse(response, return_type="dict"):
@@ -619,19 +889,52 @@ def ParseResponse(response, return_type="dict"):
 class WrapDF:
     """
     Dataframe wrapper that provides a 'get' method.
+
+    Field values are read straight from the underlying dictionary; the DataFrame (`df`) and its
+    string form (`logstring`) are only built when asked for.
     """
 
+    __slots__ = ("_data", "_df", "_logstring")
+
     def __init__(self, df):
         """
         Parameters
         ----------
-        df: pandas.DataFrame
-
+        df: pandas.DataFrame or dict
+            single-column dataframe indexed by field name, or the equivalent {field: value} dictionary.
         """
-        self.df = df
-        for i in self.df.index:
-            setattr(self, i, self.df.loc[i].values[0])
-        self.logstring = self.df.to_string()
+        if isinstance(df, pd.DataFrame):
+            self._data = {i: df.loc[i].values[0] for i in df.index}
+            self._df = df
+        else:
+            self._data = df
+            self._df = None
+        self._logstring = None
+
+    @property
+    def df(self):
+        if self._df is None:
+            self._df = pd.DataFrame.from_dict(self._data, orient="index")
+        return self._df
+
+    @property
+    def logstring(self):
+        if self._logstring is None:
+            self._logstring = self.df.to_string()
+        return self._logstring
+
+    def __getattr__(self, name):
+        # Only reached when normal attribute lookup fails, i.e. for field names.
+        try:
+            data = object.__getattribute__(self, "_data")
+        except AttributeError:
+            raise AttributeError(name)
+        if name not in data:
+            raise AttributeError(f"WrapDF has no field '{name}'")
+        return data[name]
+
+    def __dir__(self):
+        return list(object.__dir__(self)) + list(self._data.keys())
 
     def __repr__(self):
         return self.df.__repr__()
@@ -648,4 +951,4 @@ class WrapDF:
         field: str
             name of the field to get value for.
         """
-        return self.df.loc[field].values[0]
+        return self._data[field]
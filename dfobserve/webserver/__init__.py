@@ -1 +1,2 @@
+from .SessionPool import *
 from .WebRequests import *
\ No newline at end of file